@@ -0,0 +1,121 @@
+"""Latency and peak memory of the report queries on each backend.
+
+Runs the airline report's summaries (KPIs, the monthly status counts and
+the top-10 city leaderboard) over ``flights-selected.parquet`` once per
+engine, each in a fresh interpreter so that peak RSS is not shared between
+engines::
+
+    python benchmarks/backends.py --repeat 5
+    python benchmarks/backends.py --memory-limit 512MB duckdb
+
+A small ``--memory-limit`` shows DuckDB spilling to its temp directory
+where the Polars engine has to hold every aggregation in memory.
+"""
+
+import argparse
+import json
+import resource
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+from maven_analytics import ingest
+from maven_analytics.backends import BACKENDS, DuckDBBackend, get_backend
+from maven_analytics.ingest import PORTFOLIO, REPO_ROOT
+from maven_analytics.report import ReportSpec
+
+FLIGHTS = PORTFOLIO / "airline-flight-delay-report/airlines-airports-data/flights-selected.parquet"
+
+FLIGHTS_SQL = """
+SELECT
+    f.MONTH, f.DAY_OF_WEEK, p.CITY,
+    CASE
+        WHEN f.CANCELLED = 1 THEN 'Canceled'
+        WHEN f.DEPARTURE_DELAY > 0 THEN 'Delayed'
+        ELSE 'On-Time'
+    END AS Status
+FROM flights AS f
+LEFT JOIN airports AS p ON f.ORIGIN_AIRPORT = p.IATA_CODE
+"""
+
+MEASURES = {
+    "total": "count(*)",
+    "delayed": "sum(CASE WHEN Status = 'Delayed' THEN 1 ELSE 0 END)",
+    "canceled": "sum(CASE WHEN Status = 'Canceled' THEN 1 ELSE 0 END)",
+}
+
+
+def run_queries(report: ReportSpec, flights) -> None:
+    report.kpis(flights)
+    report.summarize(flights, by="MONTH", measures=MEASURES, order_by="MONTH")
+    report.summarize(
+        flights,
+        by="CITY",
+        measures={"total": "count(*)"},
+        where="CITY IS NOT NULL",
+        order_by="total",
+        descending=True,
+        limit=10,
+    )
+
+
+def measure(engine: str, repeat: int, memory_limit: str) -> dict:
+    backend = (
+        DuckDBBackend(memory_limit=memory_limit)
+        if engine == "duckdb"
+        else get_backend(engine)
+    )
+    airports = backend.scan_parquet(ingest.convert("airline-flight-delay-report/airports"))
+    flights = backend.sql(
+        FLIGHTS_SQL, flights=backend.scan_parquet(FLIGHTS), airports=airports
+    )
+    report = ReportSpec(filters={}, measures=MEASURES, backend=backend)
+
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run_queries(report, flights)
+        timings.append(time.perf_counter() - start)
+    # ru_maxrss is in kilobytes on Linux
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    return {"median": float(np.median(timings)), "best": min(timings), "peak_mb": peak}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--memory-limit", default="2GB", help="DuckDB memory_limit")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("engines", nargs="*", default=list(BACKENDS))
+    args = parser.parse_args()
+
+    if args.child:
+        (engine,) = args.engines
+        print(json.dumps(measure(engine, args.repeat, args.memory_limit)))
+        return
+
+    print(f"{'engine':<8} {'median':>8} {'best':>8} {'peak RSS':>10}")
+    for engine in args.engines:
+        result = subprocess.run(
+            [
+                sys.executable, __file__, "--child",
+                "--repeat", str(args.repeat),
+                "--memory-limit", args.memory_limit,
+                engine,
+            ],
+            cwd=REPO_ROOT,
+            check=True,
+            capture_output=True,
+            text=True,
+        )
+        stats = json.loads(result.stdout)
+        print(
+            f"{engine:<8} {stats['median']:7.3f}s {stats['best']:7.3f}s"
+            f" {stats['peak_mb']:8.0f}MB"
+        )
+
+
+if __name__ == "__main__":
+    main()
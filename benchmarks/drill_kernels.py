@@ -0,0 +1,113 @@
+"""Pandas and Polars timings of the shared drill kernels at scaled sizes.
+
+Each kernel of ``maven_analytics.kernels`` runs on synthetic data of every
+size, once per library with its native path and, up to ``--generic-max``
+rows, with the generic narwhals path. Every result is checked against the
+Polars native one before it is timed::
+
+    python benchmarks/drill_kernels.py --sizes 10000 100000 1000000 --repeat 3
+
+Sizes are event rows for ``daily_streaks``, trading days for
+``golden_crosses`` and transactions for ``monthly_diffs``.
+"""
+
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+import polars as pl
+from polars.testing import assert_frame_equal
+
+from maven_analytics import kernels
+
+
+def days_from(start: str, offsets: np.ndarray) -> np.ndarray:
+    return np.datetime64(start, "D") + offsets.astype("timedelta64[D]")
+
+
+def lesson_events(rows: int, rng: np.random.Generator) -> pl.DataFrame:
+    users = max(rows // 50, 1)
+    return pl.DataFrame(
+        {
+            "user_id": rng.integers(0, users, rows),
+            "date": days_from("2024-01-01", rng.integers(0, 365, rows)),
+        }
+    ).with_columns(user_name=pl.format("user {}", "user_id"))
+
+
+def closing_prices(rows: int, rng: np.random.Generator) -> pl.DataFrame:
+    return pl.DataFrame({"Close": 100 + np.cumsum(rng.normal(0, 1, rows))})
+
+
+def transactions(rows: int, rng: np.random.Generator) -> pl.DataFrame:
+    return pl.DataFrame(
+        {
+            "store": rng.choice(["Astoria", "Hell's Kitchen", "Lower Manhattan"], rows),
+            "date": days_from("2023-01-01", rng.integers(0, 730, rows)),
+            "sales": rng.gamma(2.0, 2.5, rows),
+        }
+    )
+
+
+KERNELS = {
+    "daily_streaks": (kernels.daily_streaks, lesson_events),
+    "golden_crosses": (kernels.golden_crosses, closing_prices),
+    "monthly_diffs": (kernels.monthly_diffs, transactions),
+}
+
+
+def as_polars(result) -> pl.DataFrame:
+    """``result`` in Polars with the dtypes pandas changes normalized."""
+    if isinstance(result, pd.DataFrame):
+        result = pl.from_pandas(result, nan_to_null=True)
+    return result.with_columns(
+        pl.selectors.datetime().cast(pl.Date), pl.selectors.integer().cast(pl.Int64)
+    )
+
+
+def timed(kernel, frame, native: bool, repeat: int):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = kernel(frame, native=native)
+        timings.append(time.perf_counter() - start)
+    return result, float(np.median(timings))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument(
+        "--generic-max", type=int, default=100_000, help="largest size for the generic path"
+    )
+    parser.add_argument("kernels", nargs="*", default=list(KERNELS))
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    paths = [("polars", True), ("pandas", True), ("polars", False), ("pandas", False)]
+    header = "".join(f"{lib + (' (nw)' if not native else ''):>16}" for lib, native in paths)
+    print(f"{'kernel':<16} {'rows':>10}{header}")
+    for name in args.kernels:
+        kernel, make = KERNELS[name]
+        for rows in args.sizes:
+            frames = {"polars": make(rows, rng)}
+            frames["pandas"] = frames["polars"].to_pandas()
+            expected = None
+            cells = []
+            for lib, native in paths:
+                if not native and rows > args.generic_max:
+                    cells.append(f"{'-':>16}")
+                    continue
+                result, seconds = timed(kernel, frames[lib], native, args.repeat)
+                result = as_polars(result)
+                if expected is None:
+                    expected = result
+                assert_frame_equal(result, expected, check_dtypes=False, rel_tol=1e-9)
+                cells.append(f"{seconds * 1000:14.1f}ms")
+            print(f"{name:<16} {rows:>10}{''.join(cells)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""Time-to-first-paint of the marimo apps with and without snapshots.
+
+Each app is run headless (``python <app>.py`` executes every cell once, which
+is what the first paint needs) in a fresh interpreter. The cold run starts
+with the app's snapshot or embeddings cache removed, so every summary is
+recomputed from the sources and the snapshot is written; the warm runs
+memory-map the snapshot instead::
+
+    python benchmarks/first_paint.py --repeat 5
+"""
+
+import argparse
+import shutil
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+from maven_analytics.candy import EMBEDDINGS_DIR, SWEEPS_DIR
+from maven_analytics.ingest import PORTFOLIO, REPO_ROOT
+from maven_analytics.snapshot import SNAPSHOT_DIR
+
+APPS = {
+    "airline-flight-delay-report": [SNAPSHOT_DIR / "airline-flight-delay-report"],
+    "toy-store-kpi-report": [SNAPSHOT_DIR / "toy-store-kpi-report"],
+    "candy-recommendation": [EMBEDDINGS_DIR, SWEEPS_DIR],
+}
+
+
+def run_app(name: str) -> float:
+    start = time.perf_counter()
+    subprocess.run(
+        [sys.executable, str(PORTFOLIO / name / f"{name}.py")],
+        cwd=REPO_ROOT,
+        check=True,
+        capture_output=True,
+    )
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("apps", nargs="*", default=list(APPS))
+    args = parser.parse_args()
+
+    print(f"{'app':<30} {'cold':>8} {'warm':>8}")
+    for name in args.apps:
+        for cache in APPS[name]:
+            shutil.rmtree(cache, ignore_errors=True)
+        cold = run_app(name)
+        warm = np.median([run_app(name) for _ in range(args.repeat)])
+        print(f"{name:<30} {cold:7.2f}s {warm:7.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""Import-time profile of each marimo app, for its setup block and its cells.
+
+Loads every app module in a fresh ``python -X importtime`` interpreter,
+which runs ``app.setup``, and then runs its cells with ``app.run()``, as a
+headless or scheduled run does. The total import time and the most
+expensive top-level packages are reported separately for the two phases, so
+an import moved out of the setup block shows up where it lands instead of
+disappearing::
+
+    python benchmarks/import_time.py --top 8
+"""
+
+import argparse
+import re
+import subprocess
+import sys
+from collections import Counter
+
+from maven_analytics.ingest import PORTFOLIO, REPO_ROOT
+
+APPS = [
+    "airline-flight-delay-report",
+    "toy-store-kpi-report",
+    "candy-recommendation",
+]
+
+PHASES = ("setup", "cells")
+
+RUN_APP = """
+import importlib.util, sys
+spec = importlib.util.spec_from_file_location("app", sys.argv[1])
+module = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(module)
+print("phase: cells", file=sys.stderr, flush=True)
+module.app.run()
+"""
+
+# "import time: <self us> | <cumulative us> | <indent><module>"
+IMPORT_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+
+def profile(name: str) -> dict[str, Counter]:
+    """Cumulative import time in microseconds per top-level package and phase."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", RUN_APP, str(PORTFOLIO / name / f"{name}.py")],
+        cwd=REPO_ROOT,
+        check=True,
+        capture_output=True,
+        text=True,
+    )
+    phases = {phase: Counter() for phase in PHASES}
+    packages = phases["setup"]
+    for line in result.stderr.splitlines():
+        if line == "phase: cells":
+            packages = phases["cells"]
+        match = IMPORT_LINE.match(line)
+        # one leading space marks a module imported directly, not as a dependency
+        if match and len(match.group(3)) == 1:
+            packages[match.group(4).split(".")[0]] += int(match.group(2))
+    return phases
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--top", type=int, default=5)
+    parser.add_argument("apps", nargs="*", default=APPS)
+    args = parser.parse_args()
+
+    for name in args.apps:
+        print(name)
+        for phase, packages in profile(name).items():
+            print(f"  {phase}: {sum(packages.values()) / 1e6:.3f}s")
+            for package, micros in packages.most_common(args.top):
+                print(f"    {package:<24} {micros / 1e6:.3f}s")
+
+
+if __name__ == "__main__":
+    main()
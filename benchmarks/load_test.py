@@ -0,0 +1,240 @@
+"""Concurrent viewers of the airline report, with and without shared state.
+
+Each simulated session runs on its own thread and event loop, as a marimo
+run-mode kernel does, and replays random cross-filter states drawn from a
+small pool (viewers of one report click on the same cities and airlines).
+A click awaits the report's three bitmap summaries through
+``ReportSnapshot.collect``. Two modes run, each in a fresh interpreter so
+that peak RSS is per mode::
+
+    isolated   every session builds its own bitmap index, keeps its own
+               result cache and snapshot, and has its own query pool
+    shared     one index (``serving.shared``), one result cache and
+               snapshot, and one bounded ``WorkerPool`` for all sessions
+
+    python benchmarks/load_test.py --sessions 16 --clicks 50 --workers 4
+
+Reported per mode: click latency percentiles, clicks per second, the share
+of summaries served without running a query, pool rejections and peak RSS.
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+import polars as pl
+
+from maven_analytics import ingest
+from maven_analytics.async_query import QueryRunner
+from maven_analytics.bitmaps import BitmapIndex
+from maven_analytics.ingest import PORTFOLIO, REPO_ROOT
+from maven_analytics.report import ResultCache, freeze
+from maven_analytics.serving import PoolSaturated, WorkerPool, shared
+from maven_analytics.snapshot import ReportSnapshot
+
+FLIGHTS = PORTFOLIO / "airline-flight-delay-report/airlines-airports-data/flights-selected.parquet"
+INDEXED = ["CITY", "AIRLINE NAME", "DAY_OF_WEEK", "MONTH", "Status"]
+STATUS_COUNTS = {
+    "total": {},
+    "delayed": {"Status": "Delayed"},
+    "canceled": {"Status": "Canceled"},
+}
+
+
+def load_flights() -> pl.DataFrame:
+    airlines = ingest.scan("airline-flight-delay-report/airlines")
+    airports = ingest.scan("airline-flight-delay-report/airports")
+    return (
+        pl.scan_parquet(FLIGHTS)
+        .join(airlines, left_on="AIRLINE", right_on="IATA_CODE", how="left")
+        .join(airports, left_on="ORIGIN_AIRPORT", right_on="IATA_CODE", how="left")
+        .select(
+            "CITY",
+            pl.col("AIRLINE_right").alias("AIRLINE NAME"),
+            "DAY_OF_WEEK",
+            "MONTH",
+            Status=pl.when(pl.col("CANCELLED") == 1)
+            .then(pl.lit("Canceled"))
+            .when(pl.col("DEPARTURE_DELAY") > 0)
+            .then(pl.lit("Delayed"))
+            .otherwise(pl.lit("On-Time")),
+        )
+        .collect()
+    )
+
+
+def filter_states(index: BitmapIndex, n_states: int, seed: int) -> list[dict]:
+    """``n_states`` filter states over the busiest cities and airlines."""
+    rng = random.Random(seed)
+    cities = sorted(
+        (c for c in index.values("CITY") if c is not None),
+        key=lambda c: -index.count(index.bitmap("CITY", c)),
+    )[:20]
+    airlines = [a for a in index.values("AIRLINE NAME") if a is not None]
+    states = [{}]  # the default view
+    while len(states) < n_states:
+        states.append(
+            {
+                "CITY": tuple(sorted(rng.sample(cities, rng.randint(0, 3)))),
+                "AIRLINE NAME": tuple(sorted(rng.sample(airlines, rng.randint(0, 2)))),
+                "DAY_OF_WEEK": tuple(sorted(rng.sample(range(1, 8), rng.randint(0, 2)))),
+            }
+        )
+    return states
+
+
+class Session:
+    def __init__(self, mode: str, flights: pl.DataFrame, workers: int, root: Path):
+        if mode == "shared":
+            self.index = shared(
+                ("load-test", "flight_index"), lambda: BitmapIndex.build(flights, INDEXED)
+            )
+            self.runner = QueryRunner(
+                shared(("load-test", "pool"), lambda: WorkerPool(max_workers=workers))
+            )
+            self.cache = shared(("load-test", "cache"), ResultCache)
+            self.snapshot = shared(
+                ("load-test", "snapshot"),
+                lambda: ReportSnapshot("load-test", [FLIGHTS], root=root),
+            )
+        else:
+            self.index = BitmapIndex.build(flights, INDEXED)
+            self.runner = QueryRunner(WorkerPool(max_workers=workers))
+            self.cache = ResultCache()
+            self.snapshot = ReportSnapshot(
+                "load-test", [FLIGHTS], root=Path(tempfile.mkdtemp(dir=root))
+            )
+        self.queries = 0
+        self._lock = threading.Lock()
+
+    def _summary(self, selections: tuple, by: str | None):
+        def compute():
+            with self._lock:
+                self.queries += 1
+            return self.index.summarize(self.index.mask(selections), by, STATUS_COUNTS)
+
+        return compute
+
+    async def click(self, state: dict) -> None:
+        selections = tuple((column, value) for column, value in state.items() if value)
+        view = freeze(state)
+        await asyncio.gather(
+            *(
+                self.snapshot.collect(
+                    self.runner,
+                    name,
+                    self._summary(selections, by),
+                    view=view,
+                    cache=self.cache,
+                )
+                for name, by in [("kpis", None), ("monthly", "MONTH"), ("cities", "CITY")]
+            )
+        )
+
+
+def run_session(
+    session: Session, states: list[dict], clicks: int, seed: int, out: dict
+) -> None:
+    rng = random.Random(seed)
+
+    async def replay():
+        for _ in range(clicks):
+            start = time.perf_counter()
+            try:
+                await session.click(rng.choice(states))
+            except PoolSaturated:
+                out["rejected"] += 1
+                continue
+            out["latencies"].append(time.perf_counter() - start)
+
+    asyncio.run(replay())
+
+
+def measure(mode: str, sessions: int, clicks: int, workers: int, n_states: int) -> dict:
+    flights = load_flights()
+    results = [{"latencies": [], "rejected": 0} for _ in range(sessions)]
+    with tempfile.TemporaryDirectory() as root:
+        start = time.perf_counter()
+        # sessions open together, as when a dashboard link is shared
+        opened = [Session(mode, flights, workers, Path(root)) for _ in range(sessions)]
+        states = filter_states(opened[0].index, n_states, seed=0)
+        threads = [
+            threading.Thread(
+                target=run_session, args=(session, states, clicks, seed, out)
+            )
+            for seed, (session, out) in enumerate(zip(opened, results))
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - start
+
+    latencies = np.array([t for out in results for t in out["latencies"]])
+    summaries = 3 * len(latencies)
+    queries = sum(session.queries for session in opened)
+    return {
+        "p50": float(np.percentile(latencies, 50)),
+        "p95": float(np.percentile(latencies, 95)),
+        "p99": float(np.percentile(latencies, 99)),
+        "clicks_per_s": len(latencies) / elapsed,
+        "hit_rate": 1 - queries / summaries if summaries else 0.0,
+        "rejected": sum(out["rejected"] for out in results),
+        # ru_maxrss is in kilobytes on Linux
+        "peak_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=8)
+    parser.add_argument("--clicks", type=int, default=30, help="clicks per session")
+    parser.add_argument("--workers", type=int, default=4, help="query threads per pool")
+    parser.add_argument("--states", type=int, default=40, help="distinct filter states")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("modes", nargs="*", default=["isolated", "shared"])
+    args = parser.parse_args()
+
+    if args.child:
+        (mode,) = args.modes
+        print(json.dumps(measure(mode, args.sessions, args.clicks, args.workers, args.states)))
+        return
+
+    print(
+        f"{'mode':<9} {'p50':>8} {'p95':>8} {'p99':>8} {'clicks/s':>9}"
+        f" {'hits':>6} {'rejected':>9} {'peak RSS':>9}"
+    )
+    for mode in args.modes:
+        result = subprocess.run(
+            [
+                sys.executable, __file__, "--child",
+                "--sessions", str(args.sessions),
+                "--clicks", str(args.clicks),
+                "--workers", str(args.workers),
+                "--states", str(args.states),
+                mode,
+            ],
+            cwd=REPO_ROOT,
+            check=True,
+            capture_output=True,
+            text=True,
+        )
+        stats = json.loads(result.stdout)
+        print(
+            f"{mode:<9} {stats['p50'] * 1000:6.1f}ms {stats['p95'] * 1000:6.1f}ms"
+            f" {stats['p99'] * 1000:6.1f}ms {stats['clicks_per_s']:9.1f}"
+            f" {stats['hit_rate']:6.0%} {stats['rejected']:9d} {stats['peak_mb']:7.0f}MB"
+        )
+
+
+if __name__ == "__main__":
+    main()
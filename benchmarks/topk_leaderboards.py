@@ -0,0 +1,134 @@
+"""Benchmark the airline leaderboards: full group_by vs partial top-k.
+
+Writes a synthetic multi-file flights table (``--rows`` flights split over
+``--partitions`` files, drawn from the real airline and airport codes), then
+times a full ``group_by(...).sort(...).head(10)`` over every file against
+``topk.city_flight_counts`` and ``topk.airline_delay_rates`` and checks that
+both return the same leaderboards. ``--data-dir`` keeps the generated files
+for later runs::
+
+    python benchmarks/topk_leaderboards.py --rows 100_000_000 --partitions 50
+"""
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import polars as pl
+
+from maven_analytics import ingest, topk
+
+
+def write_flights(target: Path, rows: int, partitions: int, seed: int = 0) -> None:
+    rng = np.random.default_rng(seed)
+    airlines = ingest.read("airline-flight-delay-report/airlines")["IATA_CODE"].to_numpy()
+    airports = ingest.read("airline-flight-delay-report/airports")["IATA_CODE"].to_numpy()
+    # skewed airport traffic, like real hubs
+    weights = rng.pareto(1.2, len(airports)) + 1
+    weights /= weights.sum()
+
+    target.mkdir(parents=True, exist_ok=True)
+    for part, size in enumerate(np.diff(np.linspace(0, rows, partitions + 1).astype(int))):
+        canceled = rng.random(size) < 0.02
+        pl.DataFrame(
+            {
+                "AIRLINE": rng.choice(airlines, size),
+                "ORIGIN_AIRPORT": rng.choice(airports, size, p=weights),
+                "DEPARTURE_DELAY": np.where(
+                    canceled, np.nan, np.round(rng.normal(5, 30, size))
+                ),
+                "CANCELLED": canceled.astype(np.int8),
+            }
+        ).write_parquet(target / f"part-{part:05d}.parquet")
+
+
+def with_dimensions(scan: pl.LazyFrame) -> pl.LazyFrame:
+    return (
+        scan.with_columns(
+            Status=pl.when(pl.col("CANCELLED") == 1)
+            .then(pl.lit("Canceled"))
+            .when(pl.col("DEPARTURE_DELAY") > 0)
+            .then(pl.lit("Delayed"))
+            .otherwise(pl.lit("On-Time"))
+        )
+        .join(
+            ingest.scan("airline-flight-delay-report/airlines"),
+            left_on="AIRLINE",
+            right_on="IATA_CODE",
+            how="left",
+            suffix=" NAME",
+        )
+        .join(
+            ingest.scan("airline-flight-delay-report/airports"),
+            left_on="ORIGIN_AIRPORT",
+            right_on="IATA_CODE",
+            how="left",
+        )
+    )
+
+
+def full_group_by(flights: pl.LazyFrame) -> tuple[pl.DataFrame, pl.DataFrame]:
+    cities = (
+        flights.filter(pl.col("CITY").is_not_null())
+        .group_by("CITY")
+        .agg(total=pl.len())
+        .sort("total", "CITY", descending=[True, False])
+        .head(10)
+        .collect()
+    )
+    airlines = (
+        flights.group_by("AIRLINE NAME")
+        .agg(total=pl.len(), delayed=(pl.col("Status") == "Delayed").sum())
+        .with_columns(pct_delayed=pl.col("delayed") / pl.col("total"))
+        .sort("pct_delayed", "AIRLINE NAME", descending=[True, False], nulls_last=True)
+        .head(10)
+        .collect()
+    )
+    return cities, airlines
+
+
+def partial_top_k(partitions: list[pl.LazyFrame]) -> tuple[pl.DataFrame, pl.DataFrame]:
+    return topk.city_flight_counts(partitions), topk.airline_delay_rates(partitions)
+
+
+def timed(label: str, run, repeat: int):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = run()
+        times.append(time.perf_counter() - start)
+    print(f"{label:<16} best {min(times):7.3f}s  median {np.median(times):7.3f}s")
+    return result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100_000_000)
+    parser.add_argument("--partitions", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--data-dir", type=Path, default=None)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        data_dir = args.data_dir or Path(tmp) / "flights"
+        if not any(data_dir.glob("*.parquet")):
+            start = time.perf_counter()
+            write_flights(data_dir, args.rows, args.partitions)
+            print(f"wrote {args.rows:,} flights in {time.perf_counter() - start:.1f}s")
+
+        partitions = [with_dimensions(scan) for scan in topk.scan_partitions(data_dir)]
+        expected = timed(
+            "full group_by", lambda: full_group_by(pl.concat(partitions)), args.repeat
+        )
+        actual = timed("partial top-k", lambda: partial_top_k(partitions), args.repeat)
+
+    for want, got in zip(expected, actual):
+        want = want.with_columns(pl.selectors.integer().cast(pl.Int64))
+        assert want.equals(got.select(want.columns)), (want, got)
+    print("leaderboards match")
+
+
+if __name__ == "__main__":
+    main()
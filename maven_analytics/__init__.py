@@ -0,0 +1 @@
+"""Shared data layer for the Maven Analytics drills and portfolio reports."""
@@ -0,0 +1,138 @@
+"""City-partitioned Airbnb listings and a single-scan price report.
+
+``partition_listings`` rewrites ``Listings.parquet`` as a hive-partitioned
+dataset (``city=<name>/part-0.parquet``) with each partition sorted by
+neighbourhood, so row-group statistics let a city or neighbourhood filter
+skip most of the file. ``price_cube`` aggregates every city at once into a
+small (city, neighbourhood, accommodates, year) cube, and ``price_report``
+derives the neighbourhood, accommodates and host-year tables for all cities
+from that cube, so a global report costs one scan.
+"""
+
+import json
+import shutil
+from pathlib import Path
+
+import polars as pl
+
+from maven_analytics.ingest import CACHE_DIR, REPO_ROOT, checksum
+
+LISTINGS_PATH = (
+    REPO_ROOT / "project-portfolio/airbnb-listing-analysis/airbnb-data/Listings.parquet"
+)
+PARTITIONED_DIR = CACHE_DIR / "airbnb-listing-analysis/listings"
+ROW_GROUP_SIZE = 16_384
+
+CUBE_KEYS = ["city", "neighbourhood", "accommodates", "year"]
+
+
+def partition_listings(
+    source: Path = LISTINGS_PATH,
+    target: Path = PARTITIONED_DIR,
+    force: bool = False,
+) -> Path:
+    """Write ``source`` partitioned by city, skipping the work if it is unchanged."""
+    manifest_path = target / "manifest.json"
+    digest = checksum(source)
+    if (
+        not force
+        and manifest_path.exists()
+        and json.loads(manifest_path.read_text()).get("sha256") == digest
+    ):
+        return target
+
+    # cities missing from the new source must not survive as stale partitions
+    if target.exists():
+        shutil.rmtree(target)
+    listings = pl.read_parquet(source).sort("city", "neighbourhood")
+    for (city,), partition in listings.partition_by(
+        "city", as_dict=True, include_key=False, maintain_order=True
+    ).items():
+        city_dir = target / f"city={city}"
+        city_dir.mkdir(parents=True, exist_ok=True)
+        partition.write_parquet(
+            city_dir / "part-0.parquet",
+            compression="zstd",
+            row_group_size=ROW_GROUP_SIZE,
+            statistics=True,
+        )
+
+    manifest_path.write_text(json.dumps({"sha256": digest}))
+    return target
+
+
+def scan_listings(target: Path = PARTITIONED_DIR) -> pl.LazyFrame:
+    if LISTINGS_PATH.exists():
+        partition_listings(target=target)
+    return pl.scan_parquet(target / "**/*.parquet", hive_partitioning=True)
+
+
+def price_cube(listings: pl.LazyFrame) -> pl.LazyFrame:
+    """Price sums and counts per (city, neighbourhood, accommodates, year)."""
+    return (
+        listings
+        .select("city", "neighbourhood", "accommodates", "host_since", "price")
+        .group_by(
+            "city",
+            "neighbourhood",
+            "accommodates",
+            pl.col("host_since").dt.year().alias("year"),
+        )
+        .agg(
+            listings=pl.len(),
+            priced=pl.col("price").count(),
+            price_sum=pl.col("price").sum(),
+        )
+    )
+
+
+def _avg_price(group_by: list[str], cube: pl.LazyFrame) -> pl.LazyFrame:
+    return (
+        cube
+        .group_by(group_by)
+        .agg(pl.col("listings").sum(), pl.col("priced").sum(), pl.col("price_sum").sum())
+        .with_columns(avg_price=pl.col("price_sum") / pl.col("priced"))
+    )
+
+
+def price_report(cube: pl.DataFrame) -> dict[str, pl.DataFrame]:
+    """Neighbourhood, accommodates and host-year price tables for every city.
+
+    The accommodates table is restricted to each city's most expensive
+    neighbourhood.
+    """
+    cube = cube.lazy()
+
+    neighbourhood = _avg_price(["city", "neighbourhood"], cube)
+    top_neighbourhood = neighbourhood.filter(
+        pl.col("avg_price") == pl.col("avg_price").max().over("city")
+    ).select("city", "neighbourhood")
+
+    queries = {
+        "neighbourhood": (
+            neighbourhood
+            .select("city", "neighbourhood", "avg_price")
+            .sort("city", "avg_price")
+        ),
+        "accommodates": (
+            _avg_price(
+                ["city", "neighbourhood", "accommodates"],
+                cube.join(top_neighbourhood, on=["city", "neighbourhood"], how="semi"),
+            )
+            .select("city", "neighbourhood", "accommodates", "avg_price")
+            .sort("city", "avg_price")
+        ),
+        "over_time": (
+            _avg_price(["city", "year"], cube.filter(pl.col("year").is_not_null()))
+            .select("city", "year", pl.col("listings").alias("new_hosts"), "avg_price")
+            .sort("city", "year")
+        ),
+    }
+    return dict(zip(queries, pl.collect_all(queries.values())))
+
+
+def city_report(report: dict[str, pl.DataFrame], city: str) -> dict[str, pl.DataFrame]:
+    return {
+        name: table.filter(pl.col("city") == city).drop("city")
+        for name, table in report.items()
+    }
@@ -0,0 +1,97 @@
+"""Background query execution for the marimo dashboards.
+
+``QueryRunner.collect`` runs a ``LazyFrame.collect()`` (or any zero-argument
+callable) on a thread pool and awaits it, so an async marimo cell does not
+block the kernel's event loop while Polars works. Each query is tracked under
+a key such as ``"monthly_status_counts"``: submitting a new query for a key
+supersedes the previous one. If the previous query has not started yet it is
+cancelled. If it is already running, its result is dropped when it finishes.
+A superseded await returns the last result that completed for the key, so
+the cell keeps showing the last good data until the newest query lands. An
+await that is itself cancelled (marimo re-running the cell) raises
+``CancelledError`` as usual.
+
+Queries run on a ``WorkerPool``; by default the process-wide
+``serving.QUERY_POOL``, so every session of a served report shares one
+bounded set of workers.
+"""
+
+import asyncio
+import threading
+import weakref
+from collections.abc import Callable
+from concurrent.futures import Future
+from typing import Any
+
+import polars as pl
+
+from maven_analytics.serving import QUERY_POOL, WorkerPool
+
+Query = pl.LazyFrame | Callable[[], Any]
+
+
+class QueryRunner:
+    def __init__(self, pool: WorkerPool = QUERY_POOL):
+        self.pool = pool
+        self._lock = threading.Lock()
+        self._generation: dict[str, int] = {}
+        self._pending: dict[str, Future] = {}
+        self._last_good: dict[str, Any] = {}
+        # queries cancelled because a newer one replaced them
+        self._superseded: weakref.WeakSet[Future] = weakref.WeakSet()
+
+    def submit(self, key: str, query: Query) -> tuple[int, Future]:
+        """Start ``query`` for ``key``, cancelling the query it supersedes."""
+        run = query.collect if isinstance(query, pl.LazyFrame) else query
+        with self._lock:
+            generation = self._generation.get(key, 0) + 1
+            self._generation[key] = generation
+            previous = self._pending.get(key)
+            if previous is not None and previous.cancel():
+                self._superseded.add(previous)
+            future = self.pool.submit(run)
+            self._pending[key] = future
+        return generation, future
+
+    def is_current(self, key: str, generation: int) -> bool:
+        with self._lock:
+            return self._generation.get(key) == generation
+
+    def latest(self, key: str, default: Any = None) -> Any:
+        """The result of the newest query for ``key`` that has completed."""
+        with self._lock:
+            return self._last_good.get(key, default)
+
+    async def collect(self, key: str, query: Query) -> Any:
+        generation, future = self.submit(key, query)
+        try:
+            result = await asyncio.wrap_future(future)
+        except asyncio.CancelledError:
+            with self._lock:
+                superseded = future in self._superseded
+            task = asyncio.current_task()
+            # superseded before it started: fall back to the last good result
+            if superseded and not (task is not None and task.cancelling()):
+                return self.latest(key)
+            raise
+
+        with self._lock:
+            if self._generation.get(key) != generation:
+                return self._last_good.get(key, result)
+            self._last_good[key] = result
+            self._pending.pop(key, None)
+        return result
+
+    async def collect_all(self, queries: dict[str, Query]) -> dict[str, Any]:
+        """Run several keyed queries concurrently."""
+        results = await asyncio.gather(
+            *(self.collect(key, query) for key, query in queries.items())
+        )
+        return dict(zip(queries, results))
+
+    def cancel_pending(self) -> None:
+        """Cancel this runner's queries that have not started (the pool is shared)."""
+        with self._lock:
+            for future in self._pending.values():
+                future.cancel()
+            self._pending.clear()
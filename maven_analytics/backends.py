@@ -0,0 +1,274 @@
+"""Pluggable query engines for the report queries.
+
+A report's filters, KPIs and summaries are written once against the small
+interface below, with measures as SQL aggregate strings such as
+``"count(*)"`` or ``"sum(CASE WHEN Status = 'Delayed' THEN 1 ELSE 0 END)"``.
+Each backend runs them on its own relation type:
+
+``PolarsBackend``
+    ``pl.LazyFrame``; measures are parsed with ``pl.sql_expr`` and several
+    aggregates are collected together with ``pl.collect_all``.
+
+``DuckDBBackend``
+    ``duckdb.DuckDBPyRelation`` over the same parquet files, or a deferred
+    query over such relations built by ``sql``. The connection
+    has a memory limit and a spill directory, so aggregations larger than
+    memory spill to disk instead of failing.
+
+Aggregates always come back as Polars DataFrames, so anything after the
+aggregation (ratios, sorting, top-k) is shared. ``get_backend`` picks the
+engine from the ``MAVEN_BACKEND`` environment variable (``polars`` by
+default), so the engine can be chosen per deployment.
+"""
+
+import functools
+import itertools
+import os
+import threading
+from collections.abc import Iterator, Sequence
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+import polars as pl
+
+from maven_analytics.ingest import CACHE_DIR
+
+Selections = tuple[tuple[str, Any], ...]
+
+
+def _normalize(frame: pl.DataFrame) -> pl.DataFrame:
+    """Integer-valued decimals (DuckDB sums of integers) as Int64, others as Float64."""
+    return frame.with_columns(
+        pl.col(name).cast(pl.Int64 if dtype.scale == 0 else pl.Float64)
+        for name, dtype in frame.schema.items()
+        if isinstance(dtype, pl.Decimal)
+    )
+
+
+class PolarsBackend:
+    name = "polars"
+
+    def scan_parquet(self, path: Path | str) -> pl.LazyFrame:
+        return pl.scan_parquet(path)
+
+    def from_polars(self, frame: pl.DataFrame | pl.LazyFrame) -> pl.LazyFrame:
+        return frame.lazy()
+
+    def sql(self, query: str, **tables: pl.LazyFrame) -> pl.LazyFrame:
+        return pl.SQLContext(tables).execute(query, eager=False)
+
+    def filter(self, relation: pl.LazyFrame, selections: Selections) -> pl.LazyFrame:
+        """``column == value`` for scalars, ``column IN values`` for tuples."""
+        predicates = [
+            pl.col(column).is_in(value)
+            if isinstance(value, tuple)
+            else pl.col(column) == value
+            for column, value in selections
+        ]
+        return relation.filter(*predicates) if predicates else relation
+
+    def where(self, relation: pl.LazyFrame, condition: str) -> pl.LazyFrame:
+        """Rows matching the SQL ``condition``."""
+        return relation.filter(pl.sql_expr(condition))
+
+    def lookup(
+        self, relation: pl.LazyFrame, table: pl.DataFrame, key: str, columns: list[str]
+    ) -> pl.LazyFrame:
+        """Attach ``columns`` of ``table``, whose row position equals ``key``.
+
+        A gather by position: no hash table is built and no join runs. The
+        gather is declared elementwise, so filters applied to the result are
+        still pushed below it to the scans.
+        """
+
+        def gather(values: pl.Series) -> pl.Expr:
+            return pl.col(key).map_batches(
+                values.gather, return_dtype=values.dtype, is_elementwise=True
+            )
+
+        return relation.with_columns(
+            gather(table.get_column(column)).alias(column) for column in columns
+        )
+
+    def aggregate(
+        self,
+        relations: Sequence[pl.LazyFrame],
+        by: list[str],
+        measures: dict[str, str],
+    ) -> list[pl.DataFrame]:
+        exprs = {name: pl.sql_expr(sql) for name, sql in measures.items()}
+        return pl.collect_all(
+            relation.group_by(by).agg(**exprs) if by else relation.select(**exprs)
+            for relation in relations
+        )
+
+    def collect(self, relation: pl.LazyFrame, columns: list[str]) -> pl.DataFrame:
+        return relation.select(columns).collect()
+
+    def distinct(self, relation: pl.LazyFrame, column: str) -> pl.DataFrame:
+        return relation.select(column).unique().sort(column).collect()
+
+    def sink(self, relation: pl.LazyFrame, path: Path, format: str) -> None:
+        """Stream ``relation`` to ``path`` without collecting it."""
+        if format == "csv":
+            relation.sink_csv(path)
+        else:
+            relation.sink_parquet(path)
+
+
+@dataclass(frozen=True)
+class _Query:
+    """SQL over the relations in ``views``, registered only while it runs."""
+
+    text: str
+    views: dict[str, Any]
+
+
+class DuckDBBackend:
+    name = "duckdb"
+
+    def __init__(
+        self,
+        memory_limit: str = "2GB",
+        temp_directory: Path = CACHE_DIR / "duckdb-spill",
+        threads: int | None = None,
+    ):
+        import duckdb
+
+        self.duckdb = duckdb
+        temp_directory.mkdir(parents=True, exist_ok=True)
+        config = {
+            "memory_limit": memory_limit,
+            "temp_directory": str(temp_directory),
+            # lets large aggregations stream instead of buffering to keep row order
+            "preserve_insertion_order": False,
+        }
+        if threads:
+            config["threads"] = threads
+        self.connection = duckdb.connect(config=config)
+        # one connection serves every worker thread; DuckDB parallelizes each query
+        self._lock = threading.Lock()
+        self._view_ids = itertools.count()
+
+    def scan_parquet(self, path: Path | str):
+        return self.connection.read_parquet(str(path))
+
+    def from_polars(self, frame: pl.DataFrame | pl.LazyFrame):
+        if isinstance(frame, pl.LazyFrame):
+            frame = frame.collect()
+        return self.connection.from_arrow(frame.to_arrow())
+
+    def sql(self, query: str, **tables):
+        """``query`` with each keyword bound to a relation, run when read.
+
+        Each relation gets a view name unique to this backend, which a CTE
+        gives its keyword, so two models built from different ``sales``
+        relations stay independent. DuckDB relations look their views up by
+        name every time they run, so the views are registered by the methods
+        that read a result, under the lock, and unregistered once it is
+        read; the catalog holds no views between queries.
+        """
+        ctes = []
+        views = {}
+        for name, relation in tables.items():
+            if isinstance(relation, _Query):
+                views.update(relation.views)
+                source = relation.text
+            else:
+                view = f"_relation_{next(self._view_ids)}"
+                views[view] = relation
+                source = f"SELECT * FROM {view}"
+            ctes.append(f'"{name}" AS ({source})')
+        with_clause = f"WITH {', '.join(ctes)} " if ctes else ""
+        return _Query(f"{with_clause}SELECT * FROM ({query})", views)
+
+    @contextmanager
+    def _bound(self, relation) -> Iterator:
+        """``relation`` as a DuckDB relation, its views registered until the block exits.
+
+        Callers hold the lock.
+        """
+        if not isinstance(relation, _Query):
+            yield relation
+            return
+        try:
+            for view, table in relation.views.items():
+                self.connection.register(view, table)
+            yield self.connection.sql(relation.text)
+        finally:
+            for view in relation.views:
+                self.connection.unregister(view)
+
+    def filter(self, relation, selections: Selections):
+        for column, value in selections:
+            column = self.duckdb.ColumnExpression(column)
+            if isinstance(value, tuple):
+                predicate = column.isin(*map(self.duckdb.ConstantExpression, value))
+            else:
+                predicate = column == self.duckdb.ConstantExpression(value)
+            relation = self.where(relation, predicate)
+        return relation
+
+    def where(self, relation, condition):
+        """Rows matching ``condition``, SQL text or a DuckDB expression."""
+        if isinstance(relation, _Query):
+            return _Query(f"SELECT * FROM ({relation.text}) WHERE {condition}", relation.views)
+        return relation.filter(condition)
+
+    def lookup(self, relation, table: pl.DataFrame, key: str, columns: list[str]):
+        selected = ", ".join(f't."{column}"' for column in columns)
+        return self.sql(
+            f'SELECT r.*, {selected} FROM r LEFT JOIN t ON r."{key}" = t."{key}"',
+            r=relation,
+            t=self.from_polars(table.select(key, *columns)),
+        )
+
+    def aggregate(
+        self, relations: Sequence, by: list[str], measures: dict[str, str]
+    ) -> list[pl.DataFrame]:
+        groups = ", ".join(f'"{column}"' for column in by)
+        selects = ", ".join(
+            [groups] * bool(by) + [f'{sql} AS "{name}"' for name, sql in measures.items()]
+        )
+        frames = []
+        with self._lock:
+            for relation in relations:
+                with self._bound(relation) as bound:
+                    frames.append(
+                        _normalize(
+                            bound.aggregate(selects, groups).pl()
+                            if by
+                            else bound.aggregate(selects).pl()
+                        )
+                    )
+        return frames
+
+    def collect(self, relation, columns: list[str]) -> pl.DataFrame:
+        with self._lock, self._bound(relation) as bound:
+            return bound.select(*(f'"{column}"' for column in columns)).pl()
+
+    def distinct(self, relation, column: str) -> pl.DataFrame:
+        with self._lock, self._bound(relation) as bound:
+            return bound.select(f'"{column}"').distinct().order(f'"{column}"').pl()
+
+    def sink(self, relation, path: Path, format: str) -> None:
+        # DuckDB writes as it executes and spills past memory_limit
+        with self._lock, self._bound(relation) as bound:
+            if format == "csv":
+                bound.write_csv(str(path))
+            else:
+                bound.write_parquet(str(path))
+
+
+BACKENDS = {"polars": PolarsBackend, "duckdb": DuckDBBackend}
+
+
+@functools.cache
+def get_backend(name: str | None = None) -> PolarsBackend | DuckDBBackend:
+    """The backend named ``name`` or ``$MAVEN_BACKEND``, one instance per process."""
+    name = name or os.environ.get("MAVEN_BACKEND", "polars")
+    if name not in BACKENDS:
+        raise ValueError(f"unknown backend {name!r}; expected one of {sorted(BACKENDS)}")
+    return BACKENDS[name]()
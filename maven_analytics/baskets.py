@@ -0,0 +1,143 @@
+"""Items frequently ordered together, from a sparse order x item matrix.
+
+``basket_stats`` reads the distinct ``(order_id, item)`` lines one range of
+order ids at a time, codes the items against the item dictionary read up
+front, and builds the binary sparse matrix ``X`` (orders x items) of the
+chunk. It accumulates the item co-occurrence counts ``X.T @ X`` chunk by
+chunk, so memory is bounded by the chunk and by the number of distinct
+item pairs, not by the number of orders. The diagonal of ``X.T @ X`` is the
+number of orders containing each item.
+
+``pair_table`` turns the counts into association measures for every pair
+ordered together at least ``min_orders`` times:
+
+``support``     share of all orders containing both items
+``confidence``  share of the orders with ``item`` that also have ``other_item``
+``lift``        ``support`` over the support expected if the items were
+                ordered independently; above 1 means "ordered together"
+
+``top_pairs`` keeps the best ``k`` partners of each item.
+"""
+
+from dataclasses import dataclass
+
+import numpy as np
+import polars as pl
+from scipy import sparse
+
+
+@dataclass(frozen=True)
+class BasketStats:
+    items: pl.Series
+    orders: int
+    item_orders: np.ndarray
+    pair_orders: sparse.csr_array
+
+    @property
+    def nbytes(self) -> int:
+        matrix = self.pair_orders
+        return matrix.data.nbytes + matrix.indices.nbytes + matrix.indptr.nbytes
+
+
+def basket_stats(
+    order_items: pl.LazyFrame | pl.DataFrame,
+    item: str = "item_id",
+    chunk_orders: int = 100_000,
+) -> BasketStats:
+    """Order and pair counts of ``item`` over every order in ``order_items``.
+
+    Each chunk covers ``chunk_orders`` consecutive order ids and runs
+    ``order_items`` again with a filter on them, so a scan of a file sorted
+    by ``order_id`` reads each row group about once.
+    """
+    order_items = order_items.lazy().select("order_id", item).drop_nulls()
+    items = (
+        order_items.select(pl.col(item).unique().sort()).collect().get_column(item)
+    )
+    first, last = (
+        order_items.select(
+            first=pl.col("order_id").min(), last=pl.col("order_id").max()
+        )
+        .collect()
+        .row(0)
+    )
+
+    counts = sparse.csr_array((len(items), len(items)), dtype=np.int64)
+    n_orders = 0
+    if first is not None:
+        for start in range(first, last + 1, chunk_orders):
+            lines = (
+                order_items.filter(
+                    pl.col("order_id").is_between(start, start + chunk_orders, closed="left")
+                )
+                .unique()
+                .select(
+                    # rows numbered by order_id within the chunk
+                    row=pl.col("order_id") - start,
+                    code=pl.col(item).replace_strict(
+                        items, range(len(items)), return_dtype=pl.Int32
+                    ),
+                )
+                .collect()
+            )
+            if lines.is_empty():
+                continue
+            rows = lines.get_column("row").to_numpy()
+            n_orders += len(np.unique(rows))
+            chunk = sparse.csr_array(
+                (
+                    np.ones(len(lines), dtype=np.int64),
+                    (rows, lines.get_column("code").to_numpy()),
+                ),
+                shape=(int(rows.max()) + 1, len(items)),
+            )
+            counts += chunk.T @ chunk
+
+    item_orders = counts.diagonal()
+    counts.setdiag(0)
+    counts.eliminate_zeros()
+    return BasketStats(items, n_orders, item_orders, counts.tocsr())
+
+
+def pair_table(stats: BasketStats, min_orders: int = 1) -> pl.DataFrame:
+    """Association measures of the pairs ordered together ``min_orders`` times."""
+    pairs = stats.pair_orders.tocoo()
+    keep = pairs.data >= min_orders
+    item_orders = pl.lit(pl.Series(stats.item_orders))
+    item_share = pl.lit(pl.Series(stats.item_orders / stats.orders))
+    name = stats.items.name
+    return (
+        pl.DataFrame(
+            {
+                "item": pairs.row[keep],
+                "other": pairs.col[keep],
+                "orders": pairs.data[keep],
+            }
+        )
+        .with_columns(
+            support=pl.col("orders") / stats.orders,
+            confidence=pl.col("orders") / item_orders.gather("item"),
+        )
+        .with_columns(
+            lift=pl.col("support")
+            / (item_share.gather("item") * item_share.gather("other")),
+            **{
+                name: pl.lit(stats.items).gather("item"),
+                f"other_{name}": pl.lit(stats.items).gather("other"),
+            },
+        )
+        .select(name, f"other_{name}", "orders", "support", "confidence", "lift")
+    )
+
+
+def top_pairs(
+    stats: BasketStats, k: int = 5, by: str = "lift", min_orders: int = 1
+) -> pl.DataFrame:
+    """The ``k`` partners of each item with the highest ``by``."""
+    name = stats.items.name
+    return (
+        pair_table(stats, min_orders=min_orders)
+        .sort(name, by, descending=[False, True])
+        .group_by(name, maintain_order=True)
+        .head(k)
+    )
@@ -0,0 +1,95 @@
+"""Deferred imports and one-time setup shared by the marimo apps.
+
+``lazy_import`` returns a module whose import runs on first attribute
+access, so an app's setup block can bind ``alt`` (or any other heavy
+dependency) without paying for it until a chart is actually built. The setup
+block and the data cells never import it; the first chart cell that runs
+does, and a headless ``app.run()`` that runs the chart cells imports it too.
+
+``enable_theme`` registers and enables the shared Altair theme once per
+process; later calls from other cells, apps or sessions are free. The apps
+pass it as ``lazy_import``'s ``on_load``, so the theme is registered by the
+same first chart cell instead of importing Altair ahead of it.
+"""
+
+import functools
+import importlib.abc
+import importlib.util
+import sys
+from collections.abc import Callable
+from types import ModuleType
+
+MARIMO_LIGHT = {
+    "config": {
+        "background": "transparent",
+        "view": {"strokeWidth": 0},
+        "axis": {
+            "grid": False,
+            "domain": False,
+            "tickColor": "#999",
+            "labelColor": "#444",
+            "titleColor": "#444",
+        },
+        "line": {"strokeWidth": 2},
+        "area": {"opacity": 0.6},
+    }
+}
+
+THEMES = {"marimo_light": MARIMO_LIGHT}
+
+
+# hooks to run once each deferred module has been imported
+_on_load: dict[str, list[Callable[[], None]]] = {}
+
+
+class _RunHooks(importlib.abc.Loader):
+    """``loader``, running the ``on_load`` hooks of ``name`` after the module executes."""
+
+    def __init__(self, name: str, loader: importlib.abc.Loader):
+        self.name = name
+        self.loader = loader
+
+    def create_module(self, spec):
+        return self.loader.create_module(spec)
+
+    def exec_module(self, module: ModuleType) -> None:
+        self.loader.exec_module(module)
+        for hook in _on_load.pop(self.name):
+            hook()
+
+
+def lazy_import(name: str, on_load: Callable[[], None] | None = None) -> ModuleType:
+    """``import name``, deferred until an attribute of the module is used.
+
+    ``on_load()`` runs right after the deferred import, or at once if the
+    module is already imported.
+    """
+    loaded = name in sys.modules and name not in _on_load
+    if loaded:
+        if on_load is not None:
+            on_load()
+        return sys.modules[name]
+    hooks = _on_load.setdefault(name, [])
+    if on_load is not None:
+        hooks.append(on_load)
+    if name in sys.modules:
+        return sys.modules[name]
+    spec = importlib.util.find_spec(name)
+    if spec is None:
+        del _on_load[name]
+        raise ModuleNotFoundError(f"No module named {name!r}", name=name)
+    spec.loader = _RunHooks(name, spec.loader)
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+    return module
+
+
+@functools.cache
+def enable_theme(name: str = "marimo_light") -> None:
+    """Register ``THEMES[name]`` with Altair and enable it (once per process)."""
+    import altair as alt
+
+    alt.theme.register(name, enable=True)(lambda: THEMES[name])
@@ -0,0 +1,270 @@
+"""Cached PCA + k-means embeddings for the candy recommender.
+
+``load_embeddings`` returns the 2-D projection, the jittered plot
+coordinates and the cluster labels for a candy (or product) catalog. Results
+are keyed by a checksum of the feature matrix and the fit parameters and
+stored under ``CACHE_DIR`` as an uncompressed Arrow IPC file; on a cache hit
+the coordinates are memory-mapped, nothing is refit and scikit-learn is not
+imported. Fitting uses randomized PCA (or ``IncrementalPCA`` for catalogs
+larger than ``INCREMENTAL_ROWS``) and ``MiniBatchKMeans``, both with a fixed
+seed, so the embeddings are reproducible across runs.
+
+When no cluster count is given, ``sweep_clusters`` fits every (k, seed)
+pair in a process pool, scores each run by inertia and by silhouette on a
+sample of the points, and caches the scores; ``best_k`` picks the k with the
+highest mean silhouette, and warns when that is the largest k swept, since
+a wider range may score higher still.
+"""
+
+import hashlib
+import json
+import os
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+import polars as pl
+
+from maven_analytics.ingest import CACHE_DIR
+from maven_analytics.snapshot import read_mapped
+
+FEATURES = [
+    "chocolate",
+    "fruity",
+    "caramel",
+    "peanutyalmondy",
+    "nougat",
+    "crispedricewafer",
+    "hard",
+    "bar",
+    "pluribus",
+]
+
+EMBEDDINGS_DIR = CACHE_DIR / "candy-recommendation/embeddings"
+SWEEPS_DIR = CACHE_DIR / "candy-recommendation/sweeps"
+INCREMENTAL_ROWS = 1_000_000
+BATCH_SIZE = 65_536
+SEED = 42
+
+
+@dataclass
+class CandyEmbeddings:
+    pca: pl.DataFrame
+    jittered: pl.DataFrame
+    clusters: pl.Series
+    explained_variance_ratio: list[float]
+    sweep: pl.DataFrame | None = None
+
+
+def feature_matrix(candy_data: pl.DataFrame) -> np.ndarray:
+    return candy_data.select(FEATURES).to_numpy().astype(np.float32)
+
+
+def cache_key(features: np.ndarray, **params) -> str:
+    digest = hashlib.sha256(np.ascontiguousarray(features).tobytes())
+    digest.update(repr(features.shape).encode())
+    digest.update(json.dumps(params, sort_keys=True).encode())
+    return digest.hexdigest()[:16]
+
+
+_sweep_points: np.ndarray | None = None
+_sweep_sample: np.ndarray | None = None
+
+
+def _init_sweep_worker(points: np.ndarray, sample: np.ndarray) -> None:
+    global _sweep_points, _sweep_sample
+    _sweep_points, _sweep_sample = points, sample
+
+
+def _score_kmeans(k: int, seed: int) -> dict:
+    from sklearn.cluster import MiniBatchKMeans
+    from sklearn.metrics import silhouette_score
+
+    kmeans = MiniBatchKMeans(
+        n_clusters=k,
+        batch_size=min(BATCH_SIZE, len(_sweep_points)),
+        n_init=3,
+        random_state=seed,
+    ).fit(_sweep_points)
+    labels = kmeans.predict(_sweep_points[_sweep_sample])
+    silhouette = (
+        silhouette_score(_sweep_points[_sweep_sample], labels)
+        if len(np.unique(labels)) > 1
+        else None
+    )
+    return {"k": k, "seed": seed, "inertia": kmeans.inertia_, "silhouette": silhouette}
+
+
+def sweep_clusters(
+    points: np.ndarray,
+    ks: range = range(2, 9),
+    seeds: tuple[int, ...] = (0, 1, 2),
+    sample_size: int = 10_000,
+    max_workers: int | None = None,
+) -> pl.DataFrame:
+    """Inertia and sampled silhouette for every (k, seed), fitted in parallel."""
+    key = cache_key(
+        points, ks=list(ks), seeds=list(seeds), sample_size=sample_size
+    )
+    path = SWEEPS_DIR / f"{key}.parquet"
+    if path.exists():
+        return pl.read_parquet(path)
+
+    rng = np.random.default_rng(SEED)
+    sample = rng.choice(len(points), size=min(sample_size, len(points)), replace=False)
+    runs = [(k, seed) for k in ks if k < len(points) for seed in seeds]
+
+    with ProcessPoolExecutor(
+        max_workers=max_workers or min(len(runs), os.cpu_count() or 1),
+        initializer=_init_sweep_worker,
+        initargs=(points, sample),
+    ) as pool:
+        scores = list(pool.map(_score_kmeans, *zip(*runs)))
+
+    sweep = pl.DataFrame(
+        scores,
+        schema={
+            "k": pl.Int32,
+            "seed": pl.Int32,
+            "inertia": pl.Float64,
+            "silhouette": pl.Float64,
+        },
+        orient="row",
+    )
+    path.parent.mkdir(parents=True, exist_ok=True)
+    sweep.write_parquet(path)
+    return sweep
+
+
+def best_k(sweep: pl.DataFrame) -> int:
+    """The k with the highest mean silhouette in ``sweep``."""
+    k = (
+        sweep
+        .group_by("k")
+        .agg(pl.col("silhouette").mean())
+        .sort("silhouette", "k", descending=[True, False], nulls_last=True)
+        .item(0, "k")
+    )
+    largest = sweep.get_column("k").max()
+    if k == largest:
+        warnings.warn(
+            f"the best silhouette is at k={k}, the largest k swept; sweep a wider "
+            "range of ks or pass n_clusters",
+            stacklevel=2,
+        )
+    return k
+
+
+def fit_embeddings(
+    features: np.ndarray,
+    n_clusters: int | None = None,
+    alpha: float = 0.05,
+    seed: int = SEED,
+) -> tuple[CandyEmbeddings, dict]:
+    from sklearn.cluster import MiniBatchKMeans
+    from sklearn.decomposition import PCA, IncrementalPCA
+
+    if len(features) > INCREMENTAL_ROWS:
+        pca = IncrementalPCA(n_components=2, batch_size=BATCH_SIZE)
+    else:
+        pca = PCA(n_components=2, svd_solver="randomized", random_state=seed)
+    projected = pca.fit_transform(features)
+
+    sweep = None
+    if n_clusters is None:
+        sweep = sweep_clusters(projected)
+        n_clusters = best_k(sweep)
+
+    kmeans = MiniBatchKMeans(
+        n_clusters=n_clusters,
+        batch_size=min(BATCH_SIZE, len(features)),
+        n_init=3,
+        random_state=seed,
+    )
+    clusters = kmeans.fit_predict(projected)
+
+    rng = np.random.default_rng(seed)
+    jittered = projected + rng.normal(
+        0, alpha * projected.std(axis=0, ddof=1), size=projected.shape
+    )
+
+    columns = ["pca0", "pca1"]
+    embeddings = CandyEmbeddings(
+        pca=pl.DataFrame(projected, schema=columns),
+        jittered=pl.DataFrame(jittered, schema=columns),
+        clusters=pl.Series("cluster", clusters, dtype=pl.Int32),
+        explained_variance_ratio=pca.explained_variance_ratio_.tolist(),
+        sweep=sweep,
+    )
+    return embeddings, {"pca": pca, "kmeans": kmeans}
+
+
+def save_embeddings(embeddings: CandyEmbeddings, models: dict, path: Path) -> None:
+    import joblib
+
+    path.mkdir(parents=True, exist_ok=True)
+    pl.DataFrame(
+        {
+            "pca0": embeddings.pca["pca0"],
+            "pca1": embeddings.pca["pca1"],
+            "jitter0": embeddings.jittered["pca0"],
+            "jitter1": embeddings.jittered["pca1"],
+            "cluster": embeddings.clusters,
+        }
+    ).write_ipc(path / "embeddings.arrow", compression="uncompressed")
+    (path / "explained_variance.json").write_text(
+        json.dumps(embeddings.explained_variance_ratio)
+    )
+    if embeddings.sweep is not None:
+        embeddings.sweep.write_parquet(path / "sweep.parquet")
+    joblib.dump(models, path / "models.joblib")
+
+
+def read_embeddings(path: Path) -> CandyEmbeddings:
+    frame = read_mapped(path / "embeddings.arrow")
+    return CandyEmbeddings(
+        pca=frame.select("pca0", "pca1"),
+        jittered=frame.select(
+            pl.col("jitter0").alias("pca0"), pl.col("jitter1").alias("pca1")
+        ),
+        clusters=frame["cluster"],
+        explained_variance_ratio=json.loads(
+            (path / "explained_variance.json").read_text()
+        ),
+        sweep=(
+            pl.read_parquet(path / "sweep.parquet")
+            if (path / "sweep.parquet").exists()
+            else None
+        ),
+    )
+
+
+def load_embeddings(
+    candy_data: pl.DataFrame,
+    n_clusters: int | None = None,
+    alpha: float = 0.05,
+    seed: int = SEED,
+) -> CandyEmbeddings:
+    """Return cached embeddings for ``candy_data``, fitting them on a miss.
+
+    With ``n_clusters=None`` the cluster count is chosen by ``sweep_clusters``.
+    """
+    features = feature_matrix(candy_data)
+    key = cache_key(features, n_clusters=n_clusters, alpha=alpha, seed=seed)
+    path = EMBEDDINGS_DIR / key
+
+    if (path / "embeddings.arrow").exists():
+        return read_embeddings(path)
+
+    embeddings, models = fit_embeddings(features, n_clusters, alpha, seed)
+    save_embeddings(embeddings, models, path)
+    return embeddings
+
+
+if __name__ == "__main__":
+    from maven_analytics import ingest
+
+    embeddings = load_embeddings(ingest.read("candy-recommendation/candy_data"))
+    print(f"explained variance: {embeddings.explained_variance_ratio}")
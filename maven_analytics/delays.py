@@ -0,0 +1,159 @@
+"""Mergeable departure-delay histograms for the airline report.
+
+``build_histograms`` counts ``DEPARTURE_DELAY`` minutes into the fixed bins
+of ``DELAY_EDGES`` per ``HISTOGRAM_KEYS`` group. Bin ``i`` holds delays in
+``[DELAY_EDGES[i - 1], DELAY_EDGES[i])``; bin 0 holds everything before the
+first edge and bin ``len(DELAY_EDGES)`` everything from the last edge on.
+Cancelled flights have no delay and are not counted.
+
+Every group shares the same bins, so the histogram of any selection is the
+sum of its groups' histograms (``merge``) and percentiles come from the
+summed counts (``quantiles``), never from sorting the delays themselves.
+Inside a bin, values are interpolated linearly, so a quantile is accurate
+to within its bin's width: 5 minutes up to two hours, then coarser.
+
+``load_histograms`` caches the histograms under ``CACHE_DIR`` and rebuilds
+them when the flights file changes.
+"""
+
+import json
+from collections.abc import Iterable
+from pathlib import Path
+
+import polars as pl
+
+from maven_analytics.ingest import CACHE_DIR, REPO_ROOT, checksum
+
+FLIGHTS_PATH = (
+    REPO_ROOT
+    / "project-portfolio/airline-flight-delay-report/airlines-airports-data"
+    / "flights-selected.parquet"
+)
+HISTOGRAMS_DIR = CACHE_DIR / "airline-flight-delay-report/delay_histograms"
+
+# DAY_OF_WEEK is kept so every filter of the report applies to the histograms
+HISTOGRAM_KEYS = ["MONTH", "DAY_OF_WEEK", "AIRLINE", "ORIGIN_AIRPORT"]
+DELAY_EDGES = [
+    *range(-60, 120, 5),
+    *range(120, 360, 15),
+    *range(360, 1440, 60),
+    1440,
+]
+
+_LOWER = [DELAY_EDGES[0], *DELAY_EDGES]
+_UPPER = [DELAY_EDGES[0], *DELAY_EDGES[1:], DELAY_EDGES[-1], DELAY_EDGES[-1]]
+
+
+def delay_bin(column: str = "DEPARTURE_DELAY") -> pl.Expr:
+    return (
+        pl.lit(pl.Series(DELAY_EDGES))
+        .search_sorted(pl.col(column), side="right")
+        .cast(pl.UInt16)
+        .alias("bin")
+    )
+
+
+def bin_bounds(expr: pl.Expr = pl.col("bin")) -> list[pl.Expr]:
+    """``bin_start`` and ``bin_end`` minutes of each bin; the outer bins are empty."""
+    return [
+        pl.lit(pl.Series(_LOWER)).gather(expr).alias("bin_start"),
+        pl.lit(pl.Series(_UPPER)).gather(expr).alias("bin_end"),
+    ]
+
+
+def build_histograms(
+    flights: pl.LazyFrame, keys: list[str] = HISTOGRAM_KEYS
+) -> pl.LazyFrame:
+    """Sparse histograms: one ``count`` per group and non-empty bin."""
+    return (
+        flights
+        # cancelled flights have a NaN (or null) delay; both are dropped here
+        .filter(pl.col("DEPARTURE_DELAY").is_not_nan())
+        .group_by(*keys, delay_bin())
+        .agg(count=pl.len().cast(pl.Int64))
+    )
+
+
+def load_histograms(
+    source: Path = FLIGHTS_PATH,
+    target: Path | None = None,
+    force: bool = False,
+) -> pl.DataFrame:
+    """Histograms of ``source``, rebuilt when it changes."""
+    target = HISTOGRAMS_DIR if target is None else target
+    manifest_path = target / "manifest.json"
+    path = target / "histograms.parquet"
+    digest = checksum(source)
+    manifest = {"sha256": digest, "edges": DELAY_EDGES, "keys": HISTOGRAM_KEYS}
+    if (
+        not force
+        and manifest_path.exists()
+        and json.loads(manifest_path.read_text()) == manifest
+    ):
+        return pl.read_parquet(path)
+
+    histograms = (
+        build_histograms(pl.scan_parquet(source))
+        .sort(*HISTOGRAM_KEYS, "bin")
+        .collect(engine="streaming")
+    )
+    target.mkdir(parents=True, exist_ok=True)
+    histograms.write_parquet(path, compression="zstd", statistics=True)
+    manifest_path.write_text(json.dumps(manifest))
+    return histograms
+
+
+def _per_group(expr: pl.Expr, by: list[str]) -> pl.Expr:
+    return expr.over(by) if by else expr
+
+
+def merge(histograms: pl.DataFrame, by: Iterable[str] = ()) -> pl.DataFrame:
+    """One histogram per ``by`` group (one overall by default), sorted by bin."""
+    by = list(by)
+    return (
+        histograms
+        .group_by(*by, "bin")
+        .agg(pl.col("count").sum())
+        .sort(*by, "bin")
+    )
+
+
+def distribution(histograms: pl.DataFrame, by: Iterable[str] = ()) -> pl.DataFrame:
+    """Merged counts with bin bounds and each bin's share of its group."""
+    by = list(by)
+    return merge(histograms, by).with_columns(
+        *bin_bounds(),
+        share=pl.col("count") / _per_group(pl.col("count").sum(), by),
+    )
+
+
+def quantiles(
+    histograms: pl.DataFrame, qs: Iterable[float], by: Iterable[str] = ()
+) -> pl.DataFrame:
+    """Delay quantiles per ``by`` group, one ``q``/``delay`` row per quantile."""
+    by = list(by)
+    merged = merge(histograms, by).with_columns(
+        *bin_bounds(),
+        cumulative=_per_group(pl.col("count").cum_sum(), by),
+        total=_per_group(pl.col("count").sum(), by),
+    )
+    rank = pl.col("q") * pl.col("total")
+    return (
+        merged
+        .join(pl.DataFrame({"q": list(qs)}, schema={"q": pl.Float64}), how="cross")
+        # the first bin whose cumulative count reaches the rank holds the quantile
+        .filter(pl.col("cumulative") >= rank)
+        .group_by(*by, "q")
+        .agg(pl.all().first())
+        .select(
+            *by,
+            "q",
+            delay=(
+                pl.col("bin_start")
+                + (rank - (pl.col("cumulative") - pl.col("count")))
+                / pl.col("count")
+                * (pl.col("bin_end") - pl.col("bin_start"))
+            ),
+        )
+        .sort(*by, "q")
+    )
@@ -0,0 +1,149 @@
+"""Chunked, resumable export of the rows behind a report view.
+
+A report's filtered relation is never collected whole. Its fact table is
+cut into chunks (``row_group_chunks`` of a parquet file, ``frame_chunks``
+of an in-memory frame), and each chunk runs through the report's model and
+filters and is streamed to its own part file by the backend's sink
+(``sink_parquet``/``sink_csv`` on Polars). Memory is bounded by one chunk,
+not by the result.
+
+Layout under ``EXPORT_DIR/<name>/<view digest>/``::
+
+    part-00000.parquet    rows of chunk 0 (or part-00000.csv)
+    manifest.json         view, sources, format and the rows of each finished chunk
+
+A part is written under a temporary name and renamed when complete, and the
+manifest is updated after every part. An interrupted export resumes from the
+first unfinished chunk; an export of a view that already finished only
+returns its parts. The digest covers the sources' key, the filter state and
+the format, so a changed source or filter starts a fresh export.
+"""
+
+import hashlib
+import json
+from collections.abc import Callable, Sequence
+from pathlib import Path
+from typing import Any
+
+import polars as pl
+
+from maven_analytics.backends import DuckDBBackend, PolarsBackend, get_backend
+from maven_analytics.ingest import CACHE_DIR
+
+EXPORT_DIR = CACHE_DIR / "exports"
+FORMATS = ("parquet", "csv")
+
+Chunk = pl.DataFrame | pl.LazyFrame
+
+
+def row_group_chunks(path: Path, row_groups: int = 1) -> list[pl.LazyFrame]:
+    """Scans of ``path``, ``row_groups`` of its row groups each.
+
+    The slices start on row-group boundaries, so each chunk reads only its
+    own row groups (and only the columns its query uses).
+    """
+    import pyarrow.parquet as pq
+
+    metadata = pq.read_metadata(path)
+    sizes = [metadata.row_group(i).num_rows for i in range(metadata.num_row_groups)]
+    chunks = []
+    offset = 0
+    for start in range(0, len(sizes), row_groups):
+        rows = sum(sizes[start : start + row_groups])
+        chunks.append(pl.scan_parquet(path).slice(offset, rows))
+        offset += rows
+    return chunks
+
+
+def frame_chunks(frame: pl.DataFrame, rows: int = 100_000) -> list[pl.DataFrame]:
+    """Zero-copy slices of ``frame`` with ``rows`` rows each."""
+    return [frame.slice(offset, rows) for offset in range(0, frame.height, rows)]
+
+
+def _count_rows(path: Path, format: str) -> int:
+    if format == "csv":
+        return pl.scan_csv(path).select(pl.len()).collect().item()
+    return pl.scan_parquet(path).select(pl.len()).collect().item()
+
+
+class ChunkedExport:
+    def __init__(
+        self,
+        name: str,
+        view: tuple,
+        source_key: str,
+        format: str = "parquet",
+        root: Path | None = None,
+    ):
+        if format not in FORMATS:
+            raise ValueError(f"unknown format {format!r}; expected one of {FORMATS}")
+        self.format = format
+        self._identity = {"view": repr(view), "sources": source_key, "format": format}
+        digest = hashlib.sha256(
+            json.dumps(self._identity, sort_keys=True).encode()
+        ).hexdigest()[:16]
+        self.dir = (EXPORT_DIR if root is None else root) / name / digest
+        self._manifest_path = self.dir / "manifest.json"
+
+    def _read_manifest(self) -> dict:
+        if self._manifest_path.exists():
+            manifest = json.loads(self._manifest_path.read_text())
+            if all(manifest.get(key) == value for key, value in self._identity.items()):
+                return manifest
+        return {**self._identity, "chunks": None, "done": {}}
+
+    def _write_manifest(self, manifest: dict) -> None:
+        self._manifest_path.write_text(json.dumps(manifest))
+
+    def part(self, index: int) -> Path:
+        return self.dir / f"part-{index:05d}.{self.format}"
+
+    @property
+    def rows(self) -> int:
+        """Rows written so far."""
+        return sum(self._read_manifest()["done"].values())
+
+    @property
+    def complete(self) -> bool:
+        manifest = self._read_manifest()
+        return manifest["chunks"] is not None and len(manifest["done"]) == manifest["chunks"]
+
+    def run(
+        self,
+        chunks: Sequence[Chunk],
+        query: Callable[[Chunk], Any],
+        backend: PolarsBackend | DuckDBBackend | None = None,
+        on_part: Callable[[int, int], None] | None = None,
+    ) -> list[Path]:
+        """Sink ``query(chunk)`` of every unfinished chunk; the parts in order.
+
+        ``query`` turns a chunk of the fact table into a backend relation
+        of the filtered rows. ``on_part(index, rows)`` is called after each
+        part is written.
+        """
+        backend = backend or get_backend()
+        self.dir.mkdir(parents=True, exist_ok=True)
+        manifest = self._read_manifest()
+        if manifest["chunks"] not in (None, len(chunks)):
+            raise ValueError(
+                f"{self.dir} was started with {manifest['chunks']} chunks, not {len(chunks)}"
+            )
+        manifest["chunks"] = len(chunks)
+
+        for index, chunk in enumerate(chunks):
+            if str(index) in manifest["done"]:
+                continue
+            part = self.part(index)
+            partial = part.with_suffix(".tmp")
+            backend.sink(query(chunk), partial, self.format)
+            partial.replace(part)
+            rows = _count_rows(part, self.format)
+            manifest["done"][str(index)] = rows
+            self._write_manifest(manifest)
+            if on_part is not None:
+                on_part(index, rows)
+        return [self.part(index) for index in range(len(chunks))]
+
+    def clear(self) -> None:
+        for path in self.dir.glob("*"):
+            path.unlink()
@@ -0,0 +1,341 @@
+"""Columnar ingest layer for the drill and portfolio CSVs.
+
+Every source CSV is declared once in ``DATASETS`` with its column types and
+any string parsing it needs. ``convert`` turns a source into zstd-compressed
+parquet under ``CACHE_DIR`` and skips sources whose checksum (and declared
+schema) has not changed since the last conversion. ``scan`` and ``read`` are
+the loader API the notebooks and marimo apps use in place of
+``pl.scan_csv``/``pl.read_csv``::
+
+    from maven_analytics import ingest
+
+    order_details = ingest.scan("restaurant-order-analysis/order_details")
+"""
+
+import hashlib
+import json
+import os
+from dataclasses import dataclass, field
+from pathlib import Path
+
+import polars as pl
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+CACHE_DIR = REPO_ROOT / ".parquet-cache"
+MANIFEST_PATH = CACHE_DIR / "manifest.json"
+
+DRILLS = Path("data-drills")
+PORTFOLIO = Path("project-portfolio")
+
+
+@dataclass(frozen=True)
+class Dataset:
+    """A source CSV and the typed schema it is converted to.
+
+    ``schema`` lists the output columns in order. Columns that need more than
+    a plain cast (custom date formats, currency strings) are read as strings
+    and built by the matching expression in ``parsers``. With ``partial`` set,
+    undeclared columns are kept with inferred types.
+    """
+
+    name: str
+    path: Path
+    schema: dict[str, pl.DataType]
+    parsers: dict[str, pl.Expr] = field(default_factory=dict)
+    csv_options: dict = field(default_factory=dict)
+    partial: bool = False
+
+    @property
+    def source(self) -> Path:
+        return REPO_ROOT / self.path
+
+    @property
+    def target(self) -> Path:
+        return CACHE_DIR / f"{self.name}.parquet"
+
+    def fingerprint(self) -> str:
+        return repr(
+            (
+                sorted((k, str(v)) for k, v in self.schema.items()),
+                sorted((k, str(v)) for k, v in self.parsers.items()),
+                sorted(self.csv_options.items()),
+                self.partial,
+            )
+        )
+
+    def scan_source(self, path: Path | None = None, **csv_options) -> pl.LazyFrame:
+        """Scan the raw CSV and apply the declared types."""
+        overrides = {
+            column: pl.String if column in self.parsers else dtype
+            for column, dtype in self.schema.items()
+        }
+        frame = pl.scan_csv(
+            path if path is not None else self.source,
+            schema_overrides=overrides,
+            infer_schema=self.partial,
+            **{**self.csv_options, **csv_options},
+        )
+        if self.parsers:
+            frame = frame.with_columns(
+                expr.alias(column) for column, expr in self.parsers.items()
+            )
+        frame = frame.with_columns(
+            pl.col(column).cast(dtype) for column, dtype in self.schema.items()
+        )
+        if self.partial:
+            return frame
+        return frame.select(list(self.schema))
+
+
+def _currency(column: str) -> pl.Expr:
+    return (
+        pl.col(column)
+        .str.replace("$", "", literal=True)
+        .str.replace(" ", "", literal=True)
+        .cast(pl.Float64)
+    )
+
+
+_DATASET_LIST = [
+    # data drills
+    Dataset(
+        "flatten-the-stack/sales_orders",
+        DRILLS / "flatten-the-stack/sales_orders.csv",
+        {
+            "order_number": pl.Int64,
+            "order_date": pl.Date,
+            "line_items": pl.String,
+            "fulfillment": pl.String,
+        },
+    ),
+    Dataset(
+        "movie-metrics/users",
+        DRILLS / "movie-metrics/user_activity/users.csv",
+        {"id": pl.Int64, "created_at": pl.Date, "country_code": pl.String},
+    ),
+    Dataset(
+        "movie-metrics/activity",
+        DRILLS / "movie-metrics/user_activity/activity.csv",
+        {
+            "id": pl.Int64,
+            "user_id": pl.Int64,
+            "date": pl.Date,
+            "movie_name": pl.String,
+            "finished": pl.Int8,
+        },
+    ),
+    Dataset(
+        "org-chart-overhaul/office_space",
+        DRILLS / "org-chart-overhaul/OfficeSpace.csv",
+        {"Employee Name": pl.String, "Manager Name": pl.String},
+    ),
+    Dataset(
+        "rolling-up-looking-back/coffee_shop_sales",
+        DRILLS / "rolling-up-looking-back/coffee_shop_sales.csv",
+        {"date": pl.Date, "store": pl.String, "sales": pl.Float64},
+        partial=True,
+    ),
+    Dataset(
+        "spot-the-sale/orders",
+        DRILLS / "spot-the-sale/promotions/orders.csv",
+        {"order_id": pl.Int64, "order_date": pl.Date, "order_quantity": pl.Int32},
+    ),
+    Dataset(
+        "spot-the-sale/promotions",
+        DRILLS / "spot-the-sale/promotions/promotions.csv",
+        {
+            "promo_id": pl.String,
+            "promo_name": pl.String,
+            "start_date": pl.Date,
+            "end_date": pl.Date,
+        },
+    ),
+    Dataset(
+        "turning-bullish/spy_close_price",
+        DRILLS / "turning-bullish/SPY_close_price_5Y.csv",
+        {"Date": pl.Date, "Close": pl.Float64},
+    ),
+    # portfolio projects
+    Dataset(
+        "airline-flight-delay-report/airlines",
+        PORTFOLIO / "airline-flight-delay-report/airlines-airports-data/airlines.csv",
+        {"IATA_CODE": pl.String, "AIRLINE": pl.String},
+    ),
+    Dataset(
+        "airline-flight-delay-report/airports",
+        PORTFOLIO / "airline-flight-delay-report/airlines-airports-data/airports.csv",
+        {
+            "IATA_CODE": pl.String,
+            "AIRPORT": pl.String,
+            "CITY": pl.String,
+            "STATE": pl.String,
+            "COUNTRY": pl.String,
+            "LATITUDE": pl.Float64,
+            "LONGITUDE": pl.Float64,
+        },
+    ),
+    Dataset(
+        "airline-flight-delay-report/cancellation_codes",
+        PORTFOLIO
+        / "airline-flight-delay-report/airlines-airports-data/cancellation_codes.csv",
+        {"CANCELLATION_REASON": pl.String, "CANCELLATION_DESCRIPTION": pl.String},
+    ),
+    Dataset(
+        "candy-recommendation/candy_data",
+        PORTFOLIO / "candy-recommendation/halloween-candy-rankings/candy-data.csv",
+        {
+            "competitorname": pl.String,
+            **{
+                flag: pl.Int8
+                for flag in [
+                    "chocolate",
+                    "fruity",
+                    "caramel",
+                    "peanutyalmondy",
+                    "nougat",
+                    "crispedricewafer",
+                    "hard",
+                    "bar",
+                    "pluribus",
+                ]
+            },
+            "sugarpercent": pl.Float64,
+            "pricepercent": pl.Float64,
+            "winpercent": pl.Float64,
+        },
+    ),
+    Dataset(
+        "candy-recommendation/candy_data_dictionary",
+        PORTFOLIO
+        / "candy-recommendation/halloween-candy-rankings/candy_data_dictionary.csv",
+        {"Field": pl.String, "Description": pl.String},
+    ),
+    Dataset(
+        "restaurant-order-analysis/menu_items",
+        PORTFOLIO / "restaurant-order-analysis/restaurant-orders/menu_items.csv",
+        {
+            "menu_item_id": pl.Int64,
+            "item_name": pl.String,
+            "category": pl.String,
+            "price": pl.Float64,
+        },
+    ),
+    Dataset(
+        "restaurant-order-analysis/order_details",
+        PORTFOLIO / "restaurant-order-analysis/restaurant-orders/order_details.csv",
+        {
+            "order_details_id": pl.Int64,
+            "order_id": pl.Int64,
+            "order_date": pl.Date,
+            "order_time": pl.Time,
+            "item_id": pl.Int64,
+        },
+        parsers={
+            "order_date": pl.col("order_date").str.to_date(format="%m/%d/%y"),
+            "order_time": pl.col("order_time").str.to_time(format="%I:%M:%S %p"),
+        },
+        csv_options={"null_values": "NULL"},
+    ),
+    Dataset(
+        "toy-store-kpi-report/calendar",
+        PORTFOLIO / "toy-store-kpi-report/maven-toys-data/calendar.csv",
+        {"Date": pl.Date},
+        parsers={"Date": pl.col("Date").str.to_date(format="%m/%d/%Y")},
+    ),
+    Dataset(
+        "toy-store-kpi-report/inventory",
+        PORTFOLIO / "toy-store-kpi-report/maven-toys-data/inventory.csv",
+        {"Store_ID": pl.Int64, "Product_ID": pl.Int64, "Stock_On_Hand": pl.Int64},
+    ),
+    Dataset(
+        "toy-store-kpi-report/products",
+        PORTFOLIO / "toy-store-kpi-report/maven-toys-data/products.csv",
+        {
+            "Product_ID": pl.Int64,
+            "Product_Name": pl.String,
+            "Product_Category": pl.String,
+            "Product_Cost": pl.Float64,
+            "Product_Price": pl.Float64,
+        },
+        parsers={
+            "Product_Cost": _currency("Product_Cost"),
+            "Product_Price": _currency("Product_Price"),
+        },
+    ),
+    Dataset(
+        "toy-store-kpi-report/stores",
+        PORTFOLIO / "toy-store-kpi-report/maven-toys-data/stores.csv",
+        {
+            "Store_ID": pl.Int64,
+            "Store_Name": pl.String,
+            "Store_City": pl.String,
+            "Store_Location": pl.String,
+            "Store_Open_Date": pl.Date,
+        },
+    ),
+]
+
+DATASETS: dict[str, Dataset] = {dataset.name: dataset for dataset in _DATASET_LIST}
+
+
+def checksum(path: Path, chunk_size: int = 1 << 20) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(chunk_size):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _read_manifest() -> dict:
+    if not MANIFEST_PATH.exists():
+        return {}
+    return json.loads(MANIFEST_PATH.read_text())
+
+
+def _write_manifest(manifest: dict) -> None:
+    CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    # write then rename, so an interrupted write never leaves a truncated manifest
+    partial = MANIFEST_PATH.with_suffix(".json.tmp")
+    partial.write_text(json.dumps(manifest, indent=2, sort_keys=True))
+    os.replace(partial, MANIFEST_PATH)
+
+
+def convert(name: str, force: bool = False) -> Path:
+    """Convert one dataset to parquet unless its source is unchanged."""
+    dataset = DATASETS[name]
+    manifest = _read_manifest()
+    entry = {"sha256": checksum(dataset.source), "schema": dataset.fingerprint()}
+
+    if not force and manifest.get(name) == entry and dataset.target.exists():
+        return dataset.target
+
+    dataset.target.parent.mkdir(parents=True, exist_ok=True)
+    partial = dataset.target.with_suffix(".parquet.tmp")
+    dataset.scan_source().sink_parquet(partial, compression="zstd", statistics=True)
+    os.replace(partial, dataset.target)
+
+    manifest[name] = entry
+    _write_manifest(manifest)
+    return dataset.target
+
+
+def convert_all(force: bool = False) -> dict[str, Path]:
+    """Convert every declared dataset whose source file is present."""
+    return {
+        name: convert(name, force=force)
+        for name, dataset in DATASETS.items()
+        if dataset.source.exists()
+    }
+
+
+def scan(name: str) -> pl.LazyFrame:
+    return pl.scan_parquet(convert(name))
+
+
+def read(name: str) -> pl.DataFrame:
+    return pl.read_parquet(convert(name))
+
+
+if __name__ == "__main__":
+    for name, target in convert_all().items():
+        print(f"{name} -> {target.relative_to(REPO_ROOT)}")
@@ -0,0 +1,326 @@
+"""Drill computations shared by the pandas and Polars notebooks.
+
+The streak-leaderboard and turning-bullish drills have a pandas and a
+Polars version; ``monthly_diffs`` is the month-over-month step of the
+rolling-up-looking-back drill, which is Polars only. Each computation here
+takes a frame of either library (any frame narwhals recognizes) and returns
+a frame of the same library, computed with that library's fastest
+vectorized path:
+
+``daily_streaks``    runs of consecutive days per user
+``golden_crosses``   short and long moving averages, and the days the short
+                     one crosses above the long one
+``monthly_diffs``    monthly totals per group and their month-over-month change
+
+Polars frames (eager or lazy) run as Polars expressions and pandas frames
+as NumPy and pandas operations. Any other library runs the generic narwhals
+version, which is also the reference the native paths are checked against
+in ``benchmarks/drill_kernels.py``. It is much slower on pandas, where
+narwhals computes window expressions group by group.
+"""
+
+import datetime as dt
+from collections.abc import Callable
+from typing import Any
+
+import narwhals as nw
+import numpy as np
+import pandas as pd
+import polars as pl
+
+_EPOCH = dt.datetime(1970, 1, 1)
+
+
+def _dispatch(
+    frame: Any,
+    polars: Callable,
+    pandas: Callable,
+    generic: Callable,
+    native: bool = True,
+    **kwargs,
+) -> Any:
+    wrapped = nw.from_native(frame)
+    if native and wrapped.implementation is nw.Implementation.POLARS:
+        return polars(frame, **kwargs)
+    if native and wrapped.implementation is nw.Implementation.PANDAS:
+        return pandas(frame, **kwargs)
+    if isinstance(wrapped, nw.LazyFrame):
+        # the generic versions rely on row order, which lazy frames do not keep
+        return generic(wrapped.collect(), **kwargs).lazy().to_native()
+    return generic(wrapped, **kwargs).to_native()
+
+
+def _datetimes(column: pd.Series) -> pd.Series:
+    # to_datetime is slow even on a column that already holds datetimes
+    if pd.api.types.is_datetime64_any_dtype(column):
+        return column
+    return pd.to_datetime(column)
+
+
+# --- daily_streaks ---------------------------------------------------------
+
+
+def _streaks_polars(
+    events: pl.DataFrame | pl.LazyFrame, user: str, date: str, name: str
+) -> pl.DataFrame | pl.LazyFrame:
+    # runs are numbered over the whole sorted frame, so no window per user is needed
+    new_run = (pl.col(user) != pl.col(user).shift()) | (
+        pl.col(date).diff().dt.total_days() != 1
+    )
+    streaks = (
+        events.lazy()
+        .select(user, name, pl.col(date).cast(pl.Date))
+        # stable, so the first event of a day is kept as in the pandas version
+        .sort(user, date, maintain_order=True)
+        .unique([user, date], keep="first", maintain_order=True)
+        .with_columns(run=new_run.fill_null(True).cum_sum())
+        .group_by("run", maintain_order=True)
+        .agg(
+            pl.col(user).first(),
+            pl.col(name).last(),
+            start=pl.col(date).first(),
+            end=pl.col(date).last(),
+            length=pl.len().cast(pl.Int64),
+        )
+        .select(
+            user,
+            streak=(pl.col("run") - pl.col("run").first().over(user) + 1).cast(pl.Int64),
+            **{name: pl.col(name)},
+            start="start",
+            end="end",
+            length="length",
+        )
+    )
+    return streaks if isinstance(events, pl.LazyFrame) else streaks.collect()
+
+
+def _streaks_pandas(events: pd.DataFrame, user: str, date: str, name: str) -> pd.DataFrame:
+    dates = _datetimes(events[date]).dt.normalize()
+    lines = (
+        events[[user, name]]
+        .assign(**{date: dates})
+        .sort_values([user, date], kind="stable")
+        .drop_duplicates([user, date])
+    )
+    users = lines[user].to_numpy()
+    days = lines[date].to_numpy().astype("datetime64[D]").astype(np.int64)
+
+    new_run = np.ones(len(lines), dtype=bool)
+    new_run[1:] = (users[1:] != users[:-1]) | (np.diff(days) != 1)
+    starts = np.flatnonzero(new_run)
+    ends = np.append(starts[1:], len(lines)) - 1
+    # a user's first run restarts the numbering
+    first_run = np.ones(len(starts), dtype=bool)
+    first_run[1:] = users[starts[1:]] != users[starts[:-1]]
+    user_first = np.flatnonzero(first_run)[np.cumsum(first_run) - 1]
+
+    stamps = lines[date].to_numpy()
+    return pd.DataFrame(
+        {
+            user: users[starts],
+            "streak": np.arange(len(starts)) - user_first + 1,
+            name: lines[name].to_numpy()[ends],
+            "start": stamps[starts],
+            "end": stamps[ends],
+            "length": ends - starts + 1,
+        }
+    )
+
+
+def _streaks_generic(events: nw.DataFrame, user: str, date: str, name: str):
+    day = (nw.col(date).cast(nw.Datetime("us")) - nw.lit(_EPOCH)).dt.total_minutes() // (
+        24 * 60
+    )
+    days = events.unique([user, date], keep="first").sort(user, date)
+    return (
+        days
+        # consecutive days minus their position in the user's days is constant
+        .with_columns(island=day - nw.col(date).cum_count().over(user))
+        .group_by(user, "island")
+        .agg(
+            start=nw.col(date).min(),
+            end=nw.col(date).max(),
+            length=nw.len(),
+        )
+        .with_columns(
+            nw.col("length").cast(nw.Int64),
+            streak=nw.col("start").rank("ordinal").over(user).cast(nw.Int64),
+        )
+        # the name on the streak's last day
+        .join(
+            days.select(user, name, end=nw.col(date)), on=[user, "end"], how="left"
+        )
+        .sort(user, "streak")
+        .select(user, "streak", name, "start", "end", "length")
+    )
+
+
+def daily_streaks(
+    events: Any,
+    user: str = "user_id",
+    date: str = "date",
+    name: str = "user_name",
+    native: bool = True,
+) -> Any:
+    """One row per run of consecutive ``date`` days of each ``user``.
+
+    Several events on one day count once. Streaks are numbered per user
+    from 1 in date order (``streak``) and carry their ``start`` and ``end``
+    day, their ``length`` in days and the user's ``name`` on the last day.
+    ``native=False`` runs the generic narwhals version.
+    """
+    return _dispatch(
+        events,
+        _streaks_polars,
+        _streaks_pandas,
+        _streaks_generic,
+        native=native,
+        user=user,
+        date=date,
+        name=name,
+    )
+
+
+# --- golden_crosses --------------------------------------------------------
+
+
+def _crosses_polars(
+    prices: pl.DataFrame | pl.LazyFrame, value: str, short: int, long: int
+) -> pl.DataFrame | pl.LazyFrame:
+    fast, slow = pl.col(f"ma_{short}"), pl.col(f"ma_{long}")
+    return prices.with_columns(
+        pl.col(value).rolling_mean(short, min_samples=short).alias(f"ma_{short}"),
+        pl.col(value).rolling_mean(long, min_samples=long).alias(f"ma_{long}"),
+    ).with_columns(
+        golden_cross=pl.when((fast > slow) & (fast.shift(1) <= slow.shift(1))).then(fast)
+    )
+
+
+def _crosses_pandas(prices: pd.DataFrame, value: str, short: int, long: int) -> pd.DataFrame:
+    fast = prices[value].rolling(short, min_periods=short).mean()
+    slow = prices[value].rolling(long, min_periods=long).mean()
+    crossed = (fast > slow) & (fast.shift(1) <= slow.shift(1))
+    return prices.assign(
+        **{f"ma_{short}": fast, f"ma_{long}": slow},
+        golden_cross=fast.where(crossed),
+    )
+
+
+def _crosses_generic(prices: nw.DataFrame, value: str, short: int, long: int):
+    fast, slow = nw.col(f"ma_{short}"), nw.col(f"ma_{long}")
+    return prices.with_columns(
+        nw.col(value).rolling_mean(short, min_samples=short).alias(f"ma_{short}"),
+        nw.col(value).rolling_mean(long, min_samples=long).alias(f"ma_{long}"),
+    ).with_columns(
+        golden_cross=nw.when((fast > slow) & (fast.shift(1) <= slow.shift(1))).then(fast)
+    )
+
+
+def golden_crosses(
+    prices: Any,
+    value: str = "Close",
+    short: int = 50,
+    long: int = 200,
+    native: bool = True,
+) -> Any:
+    """``prices`` with ``ma_<short>``, ``ma_<long>`` and ``golden_cross``.
+
+    ``prices`` must be in date order. ``golden_cross`` holds the short
+    average on the days it crosses from below to above the long one and is
+    missing on every other day.
+    """
+    return _dispatch(
+        prices,
+        _crosses_polars,
+        _crosses_pandas,
+        _crosses_generic,
+        native=native,
+        value=value,
+        short=short,
+        long=long,
+    )
+
+
+# --- monthly_diffs ---------------------------------------------------------
+
+
+def _monthly_polars(
+    transactions: pl.DataFrame | pl.LazyFrame, by: str, date: str, value: str
+) -> pl.DataFrame | pl.LazyFrame:
+    total = f"monthly_{value}"
+    return (
+        transactions
+        .group_by(
+            by,
+            pl.col(date).dt.year().cast(pl.Int64).alias("year"),
+            pl.col(date).dt.month().cast(pl.Int64).alias("month"),
+        )
+        .agg(pl.col(value).sum().alias(total))
+        .sort(by, "year", "month")
+        .with_columns(pl.col(total).diff().over(by).alias(f"mom_{value}_diff"))
+    )
+
+
+def _monthly_pandas(
+    transactions: pd.DataFrame, by: str, date: str, value: str
+) -> pd.DataFrame:
+    total = f"monthly_{value}"
+    # one period key groups faster than separate year and month keys
+    month = _datetimes(transactions[date]).dt.to_period("M").rename("period")
+    monthly = (
+        transactions[value]
+        .groupby([transactions[by], month])
+        .sum()
+        .rename(total)
+        .reset_index()
+    )
+    # groupby sorts its keys, so each group's months are already in order
+    return pd.DataFrame(
+        {
+            by: monthly[by],
+            "year": monthly["period"].dt.year.astype(np.int64),
+            "month": monthly["period"].dt.month.astype(np.int64),
+            total: monthly[total],
+            f"mom_{value}_diff": monthly.groupby(by)[total].diff(),
+        }
+    )
+
+
+def _monthly_generic(transactions: nw.DataFrame, by: str, date: str, value: str):
+    total = f"monthly_{value}"
+    return (
+        transactions
+        .with_columns(
+            year=nw.col(date).dt.year().cast(nw.Int64),
+            month=nw.col(date).dt.month().cast(nw.Int64),
+        )
+        .group_by(by, "year", "month")
+        .agg(nw.col(value).sum().alias(total))
+        .sort(by, "year", "month")
+        .with_columns(nw.col(total).diff().over(by).alias(f"mom_{value}_diff"))
+    )
+
+
+def monthly_diffs(
+    transactions: Any,
+    by: str = "store",
+    date: str = "date",
+    value: str = "sales",
+    native: bool = True,
+) -> Any:
+    """``monthly_<value>`` per ``by``, year and month, with ``mom_<value>_diff``.
+
+    The change is against the group's previous month with sales, sorted by
+    ``by``, year and month, as in ``rollup.MonthlyRollup``. ``year`` and
+    ``month`` are Int64 whatever the library.
+    """
+    return _dispatch(
+        transactions,
+        _monthly_polars,
+        _monthly_pandas,
+        _monthly_generic,
+        native=native,
+        by=by,
+        date=date,
+        value=value,
+    )
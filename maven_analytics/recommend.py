@@ -0,0 +1,101 @@
+"""Nearest-neighbour and diverse top-k recommendations over candy embeddings.
+
+``CandyRecommender`` keeps a KD-tree over the 2-D PCA coordinates for
+"candy like this" lookups, built (and sklearn imported) on the first
+lookup, and a taste bitmask per item (the nine binary
+features plus one bit per k-means cluster) for picking a small set of
+items that together cover every taste. Both queries are vectorized over the
+whole catalog and stay in the low milliseconds at a million items.
+"""
+
+from functools import cached_property
+
+import numpy as np
+import polars as pl
+
+from maven_analytics.candy import FEATURES
+
+
+class CandyRecommender:
+    def __init__(
+        self,
+        candy: pl.DataFrame,
+        coordinates: pl.DataFrame,
+        clusters: pl.Series | None = None,
+        name_column: str = "competitorname",
+        leaf_size: int = 40,
+    ):
+        self.candy = candy
+        self.name_column = name_column
+        self.coordinates = coordinates.select("pca0", "pca1").to_numpy()
+        self.leaf_size = leaf_size
+
+        tastes = candy.select(FEATURES).to_numpy().astype(bool)
+        if clusters is not None:
+            labels = clusters.to_numpy()
+            tastes = np.hstack([tastes, labels[:, None] == np.unique(labels)[None, :]])
+        if tastes.shape[1] > 64:
+            raise ValueError("at most 64 taste columns are supported")
+        # one bitmask per item, so coverage gain is a popcount
+        self.taste_bits = (
+            tastes.astype(np.uint64) << np.arange(tastes.shape[1], dtype=np.uint64)
+        ).sum(axis=1, dtype=np.uint64)
+        self.winpercent = candy.get_column("winpercent").to_numpy()
+
+    @cached_property
+    def tree(self):
+        # the app only asks for diverse picks at startup; sklearn loads on a lookup
+        from sklearn.neighbors import KDTree
+
+        return KDTree(self.coordinates, leaf_size=self.leaf_size)
+
+    def _position(self, name: str) -> int:
+        matches = (self.candy.get_column(self.name_column) == name).arg_true()
+        if matches.is_empty():
+            raise KeyError(name)
+        return matches[0]
+
+    def nearest(self, point: tuple[float, float], k: int = 5) -> pl.DataFrame:
+        """The ``k`` items closest to ``point`` in PCA space."""
+        distance, index = self.tree.query(np.asarray([point]), k=min(k, len(self.candy)))
+        return self.candy[index[0]].with_columns(distance=pl.Series(distance[0]))
+
+    def similar(self, name: str, k: int = 5) -> pl.DataFrame:
+        """The ``k`` items most similar to ``name``, excluding itself."""
+        position = self._position(name)
+        return (
+            self.nearest(tuple(self.coordinates[position]), k=k + 1)
+            .filter(pl.col(self.name_column) != name)
+            .head(k)
+        )
+
+    def diverse_top_k(
+        self,
+        k: int = 3,
+        win_weight: float = 0.5,
+        min_winpercent: float | None = None,
+    ) -> pl.DataFrame:
+        """Greedy max-coverage pick of ``k`` items over the taste matrix.
+
+        Each step takes the item that covers the most not-yet-covered tastes,
+        plus ``win_weight * winpercent / 100`` so that among equally diverse
+        items the more popular one wins.
+        """
+        candidates = np.ones(len(self.candy), dtype=bool)
+        if min_winpercent is not None:
+            candidates &= self.winpercent >= min_winpercent
+
+        bonus = win_weight * self.winpercent / 100
+        covered = np.uint64(0)
+        picks: list[int] = []
+        gains: list[int] = []
+        for _ in range(min(k, int(candidates.sum()))):
+            gain = np.bitwise_count(self.taste_bits & ~covered)
+            score = np.where(candidates, gain + bonus, -np.inf)
+            best = int(np.argmax(score))
+            picks.append(best)
+            gains.append(int(gain[best]))
+            covered |= self.taste_bits[best]
+            candidates[best] = False
+
+        return self.candy[picks].with_columns(new_tastes=pl.Series(gains, dtype=pl.Int32))
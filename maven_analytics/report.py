@@ -0,0 +1,208 @@
+"""Vectorized helpers shared by the report apps.
+
+``ReportSpec`` describes a report's filters (selection name -> column) and
+its KPI measures (name -> SQL aggregate) and runs them on a pluggable
+backend (see ``maven_analytics.backends``). ``filter`` applies any
+combination of selections, ``kpis`` computes every measure in one pass,
+``compare`` computes the current and comparison periods together and adds
+the relative change of each measure, and ``summarize`` runs a grouped
+summary, optionally over partitions.
+
+``human_format`` abbreviates numbers (``1.2K``, ``3.4M``) for a whole column
+at once with Polars expressions; passing a scalar returns a string, formatted
+with Python's own rounding.
+
+``ResultCache`` is a thread-safe LRU cache for collected results keyed by
+report, query and filter state. ``RESULT_CACHE`` is shared by every report
+in the process, so returning to an earlier filter state does not rerun its
+queries.
+"""
+
+import threading
+from collections import OrderedDict
+from collections.abc import Callable, Hashable, Mapping
+from dataclasses import dataclass, field
+from typing import Any
+
+import polars as pl
+
+from maven_analytics.backends import DuckDBBackend, PolarsBackend, get_backend
+
+UNITS = ["", "K", "M", "B", "T"]
+
+
+def format_human(expr: pl.Expr, decimals: int = 1) -> pl.Expr:
+    """``expr`` as strings like ``"12.3K"``, with ``decimals`` fixed decimals."""
+    magnitude = expr.abs().cast(pl.Float64)
+    unit = pl.sum_horizontal(
+        (magnitude >= 1000.0**power).cast(pl.Int32) for power in range(1, len(UNITS))
+    )
+    scaled = magnitude / pl.lit(1000.0).pow(unit)
+    fixed = (
+        # half to even like Python's formatting; a value within float error of a
+        # tie (4.35 -> 43.5 after scaling) can still round the other way
+        (scaled * 10**decimals).round(mode="half_to_even").cast(pl.Int64)
+    )
+    whole = (fixed // 10**decimals).cast(pl.String)
+    if decimals > 0:
+        fraction = (fixed % 10**decimals).cast(pl.String).str.zfill(decimals)
+        whole = pl.concat_str(whole, pl.lit("."), fraction)
+    sign = pl.when(expr < 0).then(pl.lit("-")).otherwise(pl.lit(""))
+    return pl.concat_str(
+        sign, whole, unit.replace_strict(range(len(UNITS)), UNITS, return_dtype=pl.String)
+    )
+
+
+def human_format(n: float | pl.Series, decimals: int = 1) -> str | pl.Series:
+    """Abbreviate ``n`` with a K/M/B/T suffix; Series in, Series out."""
+    if isinstance(n, pl.Series):
+        return (
+            n.to_frame()
+            .select(format_human(pl.col(n.name), decimals).alias(n.name))
+            .to_series()
+        )
+    for unit in UNITS[:-1]:
+        if abs(n) < 1000:
+            return f"{n:.{decimals}f}{unit}"
+        n = n / 1000
+    return f"{n:.{decimals}f}{UNITS[-1]}"
+
+
+def freeze(selections: Mapping[str, Any]) -> tuple:
+    """Hashable form of a filter state; empty selections are dropped.
+
+    Multiple selections are sorted, so the same values picked in another
+    order (or passed as a set) give the same key.
+    """
+    return tuple(
+        (name, tuple(sorted(value)) if isinstance(value, (list, set, tuple)) else value)
+        for name, value in sorted(selections.items())
+        if value not in (None, [], (), set(), "")
+    )
+
+
+class ResultCache:
+    def __init__(self, max_entries: int = 256):
+        self.max_entries = max_entries
+        self._entries: OrderedDict[Hashable, Any] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            if key not in self._entries:
+                return default
+            self._entries.move_to_end(key)
+            return self._entries[key]
+
+    def put(self, key: Hashable, value: Any) -> None:
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def get_or_compute(self, key: Hashable, compute: Callable[[], Any]) -> Any:
+        sentinel = object()
+        value = self.get(key, sentinel)
+        if value is sentinel:
+            value = compute()
+            self.put(key, value)
+        return value
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+RESULT_CACHE = ResultCache()
+
+
+@dataclass(frozen=True)
+class ReportSpec:
+    """Filters and KPI measures of one report.
+
+    ``measures`` are SQL aggregate strings, so any backend can run them.
+    ``ratios`` maps a derived KPI to a (numerator, denominator) pair of
+    measure names; a zero denominator gives None.
+    """
+
+    filters: dict[str, str]
+    measures: dict[str, str]
+    ratios: dict[str, tuple[str, str]] = field(default_factory=dict)
+    backend: PolarsBackend | DuckDBBackend = field(default_factory=get_backend)
+
+    def selections(self, **selections) -> tuple:
+        """``(column, value)`` pairs of the non-empty ``selections``."""
+        return tuple((self.filters[name], value) for name, value in freeze(selections))
+
+    def filter(self, frame, **selections):
+        return self.backend.filter(frame, self.selections(**selections))
+
+    def _with_ratios(self, values: dict) -> dict:
+        for name, (numerator, denominator) in self.ratios.items():
+            values[name] = (
+                None
+                if not values[denominator]
+                else values[numerator] / values[denominator]
+            )
+        return values
+
+    def kpis(self, frame) -> dict:
+        """Every measure (and ratio) of ``frame`` from a single scan."""
+        (row,) = self.backend.aggregate([frame], [], self.measures)
+        return self._with_ratios(row.row(0, named=True))
+
+    def compare(self, current, past) -> dict:
+        """Measures of ``current`` plus ``pct_delta_<name>`` against ``past``."""
+        now, then = (
+            self._with_ratios(frame.row(0, named=True))
+            for frame in self.backend.aggregate([current, past], [], self.measures)
+        )
+        deltas = {
+            f"pct_delta_{name}": (
+                None
+                if not then[name] or now[name] is None
+                else now[name] / then[name] - 1
+            )
+            for name in now
+        }
+        return now | deltas
+
+    def summarize(
+        self,
+        frames,
+        by: str | list[str],
+        measures: dict[str, str],
+        where: str | None = None,
+        derived: dict[str, pl.Expr] | None = None,
+        order_by: str | None = None,
+        descending: bool = False,
+        limit: int | None = None,
+    ) -> pl.DataFrame:
+        """Group ``frames`` by ``by`` and aggregate ``measures`` on the backend.
+
+        ``frames`` may be a list of partitions of one table; their partial
+        aggregates are summed, so ``measures`` must then be counts or sums.
+        ``where`` is an SQL condition applied before aggregating. ``derived``
+        columns, ordering and the ``limit`` apply to the small aggregated
+        result.
+        """
+        by = [by] if isinstance(by, str) else by
+        frames = frames if isinstance(frames, list) else [frames]
+        if where is not None:
+            frames = [self.backend.where(frame, where) for frame in frames]
+        partials = self.backend.aggregate(frames, by, measures)
+        summary = (
+            pl.concat(partials).group_by(by).agg(pl.col(name).sum() for name in measures)
+            if len(partials) > 1
+            else partials[0]
+        )
+        if derived:
+            summary = summary.with_columns(**derived)
+        if order_by is None:
+            return summary
+        if limit is not None:
+            return summary.top_k(limit, by=order_by, reverse=not descending).sort(
+                order_by, descending=descending
+            )
+        return summary.sort(order_by, descending=descending)
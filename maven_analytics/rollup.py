@@ -0,0 +1,217 @@
+"""Incremental per-store monthly sales rollup for the coffee shop transactions.
+
+The raw CSV is append-only, so each refresh only parses the rows added since
+the previous run, stores them as a new parquet part and folds their monthly
+totals into a persisted ``(store, year, month)`` rollup.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+from pathlib import Path
+
+import polars as pl
+
+from maven_analytics.ingest import DATASETS
+
+COFFEE_SHOP_SALES = DATASETS["rolling-up-looking-back/coffee_shop_sales"]
+ROLLUP_KEYS = ["store", "year", "month"]
+
+
+def monthly_totals(transactions: pl.LazyFrame) -> pl.LazyFrame:
+    return (
+        transactions
+        .group_by(
+            pl.col("store"),
+            pl.col("date").dt.year().alias("year"),
+            pl.col("date").dt.month().alias("month"),
+        )
+        .agg(pl.col("sales").sum().alias("monthly_sales"))
+    )
+
+
+def merge_rollup(rollup: pl.DataFrame, delta: pl.DataFrame) -> pl.DataFrame:
+    """Add ``delta`` monthly totals to ``rollup`` and refresh the affected MoM diffs.
+
+    Only the months touched by ``delta`` and the month that follows each of
+    them (per store) get a new ``mom_sales_diff``; every other row keeps its
+    persisted value.
+    """
+    touched = delta.select(ROLLUP_KEYS).with_columns(touched=pl.lit(True))
+
+    merged = (
+        pl.concat(
+            [rollup.select(*ROLLUP_KEYS, "monthly_sales"), delta],
+            how="vertical_relaxed",
+        )
+        .group_by(ROLLUP_KEYS)
+        .agg(pl.col("monthly_sales").sum())
+        .join(
+            rollup.select(*ROLLUP_KEYS, "mom_sales_diff"),
+            on=ROLLUP_KEYS,
+            how="left",
+        )
+        .join(touched, on=ROLLUP_KEYS, how="left")
+        .sort(ROLLUP_KEYS)
+    )
+
+    affected = pl.col("touched").fill_null(False)
+    affected = affected | affected.shift(1).over("store").fill_null(False)
+
+    return merged.with_columns(
+        pl.when(affected)
+        .then(pl.col("monthly_sales") - pl.col("monthly_sales").shift(1).over("store"))
+        .otherwise(pl.col("mom_sales_diff"))
+        .alias("mom_sales_diff")
+    ).drop("touched")
+
+
+class MonthlyRollup:
+    """CSV -> parquet ingest with a persisted monthly rollup.
+
+    Layout under ``store_dir`` (defaults to ``<csv stem>.parquet/`` next to the
+    CSV)::
+
+        parts/part-00000.parquet   raw transactions, one part per refresh
+        rollup-00001.parquet       store, year, month, monthly_sales, mom_sales_diff
+        manifest.json              parts, rollup file and the CSV prefix ingested
+
+    Every file is written under a temporary name and renamed into place, and
+    a refresh is committed by a single manifest rename that records the new
+    part count, the new rollup file and the CSV rows and bytes ingested
+    together. A refresh interrupted before that rename leaves the previous
+    manifest, which names neither the new part nor the new rollup, so the
+    rows are parsed again and counted once.
+
+    The manifest also keeps a checksum of the ingested CSV prefix. A CSV
+    that shrank or whose prefix changed was rewritten rather than appended
+    to, and the next refresh rebuilds the store from the whole file.
+    """
+
+    def __init__(self, csv_path: str | Path, store_dir: str | Path | None = None):
+        self.csv_path = Path(csv_path)
+        self.store_dir = (
+            Path(store_dir)
+            if store_dir is not None
+            else self.csv_path.with_suffix(".parquet")
+        )
+        self.parts_dir = self.store_dir / "parts"
+        self.manifest_path = self.store_dir / "manifest.json"
+
+    def _read_manifest(self) -> dict:
+        if self.manifest_path.exists():
+            manifest = json.loads(self.manifest_path.read_text())
+            # stores written before the prefix checksum are rebuilt
+            if "checksum" in manifest:
+                return manifest
+        return {"rows": 0, "parts": 0, "rollup": None, "bytes": 0, "checksum": None}
+
+    def _write_manifest(self, manifest: dict) -> None:
+        _replace(self.manifest_path, lambda path: path.write_text(json.dumps(manifest)))
+
+    def _part(self, index: int) -> Path:
+        return self.parts_dir / f"part-{index:05d}.parquet"
+
+    def load(self) -> pl.DataFrame:
+        rollup = self._read_manifest()["rollup"]
+        if rollup is None:
+            return pl.DataFrame(
+                schema={
+                    "store": pl.String,
+                    "year": pl.Int32,
+                    "month": pl.Int8,
+                    "monthly_sales": pl.Float64,
+                    "mom_sales_diff": pl.Float64,
+                }
+            )
+        return pl.read_parquet(self.store_dir / rollup)
+
+    def transactions(self) -> pl.LazyFrame:
+        parts = self._read_manifest()["parts"]
+        return pl.scan_parquet([self._part(index) for index in range(parts)])
+
+    def append(self, new_transactions: pl.DataFrame, **source) -> pl.DataFrame:
+        """Persist ``new_transactions`` as a new part and fold them into the rollup.
+
+        ``source`` updates the manifest in the same commit (``refresh``
+        passes the CSV rows and prefix the transactions were parsed from).
+        """
+        manifest = self._read_manifest()
+        rollup = self.load()
+        if new_transactions.height == 0:
+            if source:
+                self._write_manifest({**manifest, **source})
+            return rollup
+
+        index = manifest["parts"]
+        self.parts_dir.mkdir(parents=True, exist_ok=True)
+        _replace(self._part(index), new_transactions.write_parquet)
+
+        delta = monthly_totals(new_transactions.lazy()).collect()
+        rollup = merge_rollup(rollup, delta)
+        name = f"rollup-{index + 1:05d}.parquet"
+        _replace(self.store_dir / name, rollup.write_parquet)
+
+        previous = manifest["rollup"]
+        self._write_manifest(
+            {
+                **manifest,
+                **source,
+                "parts": index + 1,
+                "rollup": name,
+            }
+        )
+        if previous is not None:
+            (self.store_dir / previous).unlink(missing_ok=True)
+        return rollup
+
+    def rebuild(self) -> None:
+        """Drop every part and the rollup; the next refresh reads the whole CSV."""
+        if self.store_dir.exists():
+            shutil.rmtree(self.store_dir)
+
+    def refresh(self) -> pl.DataFrame:
+        """Ingest the rows appended to the CSV since the last refresh."""
+        manifest = self._read_manifest()
+        size = self.csv_path.stat().st_size
+        if manifest["bytes"] > size or manifest["checksum"] != _prefix_checksum(
+            self.csv_path, manifest["bytes"]
+        ):
+            self.rebuild()
+            manifest = self._read_manifest()
+
+        new_transactions = COFFEE_SHOP_SALES.scan_source(
+            self.csv_path,
+            skip_rows_after_header=manifest["rows"],
+        ).collect()
+        return self.append(
+            new_transactions,
+            rows=manifest["rows"] + new_transactions.height,
+            bytes=size,
+            checksum=_prefix_checksum(self.csv_path, size),
+        )
+
+
+def _replace(path: Path, write) -> None:
+    """``write`` to a temporary file next to ``path``, then rename it over ``path``."""
+    partial = path.with_suffix(f"{path.suffix}.tmp")
+    write(partial)
+    os.replace(partial, path)
+
+
+def _prefix_checksum(path: Path, size: int, block: int = 1 << 16) -> str | None:
+    """Checksum of the first ``size`` bytes of ``path``, from their first and last block.
+
+    Reading two blocks keeps a refresh from rereading the whole file; a
+    rewrite that keeps the size, the head and the tail of the prefix goes
+    unnoticed.
+    """
+    if size == 0:
+        return None
+    digest = hashlib.sha256(str(size).encode())
+    with path.open("rb") as file:
+        digest.update(file.read(min(block, size)))
+        file.seek(max(size - block, 0))
+        digest.update(file.read(size - file.tell()))
+    return digest.hexdigest()
@@ -0,0 +1,61 @@
+"""Serve the report apps to many viewers from one process.
+
+Mounts the marimo apps in run mode on one ASGI server::
+
+    python -m maven_analytics.server --port 8000 --workers 8 --max-pending 32
+
+    /airline    airline-flight-delay-report
+    /toys       toy-store-kpi-report
+
+Every viewer's session runs in this process, so the fact tables, the bitmap
+index and the snapshot are loaded once (``serving.shared``) and every
+session's queries go through one bounded ``serving.QUERY_POOL``. The pool is
+sized from ``--workers`` and ``--max-pending`` before the apps first import
+it.
+"""
+
+import argparse
+import os
+
+from maven_analytics.ingest import PORTFOLIO, REPO_ROOT
+
+APPS = {
+    "/airline": "airline-flight-delay-report",
+    "/toys": "toy-store-kpi-report",
+}
+
+
+def build_app(session_ttl: int = 120):
+    import marimo
+
+    builder = marimo.create_asgi_app(quiet=True, session_ttl=session_ttl)
+    for path, name in APPS.items():
+        builder = builder.with_app(path=path, root=str(PORTFOLIO / name / f"{name}.py"))
+    return builder.build()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, help="query threads (default: CPU count)")
+    parser.add_argument(
+        "--max-pending", type=int, help="queued queries (default: 4 per worker)"
+    )
+    parser.add_argument("--session-ttl", type=int, default=120)
+    args = parser.parse_args()
+
+    # the apps read their data relative to the repository root
+    os.chdir(REPO_ROOT)
+    if args.workers is not None:
+        os.environ["MAVEN_WORKERS"] = str(args.workers)
+    if args.max_pending is not None:
+        os.environ["MAVEN_MAX_PENDING"] = str(args.max_pending)
+
+    import uvicorn
+
+    uvicorn.run(build_app(args.session_ttl), host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
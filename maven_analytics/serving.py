@@ -0,0 +1,139 @@
+"""Process-wide state for serving the reports to many viewers at once.
+
+Under ``marimo run`` (and ``maven_analytics.server``) every viewer gets a
+session whose kernel runs in a thread of the same server process, so the
+state kept here is shared by all sessions:
+
+``shared``
+    Builds a value (a loaded fact table, a bitmap index) once per process.
+    Concurrent first callers wait for the one build instead of each
+    loading their own copy.
+
+``WorkerPool``
+    A bounded executor. At most ``max_workers`` queries run and at most
+    ``max_pending`` wait. When both are full, ``submit`` raises
+    ``PoolSaturated`` at once instead of waiting for a slot: it is called
+    from the async report cells, where waiting would block the kernel's
+    event loop, and a burst of viewers must not queue without limit.
+
+``single_flight``
+    Runs one computation per key at a time. Callers that ask for a key
+    while it is being computed share that result, so identical filter
+    states arriving together from different viewers run once.
+
+``QUERY_POOL`` is the pool every ``QueryRunner`` submits to by default,
+sized by ``MAVEN_WORKERS`` (default: CPU count) and ``MAVEN_MAX_PENDING``
+(default: 4 per worker).
+"""
+
+import os
+import threading
+from collections.abc import Callable, Hashable
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any
+
+_shared: dict[Hashable, Any] = {}
+_shared_locks: dict[Hashable, threading.Lock] = {}
+_shared_guard = threading.Lock()
+
+
+def shared(key: Hashable, build: Callable[[], Any]) -> Any:
+    """``build()`` once per process for ``key``; later calls return the same value."""
+    try:
+        return _shared[key]
+    except KeyError:
+        pass
+    with _shared_guard:
+        lock = _shared_locks.setdefault(key, threading.Lock())
+    with lock:
+        if key not in _shared:
+            _shared[key] = build()
+        return _shared[key]
+
+
+def drop_shared(key: Hashable) -> None:
+    with _shared_guard:
+        _shared.pop(key, None)
+
+
+class PoolSaturated(RuntimeError):
+    """Raised when every worker and pending slot of the pool is taken."""
+
+
+class WorkerPool:
+    def __init__(
+        self,
+        max_workers: int | None = None,
+        max_pending: int | None = None,
+    ):
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.max_pending = 4 * self.max_workers if max_pending is None else max_pending
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.max_workers, thread_name_prefix="query"
+        )
+        self._slots = threading.BoundedSemaphore(self.max_workers + self.max_pending)
+        self._lock = threading.Lock()
+        self.stats = {"submitted": 0, "completed": 0, "cancelled": 0, "rejected": 0}
+
+    def submit(self, fn: Callable[[], Any]) -> Future:
+        # never blocks: the caller may be running on an event loop
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self.stats["rejected"] += 1
+            raise PoolSaturated(
+                f"{self.max_workers} workers and {self.max_pending} pending queries busy"
+            )
+        try:
+            future = self._executor.submit(fn)
+        except BaseException:
+            self._slots.release()
+            raise
+        with self._lock:
+            self.stats["submitted"] += 1
+        # a cancelled query frees its slot as well as a finished one
+        future.add_done_callback(self._release)
+        return future
+
+    def _release(self, future: Future) -> None:
+        self._slots.release()
+        with self._lock:
+            self.stats["cancelled" if future.cancelled() else "completed"] += 1
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+_flights: dict[Hashable, Future] = {}
+_flights_lock = threading.Lock()
+
+
+def single_flight(key: Hashable, compute: Callable[[], Any]) -> Any:
+    """``compute()``, or the result of the call already running for ``key``."""
+    with _flights_lock:
+        running = _flights.get(key)
+        if running is None:
+            running = _flights[key] = Future()
+            owner = True
+        else:
+            owner = False
+    if not owner:
+        return running.result()
+    try:
+        running.set_result(compute())
+    except BaseException as error:
+        running.set_exception(error)
+    finally:
+        with _flights_lock:
+            del _flights[key]
+    return running.result()
+
+
+def _env_int(name: str) -> int | None:
+    value = os.environ.get(name)
+    return int(value) if value else None
+
+
+QUERY_POOL = WorkerPool(
+    max_workers=_env_int("MAVEN_WORKERS"),
+    max_pending=_env_int("MAVEN_MAX_PENDING"),
+)
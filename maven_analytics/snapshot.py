@@ -0,0 +1,139 @@
+"""Arrow IPC snapshots of each report's default view.
+
+The first time a report renders its default (unfiltered) view, every summary
+it collects is written to an uncompressed Arrow IPC file under
+``SNAPSHOT_DIR/<report>/``. On later launches those files are memory-mapped
+and handed to Polars without copying, so the first paint needs no scans and
+no recomputation. Queries only run once a filter moves the view away from
+the default; their results are kept in the shared in-memory
+``report.RESULT_CACHE`` keyed by filter state.
+
+A snapshot is tied to the size and modification time of the report's
+source files; touching any source invalidates every summary of that report.
+"""
+
+import json
+import os
+import threading
+from collections.abc import Callable, Iterable
+from pathlib import Path
+
+import polars as pl
+
+from maven_analytics.async_query import Query, QueryRunner
+from maven_analytics.ingest import CACHE_DIR
+from maven_analytics.report import RESULT_CACHE, ResultCache
+from maven_analytics.serving import single_flight
+
+SNAPSHOT_DIR = CACHE_DIR / "snapshots"
+
+
+def source_key(sources: Iterable[Path]) -> str:
+    """Cheap fingerprint of ``sources`` (path, size and mtime, no hashing)."""
+    stats = []
+    for source in sorted(Path(source) for source in sources):
+        stat = source.stat()
+        stats.append([str(source), stat.st_size, stat.st_mtime_ns])
+    return json.dumps(stats)
+
+
+def read_mapped(path: Path) -> pl.DataFrame:
+    """Zero-copy read of an uncompressed Arrow IPC file."""
+    import pyarrow as pa
+
+    with pa.memory_map(str(path)) as source:
+        table = pa.ipc.open_file(source).read_all()
+    return pl.from_arrow(table, rechunk=False)
+
+
+class ReportSnapshot:
+    def __init__(
+        self, report: str, sources: Iterable[Path], root: Path | None = None
+    ):
+        self.dir = (SNAPSHOT_DIR if root is None else root) / report
+        self.key = source_key(sources)
+        self._manifest_path = self.dir / "manifest.json"
+        self._lock = threading.Lock()
+
+    def _valid(self) -> bool:
+        if not self._manifest_path.exists():
+            return False
+        return json.loads(self._manifest_path.read_text()).get("sources") == self.key
+
+    def read(self, name: str) -> pl.DataFrame | None:
+        """Memory-map the snapshot of ``name``, or None if missing or stale."""
+        path = self.dir / f"{name}.arrow"
+        if not path.exists() or not self._valid():
+            return None
+        return read_mapped(path)
+
+    def write(self, name: str, frame: pl.DataFrame) -> None:
+        with self._lock:
+            self.dir.mkdir(parents=True, exist_ok=True)
+            if not self._valid():
+                for stale in self.dir.glob("*.arrow"):
+                    stale.unlink()
+                self._manifest_path.write_text(json.dumps({"sources": self.key}))
+        # write then rename, so a concurrent reader never maps a partial file
+        path = self.dir / f"{name}.arrow"
+        partial = path.with_suffix(f".{os.getpid()}.tmp")
+        frame.write_ipc(partial, compression="uncompressed")
+        partial.replace(path)
+
+    def get(
+        self, name: str, compute: Callable[[], pl.DataFrame], default: bool = True
+    ) -> pl.DataFrame:
+        """Snapshot of ``name`` in the default view, otherwise ``compute()``."""
+        if not default:
+            return compute()
+        frame = self.read(name)
+        if frame is None:
+            frame = compute()
+            self.write(name, frame)
+        return frame
+
+    async def collect(
+        self,
+        runner: QueryRunner,
+        name: str,
+        query: Query,
+        view: tuple = (),
+        cache: ResultCache = RESULT_CACHE,
+    ) -> pl.DataFrame:
+        """``runner.collect(name, query)`` for the filter state ``view``.
+
+        The default view (an empty ``view``) is served from the snapshot;
+        any other view is looked up in ``cache`` before a query runs. Cache
+        and snapshot are shared by every session in the process, and a query
+        already running for the same view in another session is joined
+        rather than repeated.
+        """
+        key = (str(self.dir), self.key, name, view)
+        if view:
+            frame = cache.get(key)
+            if frame is not None:
+                return frame
+        else:
+            frame = self.read(name)
+            if frame is not None:
+                return frame
+
+        run = query.collect if isinstance(query, pl.LazyFrame) else query
+
+        def compute_and_store() -> pl.DataFrame:
+            # stored by the worker, so a superseded query's result still lands
+            frame = run()
+            if view:
+                cache.put(key, frame)
+            else:
+                self.write(name, frame)
+            return frame
+
+        def run_and_store() -> pl.DataFrame:
+            return single_flight(key, compute_and_store)
+
+        return await runner.collect(name, run_and_store)
+
+    def clear(self) -> None:
+        for path in self.dir.glob("*"):
+            path.unlink()
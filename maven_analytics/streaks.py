@@ -0,0 +1,257 @@
+"""Incremental per-user daily streak state for the lesson streak leaderboard.
+
+A streak is a run of consecutive days with at least one completed lesson.
+Instead of recomputing every streak from the full lesson history, the state
+table keeps one row per user:
+
+    user_id, user_name          the user and their latest name
+    streak_start, streak_len    the user's current (most recent) streak
+    last_active                 last day with a completed lesson
+    best_start, best_end,       the user's longest streak so far
+    best_len
+
+``fold_events`` merges a batch of newer lesson completions into the state.
+Only users active in the batch are touched: each user's first new streak
+continues their current streak when it starts the day after
+``last_active``. ``StreakState`` persists the state and the last ingested
+day, so a daily refresh only reads completions from that day on. The last
+day is read again because completions can still be logged on it after a
+refresh; the users already active on it are skipped, since a day counts
+once.
+
+The state keeps only each user's current and best streak, so it answers
+"longest streaks running on the last ingested day" and "each user's
+longest streak", but not questions about earlier days or a ranking of every
+streak ever (where one user can hold several places).
+"""
+
+import datetime as dt
+import json
+from pathlib import Path
+
+import polars as pl
+
+from maven_analytics import kernels
+from maven_analytics.rollup import _replace
+
+# user_id takes the dtype of the events' ids; Int64 is that of an empty state
+STATE_SCHEMA = {
+    "user_id": pl.Int64,
+    "user_name": pl.String,
+    "streak_start": pl.Date,
+    "streak_len": pl.Int64,
+    "last_active": pl.Date,
+    "best_start": pl.Date,
+    "best_end": pl.Date,
+    "best_len": pl.Int64,
+}
+
+
+def empty_state(user_dtype: pl.DataType = pl.Int64) -> pl.DataFrame:
+    return pl.DataFrame(schema={**STATE_SCHEMA, "user_id": user_dtype})
+
+
+def batch_streaks(events: pl.LazyFrame) -> pl.LazyFrame:
+    """Streaks within ``events``, numbered per user from 1 in date order."""
+    return kernels.daily_streaks(events)
+
+
+def fold_events(state: pl.DataFrame, events: pl.LazyFrame) -> pl.DataFrame:
+    """``state`` updated with ``events``, each later than its user's ``last_active``."""
+    if state.height == 0:
+        state = empty_state(events.collect_schema()["user_id"])
+    schema = {**STATE_SCHEMA, "user_id": state.schema["user_id"]}
+    events = events.with_columns(pl.col("user_id").cast(schema["user_id"]))
+    previous = state.lazy().select(
+        "user_id",
+        prev_start="streak_start",
+        prev_len="streak_len",
+        prev_active="last_active",
+        prev_best_start="best_start",
+        prev_best_end="best_end",
+        prev_best_len="best_len",
+    )
+    continues = (pl.col("streak") == 1) & (
+        (pl.col("start") - pl.col("prev_active")).dt.total_days() == 1
+    )
+    streaks = (
+        batch_streaks(events)
+        .join(previous, on="user_id", how="left")
+        .with_columns(
+            start=pl.when(continues).then(pl.col("prev_start")).otherwise("start"),
+            length=pl.when(continues)
+            .then(pl.col("length") + pl.col("prev_len"))
+            .otherwise("length"),
+        )
+    )
+    # the first longest streak in date order, so a tie keeps the earlier one
+    best = pl.col("length").sort_by("end").arg_max()
+    updates = (
+        streaks
+        .group_by("user_id")
+        .agg(
+            user_name=pl.col("user_name").sort_by("end").last(),
+            streak_start=pl.col("start").sort_by("end").last(),
+            streak_len=pl.col("length").sort_by("end").last(),
+            last_active=pl.col("end").max(),
+            batch_best_start=pl.col("start").sort_by("end").get(best),
+            batch_best_end=pl.col("end").sort_by("end").get(best),
+            batch_best_len=pl.col("length").sort_by("end").get(best),
+            prev_best_start=pl.col("prev_best_start").first(),
+            prev_best_end=pl.col("prev_best_end").first(),
+            prev_best_len=pl.col("prev_best_len").first(),
+        )
+        .with_columns(
+            pl.when(pl.col("batch_best_len") > pl.col("prev_best_len").fill_null(0))
+            .then(pl.col(f"batch_best_{name}"))
+            .otherwise(pl.col(f"prev_best_{name}"))
+            .alias(f"best_{name}")
+            for name in ["start", "end", "len"]
+        )
+        .select(list(schema))
+        .collect()
+    )
+    return (
+        pl.concat(
+            [state.join(updates, on="user_id", how="anti"), updates],
+            how="vertical_relaxed",
+        )
+        .cast(schema)
+        .sort("user_id")
+    )
+
+
+def leaderboard(state: pl.DataFrame, active_date: dt.date, k: int = 10) -> pl.DataFrame:
+    """Longest streaks still running on ``active_date``.
+
+    ``active_date`` must not be earlier than the last day in ``state``: a
+    streak that ended on an earlier day may since have been replaced by the
+    user's newer one.
+    """
+    latest = state.get_column("last_active").max()
+    if latest is not None and active_date < latest:
+        raise ValueError(
+            f"the state only knows the streaks running on {latest}, not on {active_date}"
+        )
+    return (
+        state
+        .filter(pl.col("last_active") == active_date)
+        .top_k(k, by="streak_len")
+        .sort("streak_len", descending=True)
+        .select("user_id", "user_name", "streak_start", "streak_len", "last_active")
+    )
+
+
+def all_time_best(state: pl.DataFrame, k: int = 10) -> pl.DataFrame:
+    """Users with the longest streaks ever, one (their best) streak per user.
+
+    Unlike sorting every streak, a user with several long streaks is listed
+    once.
+    """
+    return (
+        state
+        .top_k(k, by="best_len")
+        .sort("best_len", descending=True)
+        .select("user_id", "user_name", "best_start", "best_end", "best_len")
+    )
+
+
+class StreakState:
+    """Lesson completions parquet -> persisted per-user streak state.
+
+    Layout under ``store_dir`` (defaults to ``<parquet stem>.streaks/`` next
+    to the lesson file)::
+
+        state-00001.parquet   one row per user, see STATE_SCHEMA
+        manifest.json         last ingested day and the current state file
+
+    Each append writes a new state file under a temporary name and renames
+    it into place, then commits by renaming a new manifest over the old
+    one. An append interrupted before that rename leaves the previous
+    manifest and state, so its events are folded again, once.
+    """
+
+    def __init__(self, lessons_path: str | Path, store_dir: str | Path | None = None):
+        self.lessons_path = Path(lessons_path)
+        self.store_dir = (
+            Path(store_dir)
+            if store_dir is not None
+            else self.lessons_path.with_suffix(".streaks")
+        )
+        self.manifest_path = self.store_dir / "manifest.json"
+
+    def _read_manifest(self) -> dict:
+        if self.manifest_path.exists():
+            manifest = json.loads(self.manifest_path.read_text())
+            # stores written before the versioned state files are rebuilt
+            if "state" in manifest:
+                return manifest
+        return {"through": None, "state": None, "version": 0}
+
+    def _write_manifest(self, manifest: dict) -> None:
+        _replace(self.manifest_path, lambda path: path.write_text(json.dumps(manifest)))
+
+    @property
+    def through(self) -> dt.date | None:
+        """The last day folded into the state."""
+        through = self._read_manifest()["through"]
+        return None if through is None else dt.date.fromisoformat(through)
+
+    def load(self) -> pl.DataFrame:
+        state = self._read_manifest()["state"]
+        if state is None:
+            return empty_state()
+        return pl.read_parquet(self.store_dir / state)
+
+    def append(self, events: pl.DataFrame | pl.LazyFrame) -> pl.DataFrame:
+        """Fold lesson completions from the last ingested day on into the state.
+
+        Completions on the last ingested day only count for users who were
+        not active on it yet.
+        """
+        # collected once: checking the dates on the scan would read it twice
+        events = (
+            events.lazy()
+            .select("user_id", "user_name", pl.col("date").cast(pl.Date))
+            .collect()
+        )
+        manifest = self._read_manifest()
+        through = self.through
+        if through is not None and events.filter(pl.col("date") < through).height:
+            raise ValueError(f"events must not be older than the last ingested day {through}")
+        state = self.load()
+        if state.height:
+            # a day a user is already active on is already in their streak
+            events = events.join(
+                state.select("user_id", date="last_active"),
+                on=["user_id", "date"],
+                how="anti",
+            )
+        if events.height == 0:
+            return state
+
+        state = fold_events(state, events.lazy())
+        version = manifest["version"] + 1
+        name = f"state-{version:05d}.parquet"
+        self.store_dir.mkdir(parents=True, exist_ok=True)
+        _replace(self.store_dir / name, state.write_parquet)
+        last_day = events.get_column("date").max()
+        self._write_manifest(
+            {
+                "through": max(last_day, through or last_day).isoformat(),
+                "state": name,
+                "version": version,
+            }
+        )
+        if manifest["state"] is not None:
+            (self.store_dir / manifest["state"]).unlink(missing_ok=True)
+        return state
+
+    def refresh(self) -> pl.DataFrame:
+        """Ingest the lesson completions recorded since the last refresh."""
+        lessons = pl.scan_parquet(self.lessons_path)
+        through = self.through
+        if through is not None:
+            # pushed into the scan: row groups of older days are skipped
+            lessons = lessons.filter(pl.col("date") >= through)
+        return self.append(lessons)
@@ -0,0 +1,133 @@
+"""Top-k aggregation over partitioned fact tables.
+
+``partial_top_k`` answers "the ``k`` groups with the most rows" (or the
+highest rate) over a multi-file or hive-partitioned table without a
+group_by over every raw row. Each partition is aggregated on its own, in
+parallel, into summable partial counts per group (one small table per
+file). The partials are folded into running totals as they finish, so at
+most one partial per worker is held next to the totals. A bounded heap then
+picks the top ``k`` groups, ranking them by a merged total or by a measure
+derived from the merged totals (a rate from a count and a total), and only
+those ``k`` rows are materialized::
+
+    partial_top_k(
+        scan_partitions(flights_dir),
+        by="AIRLINE NAME",
+        partials={"total": pl.len(), "delayed": (pl.col("Status") == "Delayed").sum()},
+        derived={"pct_delayed": lambda total, delayed: delayed / total},
+        order_by="pct_delayed",
+    )
+
+Derived measures are computed from the merged totals, never averaged across
+partitions. Ties are broken by the group key, in ascending order.
+"""
+
+import heapq
+import os
+from collections.abc import Callable, Sequence
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+
+import polars as pl
+
+
+def scan_partitions(path: Path, pattern: str = "*.parquet") -> list[pl.LazyFrame]:
+    """One lazy scan per file of a multi-file or hive-partitioned layout."""
+    if path.is_file():
+        return [pl.scan_parquet(path)]
+    return [
+        pl.scan_parquet(file, hive_partitioning=True)
+        for file in sorted(path.rglob(pattern))
+    ]
+
+
+def _key_order(key: tuple) -> tuple:
+    # nulls last, and never compared with a value
+    return tuple((value is None, value) for value in key)
+
+
+def partial_top_k(
+    partitions: Sequence[pl.LazyFrame],
+    by: str | list[str],
+    partials: dict[str, pl.Expr],
+    order_by: str,
+    k: int = 10,
+    derived: dict[str, Callable[..., float]] | None = None,
+    workers: int | None = None,
+) -> pl.DataFrame:
+    """Top ``k`` groups of ``by`` ranked by ``order_by``, in descending order.
+
+    ``partials`` must be summable across partitions (``pl.len()``, sums,
+    filtered counts). ``derived`` maps a name to a function of the merged
+    partials, passed by name, e.g. ``lambda total, delayed: delayed / total``.
+    ``order_by`` names a partial or a derived measure.
+    """
+    by = [by] if isinstance(by, str) else by
+    derived = derived or {}
+    names = list(partials)
+
+    def aggregate(partition: pl.LazyFrame) -> pl.DataFrame:
+        return partition.group_by(by).agg(**partials).collect()
+
+    totals: dict[tuple, list] = {}
+    schema = None
+    with ThreadPoolExecutor(max_workers=workers or os.cpu_count()) as pool:
+        futures = [pool.submit(aggregate, partition) for partition in partitions]
+        for future in as_completed(futures):
+            partial = future.result()
+            schema = schema or partial.schema
+            keys = zip(*(partial.get_column(column) for column in by))
+            for key, counts in zip(keys, partial.select(names).iter_rows()):
+                total = totals.get(key)
+                if total is None:
+                    totals[key] = list(counts)
+                else:
+                    for index, count in enumerate(counts):
+                        total[index] += count
+
+    def measures(counts: list) -> dict:
+        merged = dict(zip(names, counts))
+        return {**merged, **{name: f(**merged) for name, f in derived.items()}}
+
+    def rank(item: tuple[tuple, list]) -> tuple:
+        key, counts = item
+        merged = dict(zip(names, counts))
+        value = merged[order_by] if order_by in merged else derived[order_by](**merged)
+        return -value, _key_order(key)
+
+    top = heapq.nsmallest(k, totals.items(), key=rank)
+    if schema is None:
+        return pl.DataFrame(schema=by)
+    # summed counts are Python ints: Int64 whatever the partial's dtype
+    return pl.DataFrame(
+        [(*key, *measures(counts).values()) for key, counts in top],
+        schema=[*by, *names, *derived],
+        schema_overrides={column: schema[column] for column in by},
+        orient="row",
+    )
+
+
+def city_flight_counts(flights: Sequence[pl.LazyFrame], k: int = 10) -> pl.DataFrame:
+    """Origin cities with the most flights."""
+    return partial_top_k(
+        [partition.filter(pl.col("CITY").is_not_null()) for partition in flights],
+        by="CITY",
+        partials={"total": pl.len()},
+        order_by="total",
+        k=k,
+    )
+
+
+def airline_delay_rates(flights: Sequence[pl.LazyFrame], k: int = 10) -> pl.DataFrame:
+    """Airlines with the highest share of delayed flights."""
+    return partial_top_k(
+        flights,
+        by="AIRLINE NAME",
+        partials={
+            "total": pl.len(),
+            "delayed": (pl.col("Status") == "Delayed").sum(),
+        },
+        derived={"pct_delayed": lambda total, delayed: delayed / total},
+        order_by="pct_delayed",
+        k=k,
+    )
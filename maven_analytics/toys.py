@@ -0,0 +1,115 @@
+"""Integer date-keyed calendar and sales facts for the Maven Toys report.
+
+``load_calendar`` builds a dense calendar dimension: one row per day from the
+first to the last calendar date, where ``Date_Key`` is the number of days
+since the first date and equals the row position. ``Month_Ordinal`` counts
+months (``year * 12 + month - 1``), so "same month last year" is
+``Month_Ordinal - 12``.
+
+``load_sales`` replaces ``Date`` in the fact table with ``Date_Key`` and keeps
+the table sorted by it (cached under ``CACHE_DIR``). Calendar attributes are
+then attached with the backend's ``lookup``, a gather by key rather than a
+join. A month is a contiguous key range, so ``month_slice`` returns its rows
+with two binary searches instead of comparing every row.
+"""
+
+import json
+from pathlib import Path
+
+import polars as pl
+
+from maven_analytics import ingest
+from maven_analytics.ingest import CACHE_DIR, REPO_ROOT, checksum
+
+SALES_PATH = (
+    REPO_ROOT / "project-portfolio/toy-store-kpi-report/maven-toys-data/sales.parquet"
+)
+KEYED_SALES_DIR = CACHE_DIR / "toy-store-kpi-report/sales_by_date"
+
+
+def load_calendar() -> pl.DataFrame:
+    dates = ingest.read("toy-store-kpi-report/calendar").get_column("Date")
+    start = dates.min()
+    return (
+        pl.DataFrame({"Date": pl.date_range(start, dates.max(), "1d", eager=True)})
+        .with_row_index("Date_Key")
+        .with_columns(
+            pl.col("Date_Key").cast(pl.Int32),
+            Start_Month=pl.col("Date").dt.month_start(),
+            Start_Week=(
+                pl.col("Date")
+                .dt.offset_by("1d")  # shift so Sunday becomes Monday
+                .dt.truncate("1w")  # truncate (Monday-based)
+                .dt.offset_by("-1d")  # shift back to Sunday
+            ),
+            Month_Ordinal=(
+                pl.col("Date").dt.year() * 12 + pl.col("Date").dt.month() - 1
+            ).cast(pl.Int32),
+        )
+    )
+
+
+def date_key(calendar: pl.DataFrame) -> pl.Expr:
+    """``Date`` as a ``Date_Key`` of ``calendar``."""
+    start = pl.lit(calendar.item(0, "Date"))
+    return (pl.col("Date") - start).dt.total_days().cast(pl.Int32)
+
+
+def load_sales(
+    calendar: pl.DataFrame,
+    source: Path = SALES_PATH,
+    target: Path | None = None,
+    force: bool = False,
+) -> pl.DataFrame:
+    """Sales facts keyed and sorted by ``Date_Key``, rebuilt when ``source`` changes."""
+    target = KEYED_SALES_DIR if target is None else target
+    manifest_path = target / "manifest.json"
+    path = target / "sales.parquet"
+    digest = checksum(source)
+    if (
+        not force
+        and manifest_path.exists()
+        and json.loads(manifest_path.read_text()).get("sha256") == digest
+    ):
+        return pl.read_parquet(path).set_sorted("Date_Key")
+
+    sales = (
+        pl.read_parquet(source)
+        .with_columns(Date_Key=date_key(calendar))
+        .drop("Date")
+        .sort("Date_Key", "Sale_ID")
+    )
+    keys = sales.get_column("Date_Key")
+    if keys.min() < 0 or keys.max() >= calendar.height:
+        raise ValueError("sales dates fall outside the calendar")
+
+    target.mkdir(parents=True, exist_ok=True)
+    sales.write_parquet(path, compression="zstd", statistics=True)
+    manifest_path.write_text(json.dumps({"sha256": digest}))
+    return sales
+
+
+def key_range(calendar: pl.DataFrame, column: str, ordinal: int) -> tuple[int, int]:
+    """First and one-past-last ``Date_Key`` of a ``column`` ordinal."""
+    ordinals = calendar.get_column(column)
+    return (
+        ordinals.search_sorted(ordinal, side="left"),
+        ordinals.search_sorted(ordinal, side="right"),
+    )
+
+
+def key_slice(sales: pl.DataFrame, start: int, end: int) -> pl.DataFrame:
+    """Rows with ``start <= Date_Key < end`` from ``sales`` sorted by key."""
+    keys = sales.get_column("Date_Key")
+    first = keys.search_sorted(start, side="left")
+    last = keys.search_sorted(end, side="left")
+    return sales.slice(first, last - first)
+
+
+def month_slice(sales: pl.DataFrame, calendar: pl.DataFrame, ordinal: int) -> pl.DataFrame:
+    return key_slice(sales, *key_range(calendar, "Month_Ordinal", ordinal))
+
+
+def latest_month(sales: pl.DataFrame, calendar: pl.DataFrame) -> int:
+    """``Month_Ordinal`` of the last sale, i.e. the current reporting month."""
+    return calendar.item(sales.item(-1, "Date_Key"), "Month_Ordinal")
@@ -6,31 +6,32 @@ app = marimo.App(layout_file="layouts/airline-flight-delay-report.grid.json")
 with app.setup(hide_code=True):
     import marimo as mo
     import polars as pl
-    import altair as alt
     from typing import Optional
     from pathlib import Path
+    from maven_analytics import delays, ingest
+    from maven_analytics.backends import get_backend
+    from maven_analytics.bitmaps import BitmapIndex
+    from maven_analytics.bootstrap import enable_theme, lazy_import
+    from maven_analytics.export import ChunkedExport, row_group_chunks
+    from maven_analytics.report import ReportSpec, freeze, human_format
+    from maven_analytics.async_query import QueryRunner
+    from maven_analytics.serving import shared
+    from maven_analytics.snapshot import ReportSnapshot
+
+    # altair is only imported once the first chart is built, which also
+    # registers the shared theme
+    alt = lazy_import("altair", on_load=enable_theme)
+
+    # collects run on the process-wide query pool; a newer filter state supersedes
+    # this session's older queries
+    query_runner = QueryRunner()
+
+    # Polars by default; MAVEN_BACKEND=duckdb runs the same queries on DuckDB
+    backend = get_backend()
 
 
 @app.cell(hide_code=True)
 def _():
-    @alt.theme.register("marimo_light", enable=True)
-    def marimo_light():
-        return {
-            "config": {
-                "background": "transparent",
-                "view": {"strokeWidth": 0},
-                "axis": {
-                    "grid": False,
-                    "domain": False,
-                    "tickColor": "#999",
-                    "labelColor": "#444",
-                    "titleColor": "#444",
-                },
-                "line": {"strokeWidth": 2},
-                "area": {"opacity": 0.6},
-            }
-        }
-
     chart_color_palette = [
         "#eaf6fb",
         "#d6edf7",
@@ -39,8 +40,6 @@ def _():
         "#8fc9dd",
         "#71b9d3",
     ]
-
-    alt.theme.enable("marimo_light")
     return (chart_color_palette,)
 
 
@@ -62,38 +61,90 @@ def _():
 def _():
     path = Path("project-portfolio/airline-flight-delay-report/airlines-airports-data")
 
-    airlines = pl.scan_csv(path / "airlines.csv")
-    airports = pl.scan_csv(path / "airports.csv")
-    cancellation_codes = pl.scan_csv(path / "cancellation_codes.csv")
+    dimensions = {
+        name: backend.scan_parquet(ingest.convert(f"airline-flight-delay-report/{name}"))
+        for name in ["airlines", "airports", "cancellation_codes"]
+    }
 
-    flights = (
-        pl.scan_parquet(path / "flights-selected.parquet")
-        .with_columns(
-            pl.when(pl.col("CANCELLED") == 1)
-            .then(pl.lit("Canceled"))
-            .otherwise(
-                pl.when(pl.col("DEPARTURE_DELAY") > 0)
-                .then(pl.lit("Delayed"))
-                .otherwise(pl.lit("On-Time"))
-            ).alias("Status")
-        ).join(
-            airlines, 
-            left_on="AIRLINE", 
-            right_on="IATA_CODE",
-            how="left",
-            suffix=" NAME"
-        ).join(
-            airports,
-            left_on="ORIGIN_AIRPORT",
-            right_on="IATA_CODE",
-            how="left"
-        ).join(
-            cancellation_codes,
-            on="CANCELLATION_REASON",
-            how="left"
+    def model_flights(scan):
+        return backend.sql(
+            """
+            SELECT
+                f.*,
+                CASE
+                    WHEN f.CANCELLED = 1 THEN 'Canceled'
+                    WHEN f.DEPARTURE_DELAY > 0 THEN 'Delayed'
+                    ELSE 'On-Time'
+                END AS Status,
+                a.AIRLINE AS "AIRLINE NAME",
+                p.AIRPORT, p.CITY, p.STATE, p.COUNTRY, p.LATITUDE, p.LONGITUDE,
+                c.CANCELLATION_DESCRIPTION
+            FROM flights AS f
+            LEFT JOIN airlines AS a ON f.AIRLINE = a.IATA_CODE
+            LEFT JOIN airports AS p ON f.ORIGIN_AIRPORT = p.IATA_CODE
+            LEFT JOIN cancellation_codes AS c
+                ON f.CANCELLATION_REASON = c.CANCELLATION_REASON
+            """,
+            flights=scan,
+            **dimensions,
         )
+
+    flights = model_flights(backend.scan_parquet(path / "flights-selected.parquet"))
+
+    # default-view summaries are memory-mapped from here until a source changes
+    snapshot = ReportSnapshot(
+        "airline-flight-delay-report",
+        sources=[
+            Path(__file__),  # editing the report invalidates its snapshot
+            path / "flights-selected.parquet",
+            *(
+                ingest.DATASETS[f"airline-flight-delay-report/{name}"].source
+                for name in ["airlines", "airports", "cancellation_codes"]
+            ),
+        ],
     )
-    return (flights,)
+
+    # one bitset per value of each cross-filter column, built on the first summary
+    # that is not served from the snapshot; one index per process serves every
+    # filter state of every session until a source changes
+    def flight_index():
+        return shared(
+            (snapshot.key, backend.name, "flight_index"),
+            lambda: BitmapIndex.build(
+                backend.collect(
+                    flights,
+                    [
+                        "CITY",
+                        "AIRLINE NAME",
+                        "DAY_OF_WEEK",
+                        "MONTH",
+                        "Status",
+                        "CANCELLATION_DESCRIPTION",
+                    ],
+                )
+            ),
+        )
+
+    # departure-delay histograms per (MONTH, DAY_OF_WEEK, AIRLINE, ORIGIN_AIRPORT)
+    # with the report's filter columns attached; a selection sums its groups' bins
+    def delay_histograms():
+        return shared(
+            (snapshot.key, backend.name, "delay_histograms"),
+            lambda: backend.sql(
+                """
+                SELECT h.*, a.AIRLINE AS "AIRLINE NAME", p.CITY
+                FROM histograms AS h
+                LEFT JOIN airlines AS a ON h.AIRLINE = a.IATA_CODE
+                LEFT JOIN airports AS p ON h.ORIGIN_AIRPORT = p.IATA_CODE
+                """,
+                histograms=backend.from_polars(
+                    delays.load_histograms(path / "flights-selected.parquet")
+                ),
+                airlines=dimensions["airlines"],
+                airports=dimensions["airports"],
+            ),
+        )
+    return delay_histograms, flight_index, flights, model_flights, path, snapshot
 
 
 @app.cell(hide_code=True)
@@ -105,20 +156,16 @@ def _():
 
 
 @app.cell
-def _(flights):
-    def multiselect_opt(data, column):
-        return mo.ui.multiselect(options=(
-            data
-            .select(column)
-            .unique()
-            .sort(column)
-            .collect()
-            .to_series()
-        ))
-
-    city_multiselect = multiselect_opt(flights, "CITY")
-    airline_multiselect = multiselect_opt(flights, "AIRLINE NAME")
-    dow_multiselect = multiselect_opt(flights, "DAY_OF_WEEK")
+def _(flights, snapshot):
+    def multiselect_opt(data, column, name):
+        return mo.ui.multiselect(options=snapshot.get(
+            name,
+            lambda: backend.distinct(data, column)
+        ).to_series())
+
+    city_multiselect = multiselect_opt(flights, "CITY", "city_options")
+    airline_multiselect = multiselect_opt(flights, "AIRLINE NAME", "airline_options")
+    dow_multiselect = multiselect_opt(flights, "DAY_OF_WEEK", "dow_options")
     return airline_multiselect, city_multiselect, dow_multiselect
 
 
@@ -140,24 +187,36 @@ def _(dow_multiselect):
     return
 
 
-@app.function
-def apply_filters(
-    flights: pl.LazyFrame,
-    cities: list[str] | None = None,
-    airlines: list[str] | None = None,
-    days: list[int] | None = None,
-) -> pl.LazyFrame:
-
-    if cities:
-        flights = flights.filter(pl.col("CITY").is_in(cities))
-
-    if airlines:
-        flights = flights.filter(pl.col("AIRLINE NAME").is_in(airlines))
-
-    if days:
-        flights = flights.filter(pl.col("DAY_OF_WEEK").is_in(days))
+@app.cell
+def _():
+    flight_report = ReportSpec(
+        filters={"cities": "CITY", "airlines": "AIRLINE NAME", "days": "DAY_OF_WEEK"},
+        measures={
+            "total": "count(*)",
+            "ontime": "sum(CASE WHEN Status = 'On-Time' THEN 1 ELSE 0 END)",
+            "delayed": "sum(CASE WHEN Status = 'Delayed' THEN 1 ELSE 0 END)",
+            "canceled": "sum(CASE WHEN Status = 'Canceled' THEN 1 ELSE 0 END)",
+        },
+        ratios={
+            "pct_ontime": ("ontime", "total"),
+            "pct_delayed": ("delayed", "total"),
+            "pct_canceled": ("canceled", "total"),
+        },
+    )
 
-    return flights
+    # the same measures as bitmap conditions, for masked counts over flight_index
+    status_counts = {
+        "total": {},
+        "ontime": {"Status": "On-Time"},
+        "delayed": {"Status": "Delayed"},
+        "canceled": {"Status": "Canceled"},
+    }
+    status_ratios = dict(
+        pct_ontime = pl.col("ontime") / pl.col("total"),
+        pct_delayed = pl.col("delayed") / pl.col("total"),
+        pct_canceled = pl.col("canceled") / pl.col("total")
+    )
+    return flight_report, status_counts, status_ratios
 
 
 @app.function
@@ -168,14 +227,17 @@ def selection_to_list(selection, column: str) -> list:
 
 
 @app.cell
-def _(airline_multiselect, city_multiselect, dow_multiselect, flights):
-    flights_filtered = apply_filters(
-        flights,
+def _(airline_multiselect, city_multiselect, dow_multiselect, flight_report):
+    # the summaries resolve these against the bitmap index; the filtered rows
+    # themselves are only built chunk by chunk by the export
+    _filters = dict(
         cities=city_multiselect.value,
         airlines=airline_multiselect.value,
         days=dow_multiselect.value
     )
-    return (flights_filtered,)
+    selections = flight_report.selections(**_filters)
+    view = freeze(_filters)
+    return selections, view
 
 
 @app.cell
@@ -183,132 +245,133 @@ def _(
     airline_delay_rates_chart,
     cancellations_by_weekday_chart,
     city_flight_counts_chart,
-    flights_filtered,
+    flight_report,
+    selections,
+    view,
 ):
-    chart_filtered_flights = apply_filters(
-        flights_filtered,
+    _selections = dict(
         cities=selection_to_list(city_flight_counts_chart.value, "CITY"),
         airlines=selection_to_list(airline_delay_rates_chart.value, "AIRLINE NAME"),
         days=selection_to_list(cancellations_by_weekday_chart.value, "DAY_OF_WEEK")
     )
-    return (chart_filtered_flights,)
+    # chart selections narrow the widget filters: both apply, column by column
+    chart_selections = selections + flight_report.selections(**_selections)
+    chart_view = view + freeze(
+        {f"chart_{name}": value for name, value in _selections.items()}
+    )
+    return chart_selections, chart_view
 
 
 @app.cell
-def _(chart_filtered_flights):
-    monthly_status_counts = (
-        chart_filtered_flights
-        .group_by("MONTH")
-        .agg(
-            pl.col("Status")
-            .len()
-            .alias("total"),
-            pl.col("Status")
-            .filter(pl.col("Status") == "On-Time")
-            .count()
-            .alias("ontime"),
-            pl.col("Status")
-            .filter(pl.col("Status") == "Delayed")
-            .count()
-            .alias("delayed"),         
-            pl.col("Status")
-            .filter(pl.col("Status") == "Canceled")
-            .count()
-            .alias("canceled")
-        ).with_columns(
-            pct_ontime = pl.col("ontime") / pl.col("total"),
-            pct_delayed = pl.col("delayed") / pl.col("total"),
-            pct_canceled = pl.col("canceled") / pl.col("total")
+async def _(
+    chart_selections,
+    chart_view,
+    flight_index,
+    snapshot,
+    status_counts,
+    status_ratios,
+):
+    monthly_status_counts = await snapshot.collect(
+        query_runner,
+        "monthly_status_counts",
+        lambda: flight_index()
+        .summarize(
+            flight_index().mask(chart_selections),
+            by="MONTH",
+            measures=status_counts,
         )
-        .sort("MONTH", descending=False)
-        .collect()
+        .with_columns(**status_ratios)
+        .sort("MONTH"),
+        view=chart_view,
     )
     return (monthly_status_counts,)
 
 
 @app.cell
-def _(flights_filtered):
-    city_flight_counts = (
-        flights_filtered
-        .filter(pl.col("CITY").is_not_null())
-        .group_by("CITY")
-        .agg(total=pl.len())
-        .sort("total", descending=True)
-        .head(10)
-        .collect()
+async def _(flight_index, selections, snapshot, view):
+    city_flight_counts = await snapshot.collect(
+        query_runner,
+        "city_flight_counts",
+        lambda: flight_index()
+        .summarize(flight_index().mask(selections), by="CITY", measures={"total": {}})
+        .drop_nulls("CITY")
+        .top_k(10, by="total")
+        .sort("total", descending=True),
+        view=view,
     )
     return (city_flight_counts,)
 
 
 @app.cell
-def _(flights_filtered):
-    airline_delay_rates = (
-        flights_filtered
-        .group_by("AIRLINE NAME")
-        .agg(
-            pl.col("Status").len().alias("total"),
-            pl.col("Status")
-            .filter(pl.col("Status") == "Delayed")
-            .count()
-            .alias("delayed")
+async def _(flight_index, selections, snapshot, view):
+    airline_delay_rates = await snapshot.collect(
+        query_runner,
+        "airline_delay_rates",
+        lambda: flight_index()
+        .summarize(
+            flight_index().mask(selections),
+            by="AIRLINE NAME",
+            measures={"total": {}, "delayed": {"Status": "Delayed"}},
         )
-        .with_columns(
-            pct_delayed = pl.col("delayed") / pl.col("total")
-        )
-        .sort("pct_delayed", descending=True)
-        .head(10)
-        .collect()
+        .with_columns(pct_delayed = pl.col("delayed") / pl.col("total"))
+        .top_k(10, by="pct_delayed")
+        .sort("pct_delayed", descending=True),
+        view=view,
     )
     return (airline_delay_rates,)
 
 
 @app.cell
-def _(flights_filtered):
-    cancellations_by_weekday = (
-        flights_filtered
-        .filter(pl.col("Status") == "Canceled")
-        .group_by("DAY_OF_WEEK")
-        .agg(
-            pl.col("Status").len().alias("canceled"),
+async def _(flight_index, selections, snapshot, view):
+    cancellations_by_weekday = await snapshot.collect(
+        query_runner,
+        "cancellations_by_weekday",
+        lambda: flight_index()
+        .summarize(
+            flight_index().mask(selections + (("Status", "Canceled"),)),
+            by="DAY_OF_WEEK",
+            measures={"canceled": {}},
         )
         .with_columns(
             pct_total = pl.col("canceled") / pl.col("canceled").sum()
         )
-        .sort("DAY_OF_WEEK")
-        .collect()
+        .sort("DAY_OF_WEEK"),
+        view=view,
     )
     return (cancellations_by_weekday,)
 
 
 @app.cell
-def _(chart_filtered_flights):
-    canceled_flights_summary = (
-        chart_filtered_flights
-        .filter(pl.col("CANCELLATION_DESCRIPTION").is_not_null())
-        .group_by("CANCELLATION_DESCRIPTION")
-        .agg(
-            pl.col("Status").len().alias("canceled"),
+async def _(chart_selections, chart_view, flight_index, snapshot):
+    canceled_flights_summary = await snapshot.collect(
+        query_runner,
+        "canceled_flights_summary",
+        lambda: flight_index()
+        .summarize(
+            flight_index().mask(chart_selections),
+            by="CANCELLATION_DESCRIPTION",
+            measures={"canceled": {}},
         )
+        .drop_nulls("CANCELLATION_DESCRIPTION")
         .with_columns(
             pct_total = pl.col("canceled") / pl.col("canceled").sum()
-        )
-        .collect()
+        ),
+        view=chart_view,
     )
     return (canceled_flights_summary,)
 
 
 @app.cell
-def _(chart_filtered_flights):
-    status_share = (
-        chart_filtered_flights
-        .group_by("Status")
-        .agg(
-            pl.len().alias("Total")
-        )
-        .with_columns(
-            (pl.col("Total") / pl.col("Total").sum()).alias("% of Total")
+async def _(chart_selections, chart_view, flight_index, snapshot):
+    status_share = await snapshot.collect(
+        query_runner,
+        "status_share",
+        lambda: flight_index()
+        .summarize(
+            flight_index().mask(chart_selections), by="Status", measures={"Total": {}}
         )
-        .collect()
+        .with_columns((pl.col("Total") / pl.col("Total").sum()).alias("% of Total")),
+        view=chart_view,
     )
     return (status_share,)
 
@@ -321,49 +384,26 @@ def _():
     return
 
 
-@app.function
-def compute_kpis(flights_data: pl.LazyFrame) -> dict:
-
-    def count(data, filter = None):
-        if filter:
-            data = data.filter(pl.col("Status") == filter)
-        return (
-            data
-            .select("Status")
-            .count()
-            .item()
-        )
-    flights_data = flights_data.collect()
-    total_flights = count(flights_data)
-    ontime_flights = count(flights_data, "On-Time")    
-    delayed_flights = count(flights_data, "Delayed")
-    canceled_flights = count(flights_data, "Canceled")
-
-    def safe_pct(numerator, denominator):
-        return None if denominator == 0 else numerator / denominator
-
-    return {
-        "total": total_flights,
-        "ontime": ontime_flights,
-        "pct_ontime": safe_pct(ontime_flights, total_flights),
-        "delayed": delayed_flights,
-        "pct_delayed": safe_pct(delayed_flights, total_flights),
-        "canceled": canceled_flights,
-        "pct_canceled": safe_pct(canceled_flights, total_flights),
-    }
-
-
-@app.function
-def human_format(n, decimals=1) -> str:
-    for unit in ["", "K", "M", "B", "T"]:
-        if abs(n) < 1000:
-            return f"{n:.{decimals}f}{unit}"
-        n = n / 1000
-
-
 @app.cell
-def _(chart_filtered_flights):
-    kpis = compute_kpis(chart_filtered_flights)
+async def _(
+    chart_selections,
+    chart_view,
+    flight_index,
+    snapshot,
+    status_counts,
+    status_ratios,
+):
+    # one-row frame, so the KPIs can be snapshotted with the other summaries
+    kpis = (
+        await snapshot.collect(
+            query_runner,
+            "kpis",
+            lambda: flight_index()
+            .summarize(flight_index().mask(chart_selections), by=None, measures=status_counts)
+            .with_columns(**status_ratios),
+            view=chart_view,
+        )
+    ).row(0, named=True)
     return (kpis,)
 
 
@@ -611,5 +651,104 @@ def _(chart_color_palette, status_share):
     return
 
 
+@app.cell
+async def _(chart_selections, chart_view, delay_histograms, flight_report, snapshot):
+    delay_distribution = await snapshot.collect(
+        query_runner,
+        "delay_distribution",
+        lambda: delays.distribution(
+            flight_report.summarize(
+                backend.filter(delay_histograms(), chart_selections),
+                by="bin",
+                measures={"count": "sum(count)"},
+            )
+        ),
+        view=chart_view,
+    )
+    return (delay_distribution,)
+
+
+@app.cell
+def _(delay_distribution):
+    _percentiles = delays.quantiles(delay_distribution, [0.5, 0.9, 0.99]).with_columns(
+        label=pl.format("P{}", (pl.col("q") * 100).round().cast(pl.Int32))
+    )
+    _bins = (
+        alt.Chart(
+            # the open-ended outer bins have no width to draw; percentiles still count them
+            delay_distribution.filter(pl.col("bin_start") < pl.col("bin_end")),
+            title="Departure Delay Distribution (minutes)",
+        )
+        .mark_bar()
+        .encode(
+            alt.X("bin_start:Q", axis=alt.Axis(title="")),
+            alt.X2("bin_end:Q"),
+            alt.Y("count:Q", axis=alt.Axis(title="")),
+            color=alt.value("lightblue"),
+            tooltip=[
+                alt.Tooltip("bin_start:Q", title="From"),
+                alt.Tooltip("bin_end:Q", title="To"),
+                alt.Tooltip("count:Q", title="Flights", format=","),
+                alt.Tooltip("share:Q", title="% of Flights", format=".1%"),
+            ],
+        )
+    )
+    _rules = (
+        alt.Chart(_percentiles)
+        .mark_rule(strokeDash=[4, 4])
+        .encode(
+            x="delay:Q",
+            color=alt.value("#71b9d3"),
+            tooltip=[
+                alt.Tooltip("label:N", title="Percentile"),
+                alt.Tooltip("delay:Q", title="Delay (min)", format=".0f"),
+            ],
+        )
+    )
+    mo.ui.altair_chart((_bins + _rules).properties(height=180, width=1250))
+    return
+
+
+@app.cell(hide_code=True)
+def _():
+    export_format = mo.ui.dropdown(["parquet", "csv"], value="parquet", label="Format")
+    export_button = mo.ui.run_button(label="Export filtered flights")
+    mo.hstack([export_format, export_button], justify="start")
+    return export_button, export_format
+
+
+@app.cell(hide_code=True)
+def _(
+    chart_selections,
+    chart_view,
+    export_button,
+    export_format,
+    model_flights,
+    path,
+    snapshot,
+):
+    mo.stop(not export_button.value)
+
+    # one part per row group of the flights file, each streamed to disk on its own;
+    # an interrupted export picks up at the first unfinished part
+    flights_export = ChunkedExport(
+        "airline-flight-delay-report/chart_filtered_flights",
+        view=chart_view,
+        source_key=snapshot.key,
+        format=export_format.value,
+    )
+    _chunks = row_group_chunks(path / "flights-selected.parquet")
+    with mo.status.progress_bar(total=len(_chunks), title="Exporting flights") as _bar:
+        flights_export.run(
+            _chunks,
+            lambda chunk: backend.filter(
+                model_flights(backend.from_polars(chunk)), chart_selections
+            ),
+            on_part=lambda index, rows: _bar.update(),
+        )
+    mo.md(f"Exported {flights_export.rows:,} flights to `{flights_export.dir}`")
+    return
+
+
 if __name__ == "__main__":
     app.run()
@@ -5,12 +5,14 @@ app = marimo.App(layout_file="layouts/candy-recommendation.grid.json")
 
 with app.setup(hide_code=True):
     import marimo as mo
-    import altair as alt
     import polars as pl
-    import numpy as np
-    from pathlib import Path
-    from sklearn.decomposition import PCA
-    from sklearn.cluster import KMeans
+    from maven_analytics import ingest
+    from maven_analytics.bootstrap import lazy_import
+    from maven_analytics.candy import load_embeddings
+    from maven_analytics.recommend import CandyRecommender
+
+    # altair is only imported once the first chart is built
+    alt = lazy_import("altair")
 
 
 @app.cell(hide_code=True)
@@ -44,27 +46,17 @@ def _():
 
 @app.cell(hide_code=True)
 def _():
-    path = Path(
-        "project-portfolio/candy-recommendation/halloween-candy-rankings"
-    )
-    pl.read_csv(path / "candy_data_dictionary.csv")
-    return (path,)
+    ingest.read("candy-recommendation/candy_data_dictionary")
+    return
 
 
 @app.cell
-def _(path):
-    candy_data = pl.read_csv(path / "candy-data.csv")
+def _():
+    candy_data = ingest.read("candy-recommendation/candy_data")
     candy_data
     return (candy_data,)
 
 
-@app.cell
-def _(candy_data):
-    candy_subset = candy_data.select(pl.nth(range(1, 10)))
-    candy_subset
-    return (candy_subset,)
-
-
 @app.cell(hide_code=True)
 def _():
     mo.md(r"""
@@ -74,20 +66,18 @@ def _():
 
 
 @app.cell
-def _(candy_subset):
-    pca = PCA(n_components=2)
-    pca.fit(candy_subset)
-    pca.explained_variance_ratio_
-    return (pca,)
+def _(candy_data):
+    # fitted once per catalog checksum; later runs only read the cached coordinates.
+    # The cluster count is picked by a parallel k/seed silhouette sweep.
+    embeddings = load_embeddings(candy_data)
+    embeddings.explained_variance_ratio
+    return (embeddings,)
 
 
 @app.cell
-def _(candy_subset, pca):
-    pca.set_output(transform="polars")
-    pca_df = pca.transform(candy_subset)
-    pca0_std = pca_df.select("pca0").std().item()
-    pca1_std = pca_df.select("pca1").std().item()
-    return pca0_std, pca1_std, pca_df
+def _(embeddings):
+    pca_df = embeddings.pca
+    return (pca_df,)
 
 
 @app.cell(hide_code=True)
@@ -99,16 +89,9 @@ def _():
 
 
 @app.cell
-def _(candy_data, pca0_std, pca1_std, pca_df):
-    alpha = 0.05
-
-    candy_2d = (
-        pca_df
-        .with_columns(
-            pl.col("pca0") + np.random.normal(0, alpha * pca0_std, size=len(candy_data)),
-            pl.col("pca1") + np.random.normal(0, alpha * pca1_std, size=len(candy_data))
-            )
-    )
+def _(embeddings):
+    # seeded normal jitter with sd = 5% of each component's sd
+    candy_2d = embeddings.jittered
     return (candy_2d,)
 
 
@@ -121,33 +104,35 @@ def _():
 
 
 @app.cell
-def _(pca_df):
-    kmeans = KMeans(n_clusters=4)
-    clusters = kmeans.fit_predict(pca_df)
+def _(embeddings):
+    clusters = embeddings.clusters
+    embeddings.sweep
     return (clusters,)
 
 
 @app.cell
 def _():
-    range_slider = mo.ui.range_slider(start=0, stop=100, step=1, value=[0, 100],full_width=True)
-    return (range_slider,)
-
-
-@app.cell
-def _(range_slider):
-    mo.vstack([range_slider, mo.md(f"Win % Range: {range_slider.value}")])
-    return
+    # bound to Vega sliders, so dragging filters the chart in the browser
+    # without re-running any cell or re-sending the data
+    win_min = alt.param(
+        name="win_min",
+        value=0,
+        bind=alt.binding_range(min=0, max=100, step=1, name="Min Win % "),
+    )
+    win_max = alt.param(
+        name="win_max",
+        value=100,
+        bind=alt.binding_range(min=0, max=100, step=1, name="Max Win % "),
+    )
+    return win_max, win_min
 
 
 @app.cell
-def _(candy_2d, candy_data, clusters, range_slider):
+def _(candy_2d, candy_data, clusters):
     candy = (
         pl.concat(
-            [candy_data, candy_2d, pl.DataFrame({"cluster": clusters})],
+            [candy_data, candy_2d, clusters.to_frame()],
             how="horizontal"
-        ).filter(
-            pl.col("winpercent") >= range_slider.value[0],
-            pl.col("winpercent") <= range_slider.value[1]
         )
     )
     candy
@@ -155,7 +140,7 @@ def _(candy_2d, candy_data, clusters, range_slider):
 
 
 @app.cell
-def _(candy):
+def _(candy, win_max, win_min):
     points = (
         alt.Chart(candy)
         .mark_circle(size=95)
@@ -175,9 +160,26 @@ def _(candy):
         text='competitorname'
     )
 
-    mo.ui.altair_chart(points + text)
+    mo.ui.altair_chart(
+        (points + text)
+        .add_params(win_min, win_max)
+        .transform_filter(
+            (alt.datum.winpercent >= win_min) & (alt.datum.winpercent <= win_max)
+        )
+    )
     return
 
 
+@app.cell
+def _(candy_data, clusters, pca_df):
+    recommender = CandyRecommender(candy_data, pca_df, clusters)
+    picks = recommender.diverse_top_k(3)
+    mo.md(
+        "**Recommended treats:** "
+        + ", ".join(picks.get_column("competitorname"))
+    )
+    return (recommender,)
+
+
 if __name__ == "__main__":
     app.run()
@@ -9,34 +9,26 @@ app = marimo.App(
 with app.setup(hide_code=True):
     import marimo as mo
     import polars as pl
-    import altair as alt
     from pathlib import Path
+    from maven_analytics import ingest, toys
+    from maven_analytics.backends import get_backend
+    from maven_analytics.bootstrap import enable_theme, lazy_import
+    from maven_analytics.export import ChunkedExport, frame_chunks
+    from maven_analytics.report import ReportSpec, freeze, human_format
+    from maven_analytics.async_query import QueryRunner
+    from maven_analytics.serving import shared
+    from maven_analytics.snapshot import ReportSnapshot
 
+    # altair is only imported once the first chart is built, which also
+    # registers the shared theme
+    alt = lazy_import("altair", on_load=enable_theme)
 
-@app.function(hide_code=True)
-@alt.theme.register("marimo_light", enable=True)
-def marimo_light():
-    return {
-        "config": {
-            "background": "transparent",
-            "view": {"strokeWidth": 0},
-            "axis": {
-                "grid": False,
-                "domain": False,
-                "tickColor": "#999",
-                "labelColor": "#444",
-                "titleColor": "#444",
-            },
-            "line": {"strokeWidth": 2},
-            "area": {"opacity": 0.6},
-        }
-    }
-
+    # collects run on the process-wide query pool; a newer filter state supersedes
+    # this session's older queries
+    query_runner = QueryRunner()
 
-@app.cell
-def _():
-    alt.theme.enable("marimo_light")
-    return
+    # Polars by default; MAVEN_BACKEND=duckdb runs the same queries on DuckDB
+    backend = get_backend()
 
 
 @app.cell(hide_code=True)
@@ -89,44 +81,42 @@ def _():
 
 @app.cell
 def _():
-    def load_sales(path: Path) -> pl.LazyFrame:
-        return pl.scan_parquet(path)
-
-    def load_products(path: Path) -> pl.LazyFrame:
-        return pl.scan_csv(path).with_columns(
-            pl.col("Product_Cost", "Product_Price")
-            .str.replace("$", "", literal=True)
-            .str.replace(" ", "", literal=True)
-            .cast(pl.Float64)
-        )
+    def load_sales(path: Path, calendar: pl.DataFrame) -> pl.DataFrame:
+        # facts carry an integer Date_Key and stay sorted by it
+        return toys.load_sales(calendar, source=path)
 
-    def load_stores(path: Path) -> pl.LazyFrame:
-        return pl.scan_csv(path, try_parse_dates=True)
-
-    def load_calendar(path: Path) -> pl.LazyFrame:
-        return (
-            pl.scan_csv(path)
-            .with_columns(pl.col("Date").str.to_date(format="%m/%d/%Y"))
-            .with_columns(
-                Start_Month=pl.col("Date").dt.month_start(),
-                Start_Week=(
-                    pl.col("Date")
-                    .dt.offset_by("1d")  # shift so Sunday becomes Monday
-                    .dt.truncate("1w")  # truncate (Monday-based)
-                    .dt.offset_by("-1d")  # shift back to Sunday
-                ),
-            )
-        )
+    def load_products():
+        return backend.scan_parquet(ingest.convert("toy-store-kpi-report/products"))
+
+    def load_stores():
+        return backend.scan_parquet(ingest.convert("toy-store-kpi-report/stores"))
+
+    def load_calendar() -> pl.DataFrame:
+        # dense calendar: Date_Key is the row position, plus month/week ordinals
+        return toys.load_calendar()
     return load_calendar, load_products, load_sales, load_stores
 
 
 @app.cell
 def _(load_calendar, load_products, load_stores):
     data_path = Path("project-portfolio/toy-store-kpi-report/maven-toys-data")
-    products = load_products(data_path / "products.csv")
-    stores = load_stores(data_path / "stores.csv")
-    calendar = load_calendar(data_path / "calendar.csv")
-    return calendar, data_path, products, stores
+    products = load_products()
+    stores = load_stores()
+    calendar = load_calendar()
+
+    # default-view summaries are memory-mapped from here until a source changes
+    snapshot = ReportSnapshot(
+        "toy-store-kpi-report",
+        sources=[
+            Path(__file__),  # editing the report invalidates its snapshot
+            data_path / "sales.parquet",
+            *(
+                ingest.DATASETS[f"toy-store-kpi-report/{name}"].source
+                for name in ["products", "stores", "calendar"]
+            ),
+        ],
+    )
+    return calendar, data_path, products, snapshot, stores
 
 
 @app.cell(hide_code=True)
@@ -150,26 +140,51 @@ def _():
 
 
 @app.cell
-def _(calendar, data_path, load_sales, products, stores):
-    sales = (
-        load_sales(data_path / "sales.parquet")
-        .join(products, on="Product_ID", how="left")
-        .join(stores, on="Store_ID", how="left")
-        .join(calendar, on="Date", how="left")
-        .drop("Store_ID", "Product_ID")
-        .with_columns(
-            Revenue=pl.col("Product_Price") * pl.col("Units"),
-            Profit=(pl.col("Product_Price") - pl.col("Product_Cost")) * pl.col("Units"),
-        )
+def _(calendar, data_path, load_sales, products, snapshot, stores):
+    # loaded once per process and shared by every session until a source changes
+    sales_facts = shared(
+        (snapshot.key, "sales_facts"),
+        lambda: load_sales(data_path / "sales.parquet", calendar),
     )
-    return (sales,)
+
+    def model_sales(facts: pl.DataFrame):
+        modeled = backend.sql(
+            """
+            SELECT
+                s.Sale_ID, s.Units, s.Date_Key,
+                p.Product_Name, p.Product_Category, p.Product_Cost, p.Product_Price,
+                st.Store_Name, st.Store_City, st.Store_Location, st.Store_Open_Date,
+                p.Product_Price * s.Units AS Revenue,
+                (p.Product_Price - p.Product_Cost) * s.Units AS Profit
+            FROM sales AS s
+            LEFT JOIN products AS p ON s.Product_ID = p.Product_ID
+            LEFT JOIN stores AS st ON s.Store_ID = st.Store_ID
+            """,
+            sales=backend.from_polars(facts),
+            products=products,
+            stores=stores,
+        )
+        # Date_Key is the calendar row position, so the lookup needs no join on Polars
+        return backend.lookup(
+            modeled, calendar, "Date_Key", ["Date", "Start_Month", "Start_Week"]
+        )
+
+    sales = model_sales(sales_facts)
+    return model_sales, sales, sales_facts
 
 
 @app.cell
 def _(sales):
-    total_orders = sales.select("Sale_ID").count().collect().item()
-    total_revenue = sales.select("Revenue").sum().collect().item()
-    total_profit = sales.select("Profit").sum().collect().item()
+    (_totals,) = backend.aggregate(
+        [sales],
+        [],
+        {
+            "total_orders": "count(Sale_ID)",
+            "total_revenue": "sum(Revenue)",
+            "total_profit": "sum(Profit)",
+        },
+    )
+    total_orders, total_revenue, total_profit = _totals.row(0)
     return
 
 
@@ -193,9 +208,12 @@ def _():
 
 
 @app.cell
-def _(stores):
+def _(snapshot, stores):
     store_location_select = mo.ui.dropdown.from_series(
-        stores.select("Store_Location").unique().collect().to_series(),
+        snapshot.get(
+            "store_locations",
+            lambda: backend.distinct(stores, "Store_Location"),
+        ).to_series(),
         label="Store Location",
     )
 
@@ -203,57 +221,33 @@ def _(stores):
     return (store_location_select,)
 
 
-@app.function
-def human_format(n, decimals=1) -> str:
-    for unit in ["", "K", "M", "B", "T"]:
-        if abs(n) < 1000:
-            return f"{n:.{decimals}f}{unit}"
-        n = n / 1000
-
-
-@app.function
-def filter_sales(
-    sales: pl.LazyFrame, 
-    store_location: str | None, 
-    product_category: pl.LazyFrame | None
-) -> pl.LazyFrame:
-    if store_location:
-        sales = sales.filter(pl.col("Store_Location") == store_location)
-
-    if product_category:
-        sales = sales.filter(pl.col("Product_Category").is_in(product_category))
-
-    return sales
-
-
-@app.function
-def compute_kpis(current_sales: pl.LazyFrame, past_sales: pl.LazyFrame) -> dict:
-
-    orders = {
-        "current" : current_sales.select(pl.len()).collect().item(),
-        "past": past_sales.select(pl.len()).collect().item()
-    }
-    revenue = {
-        "current" : current_sales.select(pl.sum("Revenue")).collect().item(),
-        "past": past_sales.select(pl.sum("Revenue")).collect().item()
-    }
-    profit = {
-        "current" : current_sales.select(pl.sum("Profit")).collect().item(),
-        "past": past_sales.select(pl.sum("Profit")).collect().item()
-    }
-
-    return {
-        "orders": orders['current'],
-        "pct_delta_orders": orders['current'] / orders['past'] - 1,
-        "revenue": revenue['current'],
-        "pct_delta_rev": revenue['current'] / revenue['past'] - 1,
-        "profit": profit['current'],
-        "pct_delta_profit": profit['current'] / profit['past'] - 1,
-    }
+@app.cell
+def _():
+    sales_report = ReportSpec(
+        filters={
+            "store_location": "Store_Location",
+            "product_category": "Product_Category",
+        },
+        measures={
+            "orders": "count(*)",
+            "revenue": "sum(Revenue)",
+            "profit": "sum(Profit)",
+        },
+    )
+    return (sales_report,)
 
 
 @app.cell
-def _(product_category_chart, sales, store_location_select):
+async def _(
+    calendar,
+    model_sales,
+    product_category_chart,
+    sales,
+    sales_facts,
+    sales_report,
+    snapshot,
+    store_location_select,
+):
     category = (
         (
             product_category_chart.value
@@ -265,28 +259,40 @@ def _(product_category_chart, sales, store_location_select):
         else None
     )
 
-    filtered_sales = filter_sales(
-        sales,
-        store_location_select.value,
-        category,
+    _filters = dict(
+        store_location=store_location_select.value,
+        product_category=category,
     )
+    selections = sales_report.selections(**_filters)
+    filtered_sales = sales_report.filter(sales, **_filters)
 
-    current_month_data = (
-        filtered_sales
-        .filter(
-            pl.col("Start_Month") == pl.col("Start_Month").max()
-        )
+    # months are contiguous Date_Key ranges of the sorted facts: slice, then filter
+    current_month = toys.latest_month(sales_facts, calendar)
+
+    current_month_data = sales_report.filter(
+        model_sales(toys.month_slice(sales_facts, calendar, current_month)),
+        **_filters,
     )
 
-    yoy_month_data = (
-        filtered_sales
-        .filter(
-            pl.col("Start_Month") == pl.col("Start_Month").max().dt.offset_by("-1y")
-        )
+    yoy_month_data = sales_report.filter(
+        model_sales(toys.month_slice(sales_facts, calendar, current_month - 12)),
+        **_filters,
     )
 
-    kpis = compute_kpis(current_month_data, yoy_month_data)
-    return filtered_sales, kpis
+    view = freeze(_filters)
+
+    # one-row frame, so the KPIs can be snapshotted with the other summaries
+    kpis = (
+        await snapshot.collect(
+            query_runner,
+            "kpis",
+            lambda: pl.DataFrame(
+                [sales_report.compare(current_month_data, yoy_month_data)]
+            ),
+            view=view,
+        )
+    ).row(0, named=True)
+    return filtered_sales, kpis, selections, view
 
 
 @app.cell
@@ -303,8 +309,8 @@ def _(kpis):
         label="Revenue by Month",
         bordered=True,
         value="$" + human_format(kpis["revenue"]),
-        caption=f"{kpis['pct_delta_rev']:.1%} change Y-o-Y",
-        direction="increase" if kpis['pct_delta_rev'] > 0 else "decrease"    
+        caption=f"{kpis['pct_delta_revenue']:.1%} change Y-o-Y",
+        direction="increase" if kpis['pct_delta_revenue'] > 0 else "decrease"    
     )
 
     monthly_profit = mo.stat(
@@ -324,15 +330,21 @@ def _(kpis):
 
 
 @app.cell
-def _(filtered_sales):
-    monthly_summary = (
-        filtered_sales
-        .group_by("Start_Month")
-        .agg(
-            Orders=pl.len(),
-            Revenue=pl.col("Revenue").sum(),
-            Profit=pl.col("Profit").sum()
-        ).collect()
+async def _(filtered_sales, sales_report, snapshot, view):
+    monthly_summary = await snapshot.collect(
+        query_runner,
+        "monthly_summary",
+        lambda: sales_report.summarize(
+            filtered_sales,
+            by="Start_Month",
+            measures={
+                "Orders": "count(*)",
+                "Revenue": "sum(Revenue)",
+                "Profit": "sum(Profit)",
+            },
+            order_by="Start_Month",
+        ),
+        view=view,
     )
     return (monthly_summary,)
 
@@ -390,13 +402,12 @@ def _(monthly_summary):
 
 
 @app.cell
-def _(sales):
-    total_order_by_prod_cat = (
-        sales
-        .group_by("Product_Category")
-        .agg(
-            pl.col("Units").len()
-        ).collect()
+def _(sales, sales_report, snapshot):
+    total_order_by_prod_cat = snapshot.get(
+        "orders_by_category",
+        lambda: sales_report.summarize(
+            sales, by="Product_Category", measures={"Units": "count(*)"}
+        ),
     )
 
     product_category_chart = mo.ui.altair_chart(
@@ -427,5 +438,43 @@ def _(monthly_summary):
     return
 
 
+@app.cell(hide_code=True)
+def _():
+    export_format = mo.ui.dropdown(["parquet", "csv"], value="parquet", label="Format")
+    export_button = mo.ui.run_button(label="Export filtered sales")
+    mo.hstack([export_format, export_button], justify="start")
+    return export_button, export_format
+
+
+@app.cell(hide_code=True)
+def _(
+    export_button,
+    export_format,
+    model_sales,
+    sales_facts,
+    selections,
+    snapshot,
+):
+    mo.stop(not export_button.value)
+
+    # the facts are modeled and filtered 100k rows at a time, each chunk streamed
+    # to its own part; an interrupted export picks up at the first unfinished part
+    sales_export = ChunkedExport(
+        "toy-store-kpi-report/filtered_sales",
+        view=selections,
+        source_key=snapshot.key,
+        format=export_format.value,
+    )
+    _chunks = frame_chunks(sales_facts, rows=100_000)
+    with mo.status.progress_bar(total=len(_chunks), title="Exporting sales") as _bar:
+        sales_export.run(
+            _chunks,
+            lambda chunk: backend.filter(model_sales(chunk), selections),
+            on_part=lambda index, rows: _bar.update(),
+        )
+    mo.md(f"Exported {sales_export.rows:,} sales to `{sales_export.dir}`")
+    return
+
+
 if __name__ == "__main__":
     app.run()
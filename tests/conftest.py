@@ -0,0 +1,161 @@
+"""Scan tracing for the query-plan tests.
+
+Every ``pl.scan_parquet`` of a single file is replaced by an IO source
+that reads the file with the columns and predicate Polars pushed down to it
+and records, in ``ScanTrace.reads``, the columns read, the columns the
+predicate refers to and the rows it kept. The reports are loaded once, under
+the tracer, by running their marimo apps; the tests then refresh them and
+inspect what was read. ``ScanTrace.plans`` keeps the optimized plan of
+every query run through ``pl.collect_all``, which ``PolarsBackend.aggregate``
+uses. The parquet cache, snapshots and exports the apps write go to a
+temporary directory instead of the repo's ``.parquet-cache``.
+"""
+
+import importlib.util
+import os
+import re
+from dataclasses import dataclass, field
+from pathlib import Path
+
+import polars as pl
+import pytest
+from polars.io.plugins import register_io_source
+
+# the plans are those of the Polars engine
+os.environ["MAVEN_BACKEND"] = "polars"
+
+from maven_analytics import delays, export, ingest, snapshot, toys  # noqa: E402
+from maven_analytics.ingest import PORTFOLIO, REPO_ROOT  # noqa: E402
+
+# every path the apps write under, by module
+CACHE_PATHS = {
+    ingest: ["CACHE_DIR", "MANIFEST_PATH"],
+    snapshot: ["SNAPSHOT_DIR"],
+    toys: ["KEYED_SALES_DIR"],
+    delays: ["HISTOGRAMS_DIR"],
+    export: ["EXPORT_DIR"],
+}
+
+
+@dataclass(frozen=True)
+class Read:
+    file: str
+    columns: frozenset[str]
+    predicate: frozenset[str] | None
+    rows: int
+
+
+@dataclass
+class ScanTrace:
+    reads: list[Read] = field(default_factory=list)
+    plans: list[str] = field(default_factory=list)
+
+    def clear(self) -> None:
+        self.reads.clear()
+        self.plans.clear()
+
+    def of(self, file: str) -> list[Read]:
+        return [read for read in self.reads if read.file == file]
+
+    def counts(self) -> dict[str, int]:
+        counts = {}
+        for read in self.reads:
+            counts[read.file] = counts.get(read.file, 0) + 1
+        return counts
+
+
+def frame_projections(plan: str) -> list[set[str] | None]:
+    """Columns projected from each in-memory frame of ``plan``; None is all."""
+    projections = []
+    for line in plan.splitlines():
+        if match := re.search(r"\bDF \[.*\]; PROJECT(\[.*\]|\*)", line):
+            projected = match.group(1)
+            projections.append(
+                None if projected == "*" else set(re.findall(r'"([^"]+)"', projected))
+            )
+    return projections
+
+
+def _traced_scan(scan_parquet, trace: ScanTrace):
+    def scan(source, *args, **kwargs):
+        path = Path(source) if isinstance(source, (str, Path)) else None
+        if path is None or args or kwargs or not path.is_file():
+            return scan_parquet(source, *args, **kwargs)
+        schema = pl.read_parquet_schema(path)
+
+        def read(with_columns, predicate, n_rows, batch_size):
+            frame = scan_parquet(path)
+            if with_columns is not None:
+                frame = frame.select(with_columns)
+            if predicate is not None:
+                frame = frame.filter(predicate)
+            if n_rows is not None:
+                frame = frame.head(n_rows)
+            frame = frame.collect()
+            trace.reads.append(
+                Read(
+                    path.name,
+                    frozenset(schema if with_columns is None else with_columns),
+                    None
+                    if predicate is None
+                    else frozenset(predicate.meta.root_names()),
+                    frame.height,
+                )
+            )
+            yield frame
+
+        return register_io_source(read, schema=schema, is_pure=True)
+
+    return scan
+
+
+def _traced_collect_all(collect_all, trace: ScanTrace):
+    def collect(frames, *args, **kwargs):
+        frames = list(frames)
+        trace.plans.extend(frame.explain() for frame in frames)
+        return collect_all(frames, *args, **kwargs)
+
+    return collect
+
+
+@pytest.fixture(scope="session")
+def scan_trace(tmp_path_factory):
+    trace = ScanTrace()
+    cache_dir = tmp_path_factory.mktemp("parquet-cache")
+    repo_cache = ingest.CACHE_DIR
+    with pytest.MonkeyPatch.context() as patch:
+        for module, names in CACHE_PATHS.items():
+            for name in names:
+                path = getattr(module, name)
+                patch.setattr(
+                    module, name, cache_dir / path.relative_to(repo_cache)
+                )
+        patch.chdir(REPO_ROOT)  # the apps read their data by relative path
+        patch.setattr(pl, "scan_parquet", _traced_scan(pl.scan_parquet, trace))
+        patch.setattr(pl, "collect_all", _traced_collect_all(pl.collect_all, trace))
+        yield trace
+
+
+@pytest.fixture
+def trace(scan_trace):
+    scan_trace.clear()
+    return scan_trace
+
+
+def _run_app(name: str) -> dict:
+    path = PORTFOLIO / name / f"{name}.py"
+    spec = importlib.util.spec_from_file_location(name.replace("-", "_"), path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    _, defs = module.app.run()
+    return defs
+
+
+@pytest.fixture(scope="session")
+def toy_report(scan_trace):
+    return _run_app("toy-store-kpi-report")
+
+
+@pytest.fixture(scope="session")
+def airline_report(scan_trace):
+    return _run_app("airline-flight-delay-report")
@@ -0,0 +1,94 @@
+"""City partitions of the listings and the price cube against direct aggregates."""
+
+import datetime as dt
+
+import numpy as np
+import polars as pl
+import pytest
+from polars.testing import assert_frame_equal
+
+from maven_analytics import airbnb
+
+
+@pytest.fixture(scope="module")
+def listings(tmp_path_factory):
+    rng = np.random.default_rng(0)
+    rows = 5_000
+    frame = pl.DataFrame(
+        {
+            "listing_id": np.arange(rows),
+            "city": rng.choice(["Paris", "Rome", "Sydney", "New York"], rows),
+            "neighbourhood": rng.choice([f"n{i}" for i in range(12)], rows),
+            "accommodates": rng.integers(1, 9, rows),
+            "host_since": [
+                None if i % 50 == 0 else dt.date(2010, 1, 1) + dt.timedelta(days=int(d))
+                for i, d in enumerate(rng.integers(0, 4_000, rows))
+            ],
+            "price": [
+                None if i % 17 == 0 else float(p)
+                for i, p in enumerate(rng.integers(20, 900, rows))
+            ],
+        }
+    )
+    path = tmp_path_factory.mktemp("airbnb") / "Listings.parquet"
+    frame.write_parquet(path)
+    return path
+
+
+def test_partitions_round_trip(listings, tmp_path):
+    target = airbnb.partition_listings(listings, tmp_path / "listings")
+    assert sorted(path.name for path in target.iterdir()) == [
+        "city=New York",
+        "city=Paris",
+        "city=Rome",
+        "city=Sydney",
+        "manifest.json",
+    ]
+    scanned = pl.scan_parquet(target / "**/*.parquet", hive_partitioning=True).collect()
+    source = pl.read_parquet(listings)
+    assert_frame_equal(
+        scanned.select(source.columns).sort("listing_id"),
+        source.sort("listing_id"),
+    )
+    # each partition is sorted by neighbourhood, for the row-group statistics
+    paris = pl.read_parquet(target / "city=Paris" / "part-0.parquet")
+    assert paris.get_column("neighbourhood").is_sorted()
+
+
+def test_unchanged_source_is_not_rewritten(listings, tmp_path):
+    target = airbnb.partition_listings(listings, tmp_path / "listings")
+    part = target / "city=Rome" / "part-0.parquet"
+    written = part.stat().st_mtime_ns
+    airbnb.partition_listings(listings, target)
+    assert part.stat().st_mtime_ns == written
+    airbnb.partition_listings(listings, target, force=True)
+    assert part.stat().st_mtime_ns != written
+
+
+def test_price_cube_matches_group_by(listings, tmp_path):
+    target = airbnb.partition_listings(listings, tmp_path / "listings")
+    scan = pl.scan_parquet(target / "**/*.parquet", hive_partitioning=True)
+    keys = airbnb.CUBE_KEYS
+    cube = airbnb.price_cube(scan).collect().sort(keys, nulls_last=True)
+    expected = (
+        pl.read_parquet(listings)
+        .group_by("city", "neighbourhood", "accommodates", year=pl.col("host_since").dt.year())
+        .agg(
+            listings=pl.len(),
+            priced=pl.col("price").is_not_null().sum().cast(pl.UInt32),
+            price_sum=pl.col("price").sum(),
+        )
+        .sort(keys, nulls_last=True)
+    )
+    assert_frame_equal(cube, expected, check_dtypes=False)
+
+    report = airbnb.price_report(cube)
+    neighbourhood = (
+        pl.read_parquet(listings)
+        .group_by("city", "neighbourhood")
+        .agg(avg_price=pl.col("price").mean())
+    )
+    assert_frame_equal(
+        report["neighbourhood"].sort("city", "neighbourhood"),
+        neighbourhood.sort("city", "neighbourhood"),
+    )
@@ -0,0 +1,53 @@
+"""Supersession and cancellation of the background query runner."""
+
+import asyncio
+import threading
+
+import pytest
+
+from maven_analytics.async_query import QueryRunner
+from maven_analytics.serving import WorkerPool
+
+
+@pytest.fixture
+def busy_pool():
+    """A one-worker pool whose worker is held until the gate is set."""
+    pool = WorkerPool(max_workers=1, max_pending=4)
+    gate = threading.Event()
+    pool.submit(gate.wait)
+    yield pool, gate
+    gate.set()
+    pool.shutdown()
+
+
+def test_superseded_query_returns_last_good_result(busy_pool):
+    pool, gate = busy_pool
+    runner = QueryRunner(pool)
+    runner._last_good["k"] = "old"
+
+    async def main():
+        first = asyncio.create_task(runner.collect("k", lambda: "first"))
+        await asyncio.sleep(0.01)
+        second = asyncio.create_task(runner.collect("k", lambda: "second"))
+        await asyncio.sleep(0.01)
+        gate.set()
+        return await first, await second
+
+    assert asyncio.run(main()) == ("old", "second")
+    assert runner.latest("k") == "second"
+
+
+def test_cancelled_await_propagates(busy_pool):
+    pool, gate = busy_pool
+    runner = QueryRunner(pool)
+    runner._last_good["k"] = "old"
+
+    async def main():
+        task = asyncio.create_task(runner.collect("k", lambda: "new"))
+        await asyncio.sleep(0.01)
+        task.cancel()
+        gate.set()
+        await task
+
+    with pytest.raises(asyncio.CancelledError):
+        asyncio.run(main())
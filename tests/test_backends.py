@@ -0,0 +1,78 @@
+"""DuckDB backend queries against the Polars backend, and its view bookkeeping."""
+
+import polars as pl
+import pytest
+
+from maven_analytics.backends import DuckDBBackend, PolarsBackend
+
+pytest.importorskip("duckdb")
+
+MEASURES = {"units": "sum(Units)", "rows": "count(*)"}
+
+
+@pytest.fixture
+def duckdb_backend(tmp_path):
+    return DuckDBBackend(temp_directory=tmp_path / "spill")
+
+
+@pytest.fixture
+def tables():
+    sales = pl.DataFrame(
+        {"Product_ID": [1, 2, 1, 3, 2], "Units": [5, 1, 2, 7, 3], "Date_Key": [0, 1, 1, 2, 0]}
+    )
+    products = pl.DataFrame({"Product_ID": [1, 2, 3], "Category": ["Toys", "Games", "Toys"]})
+    calendar = pl.DataFrame({"Month": ["2022-01", "2022-01", "2022-02"]})
+    return sales, products, calendar
+
+
+def model(backend, sales, products, calendar):
+    modeled = backend.sql(
+        """
+        SELECT s.*, p.Category
+        FROM sales AS s LEFT JOIN products AS p ON s.Product_ID = p.Product_ID
+        """,
+        sales=backend.from_polars(sales),
+        products=backend.from_polars(products),
+    )
+    return backend.lookup(modeled, calendar.with_row_index("Date_Key"), "Date_Key", ["Month"])
+
+
+def views(backend: DuckDBBackend) -> list:
+    return backend.connection.sql(
+        "SELECT view_name FROM duckdb_views() WHERE NOT internal"
+    ).fetchall()
+
+
+def test_models_match_the_polars_backend(duckdb_backend, tables):
+    results = []
+    for backend in [PolarsBackend(), duckdb_backend]:
+        sales = model(backend, *tables)
+        toys = backend.filter(sales, (("Category", "Toys"), ("Month", ("2022-01", "2022-02"))))
+        (grouped,) = backend.aggregate([backend.where(toys, "Units > 1")], ["Month"], MEASURES)
+        results.append(
+            (
+                grouped.sort("Month").cast({"units": pl.Int64, "rows": pl.Int64}),
+                backend.distinct(sales, "Category"),
+                backend.collect(sales, ["Product_ID", "Units"]).sort("Product_ID", "Units"),
+            )
+        )
+    for polars_frame, duckdb_frame in zip(*results):
+        assert duckdb_frame.equals(polars_frame)
+
+
+def test_models_over_different_inputs_stay_independent(duckdb_backend, tables):
+    sales, products, calendar = tables
+    first = model(duckdb_backend, sales, products, calendar)
+    second = model(duckdb_backend, sales.head(2), products, calendar)
+    # the first model still reads its own sales after the second is built
+    counts = duckdb_backend.aggregate([first, second], [], {"rows": "count(*)"})
+    assert [frame.item() for frame in counts] == [5, 2]
+
+
+def test_no_views_are_left_on_the_connection(duckdb_backend, tables, tmp_path):
+    sales = model(duckdb_backend, *tables)
+    assert views(duckdb_backend) == []
+    duckdb_backend.aggregate([sales], ["Category"], MEASURES)
+    duckdb_backend.sink(sales, tmp_path / "sales.parquet", "parquet")
+    assert views(duckdb_backend) == []
+    assert pl.read_parquet(tmp_path / "sales.parquet").height == 5
@@ -0,0 +1,89 @@
+"""Item pair counts of the sparse basket matrix against a self-join of the lines."""
+
+import numpy as np
+import polars as pl
+import pytest
+
+from maven_analytics.baskets import basket_stats, pair_table, top_pairs
+
+
+@pytest.fixture(scope="module")
+def order_items():
+    rng = np.random.default_rng(0)
+    rows = 20_000
+    return pl.DataFrame(
+        {
+            # unsorted, with repeated lines and a few missing items
+            "order_id": rng.integers(0, 4_000, rows),
+            "item_name": rng.choice([f"item {i}" for i in range(30)], rows).tolist(),
+        }
+    ).with_columns(
+        pl.when(pl.int_range(pl.len()) % 97 != 0).then("item_name").alias("item_name")
+    )
+
+
+def joined_pairs(order_items: pl.DataFrame) -> pl.DataFrame:
+    lines = order_items.drop_nulls().unique()
+    orders = lines.get_column("order_id").n_unique()
+    item_orders = lines.group_by("item_name").len("item_orders")
+    return (
+        lines.join(lines, on="order_id", suffix="_other")
+        .filter(pl.col("item_name") != pl.col("item_name_other"))
+        .group_by("item_name", other_item_name="item_name_other")
+        .agg(orders=pl.len().cast(pl.Int64))
+        .join(item_orders, on="item_name")
+        .join(item_orders, left_on="other_item_name", right_on="item_name", suffix="_other")
+        .with_columns(
+            support=pl.col("orders") / orders,
+            confidence=pl.col("orders") / pl.col("item_orders"),
+            lift=pl.col("orders")
+            * orders
+            / (pl.col("item_orders") * pl.col("item_orders_other")),
+        )
+        .select("item_name", "other_item_name", "orders", "support", "confidence", "lift")
+        .sort("item_name", "other_item_name")
+    )
+
+
+@pytest.mark.parametrize("chunk_orders", [50, 333, 100_000])
+def test_pair_table_matches_self_join(order_items, chunk_orders):
+    stats = basket_stats(order_items, item="item_name", chunk_orders=chunk_orders)
+    pairs = pair_table(stats).sort("item_name", "other_item_name")
+    expected = joined_pairs(order_items)
+    assert pairs.select("item_name", "other_item_name", "orders").equals(
+        expected.select("item_name", "other_item_name", "orders")
+    )
+    for measure in ["support", "confidence", "lift"]:
+        np.testing.assert_allclose(pairs[measure], expected[measure])
+
+    lines = order_items.drop_nulls().unique()
+    assert stats.orders == lines.get_column("order_id").n_unique()
+    assert stats.item_orders.tolist() == (
+        lines.group_by("item_name").len().sort("item_name").get_column("len").to_list()
+    )
+
+
+def test_min_orders_and_top_pairs(order_items):
+    stats = basket_stats(order_items, item="item_name")
+    common = pair_table(stats, min_orders=50)
+    assert common.get_column("orders").min() >= 50
+
+    top = top_pairs(stats, k=3, min_orders=50)
+    assert top.group_by("item_name").len().get_column("len").max() <= 3
+    best = common.sort("lift", descending=True).group_by("item_name").first()
+    assert top.group_by("item_name").agg(pl.col("lift").max()).sort("item_name").equals(
+        best.select("item_name", "lift").sort("item_name")
+    )
+
+
+def test_scan_with_gaps_in_the_order_ids(order_items, tmp_path):
+    # ids spread over a range much wider than the orders, so most chunks are empty
+    path = tmp_path / "order_items.parquet"
+    order_items.with_columns(pl.col("order_id") * 37 + 5).sort("order_id").write_parquet(
+        path, row_group_size=1_000
+    )
+    stats = basket_stats(pl.scan_parquet(path), item="item_name", chunk_orders=10_000)
+    expected = basket_stats(order_items, item="item_name")
+    assert stats.orders == expected.orders
+    assert (stats.pair_orders != expected.pair_orders).nnz == 0
+    assert stats.item_orders.tolist() == expected.item_orders.tolist()
@@ -0,0 +1,71 @@
+"""Bitmap-index summaries against the same counts computed by Polars."""
+
+import numpy as np
+import polars as pl
+import pytest
+
+from maven_analytics.bitmaps import BitmapIndex, is_rows
+
+MEASURES = {"total": {}, "delayed": {"Status": "Delayed"}}
+
+
+@pytest.fixture(scope="module")
+def flights():
+    rng = np.random.default_rng(0)
+    rows = 50_000
+    return pl.DataFrame(
+        {
+            # a long tail of rare cities, as in the flights data
+            "CITY": rng.zipf(1.5, rows).clip(max=400).astype(str),
+            "MONTH": rng.integers(1, 13, rows),
+            "Status": rng.choice(["On-Time", "Delayed", "Canceled", None], rows).tolist(),
+        }
+    )
+
+
+def expected(frame: pl.DataFrame, by: str | None) -> pl.DataFrame:
+    measures = dict(total=pl.len(), delayed=(pl.col("Status") == "Delayed").sum())
+    if by is None:
+        return frame.select(**measures).cast(pl.Int64)
+    return (
+        frame.group_by(by)
+        .agg(**measures)
+        .with_columns(pl.col("total", "delayed").cast(pl.Int64))
+        .sort(by)
+    )
+
+
+def test_rare_values_are_stored_as_rows(flights):
+    index = BitmapIndex.build(flights)
+    containers = {
+        column: [is_rows(bitmap) for bitmap in values.values()]
+        for column, values in index.bitmaps.items()
+    }
+    assert any(containers["CITY"]) and not all(containers["CITY"])
+    assert not any(containers["MONTH"])
+    assert index.nbytes < len(index.bitmaps["CITY"]) * flights.height // 8
+
+
+@pytest.mark.parametrize("by", [None, "MONTH", "CITY"])
+@pytest.mark.parametrize(
+    "selections",
+    [
+        (),
+        (("CITY", ("1", "7", "250")),),
+        (("CITY", ("1", "399")), ("MONTH", (1, 2, 3))),
+        (("Status", None),),
+    ],
+)
+def test_summaries_match_polars(flights, by, selections):
+    index = BitmapIndex.build(flights)
+    summary = index.summarize(index.mask(selections), by, MEASURES)
+
+    filtered = flights
+    for column, value in selections:
+        values = value if isinstance(value, tuple) else (value,)
+        filtered = filtered.filter(
+            pl.col(column).is_null() if value is None else pl.col(column).is_in(values)
+        )
+    if by is not None:
+        summary = summary.sort(by)
+    assert summary.equals(expected(filtered, by))
@@ -0,0 +1,33 @@
+"""Choice of the cluster count from a k/seed silhouette sweep."""
+
+import warnings
+
+import polars as pl
+import pytest
+
+from maven_analytics.candy import best_k
+
+
+def sweep(silhouettes: dict[int, list[float]]) -> pl.DataFrame:
+    return pl.DataFrame(
+        [
+            (k, seed, 0.0, silhouette)
+            for k, scores in silhouettes.items()
+            for seed, silhouette in enumerate(scores)
+        ],
+        schema=["k", "seed", "inertia", "silhouette"],
+        orient="row",
+    )
+
+
+def test_best_k_has_the_highest_mean_silhouette():
+    scores = {2: [0.5, 0.5], 3: [0.7, 0.5], 4: [0.6, 0.7], 5: [0.4, None]}
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        assert best_k(sweep(scores)) == 4
+
+
+def test_best_k_at_the_top_of_the_range_warns():
+    scores = {2: [0.5, 0.5], 3: [0.6, 0.6], 4: [0.7, 0.8]}
+    with pytest.warns(UserWarning, match="k=4, the largest k swept"):
+        assert best_k(sweep(scores)) == 4
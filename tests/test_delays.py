@@ -0,0 +1,75 @@
+"""Delay histograms: merged counts and percentiles against the raw delays."""
+
+import numpy as np
+import polars as pl
+import pytest
+
+from maven_analytics import delays
+
+
+@pytest.fixture(scope="module")
+def flights():
+    rng = np.random.default_rng(0)
+    rows = 20_000
+    delay = np.round(rng.gamma(1.5, 25, rows) - 20).astype(float)
+    delay[rng.random(rows) < 0.02] = np.nan  # cancelled
+    delay[:3] = [-75, 1500, 1440]  # beyond the outer edges, and on the last one
+    return pl.DataFrame(
+        {
+            "MONTH": rng.integers(1, 13, rows),
+            "DAY_OF_WEEK": rng.integers(1, 8, rows),
+            "AIRLINE": rng.choice(["AA", "DL", "UA"], rows),
+            "ORIGIN_AIRPORT": rng.choice(["ATL", "JFK", "LAX", "ORD"], rows),
+            "DEPARTURE_DELAY": delay,
+        }
+    )
+
+
+def bin_width(delay: float) -> float:
+    edges = np.asarray(delays.DELAY_EDGES)
+    index = np.searchsorted(edges, delay, side="right")
+    return float(edges[min(index, len(edges) - 1)] - edges[max(index - 1, 0)])
+
+
+def test_merged_partitions_match_one_histogram(flights):
+    histograms = delays.build_histograms(flights.lazy()).collect()
+    halves = pl.concat(
+        delays.build_histograms(half.lazy()).collect()
+        for half in [flights.head(12_345), flights.tail(flights.height - 12_345)]
+    )
+    assert delays.merge(halves, ["AIRLINE"]).equals(delays.merge(histograms, ["AIRLINE"]))
+
+    merged = delays.merge(histograms)
+    # cancelled flights are not counted
+    delayed = flights.get_column("DEPARTURE_DELAY").is_not_nan().sum()
+    assert merged.get_column("count").sum() == delayed
+    assert merged.get_column("bin").to_list()[0] == 0
+    assert merged.get_column("bin").to_list()[-1] == len(delays.DELAY_EDGES)
+
+
+def test_percentiles_are_within_their_bin_width(flights):
+    histograms = delays.build_histograms(flights.lazy()).collect()
+    qs = [0.05, 0.25, 0.5, 0.9, 0.99]
+    result = delays.quantiles(histograms, qs, by=["AIRLINE"])
+    for airline, q, delay in result.iter_rows():
+        values = (
+            flights.filter(pl.col("AIRLINE") == airline, pl.col("DEPARTURE_DELAY").is_not_nan())
+            .get_column("DEPARTURE_DELAY")
+            .to_numpy()
+        )
+        expected = np.percentile(values, q * 100, method="inverted_cdf")
+        assert abs(delay - expected) <= bin_width(expected)
+
+
+def test_histograms_are_cached_until_the_flights_change(flights, tmp_path):
+    source = tmp_path / "flights.parquet"
+    flights.write_parquet(source)
+    target = tmp_path / "histograms"
+    first = delays.load_histograms(source, target)
+    written = (target / "histograms.parquet").stat().st_mtime_ns
+    assert delays.load_histograms(source, target).equals(first)
+    assert (target / "histograms.parquet").stat().st_mtime_ns == written
+
+    flights.head(1_000).write_parquet(source)
+    changed = delays.load_histograms(source, target)
+    assert changed.get_column("count").sum() < first.get_column("count").sum()
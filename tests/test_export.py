@@ -0,0 +1,62 @@
+"""Resuming an interrupted chunked export."""
+
+import polars as pl
+import pytest
+
+from maven_analytics.backends import PolarsBackend
+from maven_analytics.export import ChunkedExport, frame_chunks
+
+
+class Interrupted(Exception):
+    pass
+
+
+@pytest.fixture
+def sales():
+    return pl.DataFrame({"id": range(1_000), "store": ["a", "b", "c", "d"] * 250})
+
+
+def query(chunk: pl.DataFrame) -> pl.LazyFrame:
+    return chunk.lazy().filter(pl.col("store") != "b")
+
+
+def stop_after(index: int):
+    def on_part(part: int, rows: int) -> None:
+        if part == index:
+            raise Interrupted
+
+    return on_part
+
+
+@pytest.mark.parametrize("format", ["parquet", "csv"])
+def test_interrupted_export_resumes_from_the_next_chunk(sales, tmp_path, format):
+    chunks = frame_chunks(sales, rows=300)
+    export = ChunkedExport("sales", (("store", "b"),), "key", format=format, root=tmp_path)
+    with pytest.raises(Interrupted):
+        export.run(chunks, query, PolarsBackend(), on_part=stop_after(1))
+    assert not export.complete
+    assert export.rows == 450
+    written = export.part(0).stat().st_mtime_ns
+
+    resumed = []
+    parts = export.run(
+        chunks, query, PolarsBackend(), on_part=lambda index, rows: resumed.append(index)
+    )
+    assert resumed == [2, 3]
+    assert export.complete
+    assert export.part(0).stat().st_mtime_ns == written
+
+    read = pl.read_csv if format == "csv" else pl.read_parquet
+    assert pl.concat([read(part) for part in parts]).equals(query(sales).collect())
+    assert export.rows == 750
+
+
+def test_changed_view_or_chunking_does_not_reuse_parts(sales, tmp_path):
+    chunks = frame_chunks(sales, rows=300)
+    export = ChunkedExport("sales", (("store", "b"),), "key", root=tmp_path)
+    export.run(chunks, query, PolarsBackend())
+
+    other = ChunkedExport("sales", (("store", "c"),), "key", root=tmp_path)
+    assert other.dir != export.dir and other.rows == 0
+    with pytest.raises(ValueError):
+        export.run(frame_chunks(sales, rows=500), query, PolarsBackend())
@@ -0,0 +1,102 @@
+"""Conversion of the source CSVs: typed parsing and checksum-skipped rebuilds."""
+
+import datetime as dt
+
+import polars as pl
+import pytest
+
+from maven_analytics import ingest
+from maven_analytics.ingest import DATASETS, Dataset
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    cache_dir = tmp_path / "cache"
+    monkeypatch.setattr(ingest, "CACHE_DIR", cache_dir)
+    monkeypatch.setattr(ingest, "MANIFEST_PATH", cache_dir / "manifest.json")
+    return cache_dir
+
+
+@pytest.fixture
+def sales(tmp_path, cache, monkeypatch):
+    source = tmp_path / "sales.csv"
+    source.write_text("date,store,sales\n2024-01-02,a,1.5\n2024-01-03,b,2.0\n")
+    dataset = Dataset(
+        "drill/sales", source, {"date": pl.Date, "store": pl.String, "sales": pl.Float64}
+    )
+    monkeypatch.setitem(DATASETS, dataset.name, dataset)
+    return dataset
+
+
+def test_unchanged_source_is_not_converted_again(sales):
+    target = ingest.convert(sales.name)
+    written = target.stat().st_mtime_ns
+
+    assert ingest.convert(sales.name) == target
+    assert target.stat().st_mtime_ns == written
+    assert not list(target.parent.glob("*.tmp"))
+
+    with sales.source.open("a") as file:
+        file.write("2024-01-04,a,3.0\n")
+    assert ingest.read(sales.name).height == 3
+    assert target.stat().st_mtime_ns != written
+
+
+def test_changed_schema_converts_again(sales, monkeypatch):
+    ingest.convert(sales.name)
+    retyped = Dataset(sales.name, sales.source, {**sales.schema, "sales": pl.Float32})
+    monkeypatch.setitem(DATASETS, sales.name, retyped)
+
+    assert ingest.read(sales.name).schema["sales"] == pl.Float32
+
+
+def test_manifest_records_each_conversion(sales, cache):
+    ingest.convert(sales.name)
+    manifest = ingest._read_manifest()
+    assert manifest[sales.name]["sha256"] == ingest.checksum(sales.source)
+    assert not (cache / "manifest.json.tmp").exists()
+
+
+def test_order_details_parse_dates_times_and_nulls(tmp_path):
+    source = tmp_path / "order_details.csv"
+    source.write_text(
+        "﻿order_details_id,order_id,order_date,order_time,item_id\n"
+        "1,1,1/1/23,11:38:36 AM,109\n"
+        "2,2,12/31/23,6:41:01 PM,NULL\n"
+    )
+    details = DATASETS["restaurant-order-analysis/order_details"]
+    frame = details.scan_source(source).collect()
+
+    assert frame.schema == pl.Schema(details.schema)
+    assert frame.get_column("order_date").to_list() == [
+        dt.date(2023, 1, 1),
+        dt.date(2023, 12, 31),
+    ]
+    assert frame.get_column("order_time").to_list() == [
+        dt.time(11, 38, 36),
+        dt.time(18, 41, 1),
+    ]
+    assert frame.get_column("item_id").to_list() == [109, None]
+
+
+def test_currency_columns_are_parsed(tmp_path):
+    source = tmp_path / "products.csv"
+    source.write_text(
+        "Product_ID,Product_Name,Product_Category,Product_Cost,Product_Price\n"
+        "1,Action Figure,Toys,$9.99 ,$15.99 \n"
+        "2,Lego Bricks,Toys,$34.99 ,$39.99\n"
+    )
+    frame = DATASETS["toy-store-kpi-report/products"].scan_source(source).collect()
+    assert frame.get_column("Product_Cost").to_list() == [9.99, 34.99]
+    assert frame.get_column("Product_Price").to_list() == [15.99, 39.99]
+
+
+def test_partial_schema_keeps_undeclared_columns(tmp_path):
+    source = tmp_path / "coffee_shop_sales.csv"
+    source.write_text("date,store,sales,units\n2024-01-02,a,1.5,3\n")
+    frame = (
+        DATASETS["rolling-up-looking-back/coffee_shop_sales"].scan_source(source).collect()
+    )
+    assert frame.columns == ["date", "store", "sales", "units"]
+    assert frame.schema["date"] == pl.Date
+    assert frame.schema["units"] == pl.Int64
@@ -0,0 +1,103 @@
+"""The native pandas and Polars drill kernels against the generic narwhals version."""
+
+import datetime as dt
+
+import numpy as np
+import pandas as pd
+import polars as pl
+import pytest
+from polars.testing import assert_frame_equal
+
+from maven_analytics import kernels
+
+
+@pytest.fixture(scope="module")
+def rng():
+    return np.random.default_rng(0)
+
+
+@pytest.fixture(scope="module")
+def events(rng):
+    rows = 5_000
+    # several events on most days of a user
+    return pl.DataFrame(
+        {
+            "user_id": rng.integers(0, 100, rows),
+            "date": pl.Series(
+                np.datetime64("2025-01-01") + rng.integers(0, 60, rows).astype("timedelta64[D]")
+            ),
+        }
+    ).with_columns(user_name=pl.format("user {}", "user_id"))
+
+
+@pytest.fixture(scope="module")
+def named_events(events):
+    return events.with_columns(user_id="user_name")
+
+
+@pytest.fixture(scope="module")
+def prices(rng):
+    return pl.DataFrame({"Close": 100 + np.cumsum(rng.normal(0, 1, 1_000))})
+
+
+@pytest.fixture(scope="module")
+def transactions(rng):
+    rows = 5_000
+    return pl.DataFrame(
+        {
+            "store": rng.choice(["a", "b", "c"], rows),
+            "date": pl.Series(
+                np.datetime64("2024-01-01") + rng.integers(0, 700, rows).astype("timedelta64[D]")
+            ),
+            "sales": rng.integers(1, 1_000, rows) / 10,
+        }
+    )
+
+
+def as_polars(result) -> pl.DataFrame:
+    if isinstance(result, pd.DataFrame):
+        result = pl.from_pandas(result)
+    if isinstance(result, pl.LazyFrame):
+        result = result.collect()
+    return result.with_columns(pl.selectors.datetime().cast(pl.Date))
+
+
+CASES = [
+    ("daily_streaks", "events", {}),
+    ("daily_streaks", "named_events", {}),
+    ("golden_crosses", "prices", {"short": 5, "long": 20}),
+    ("monthly_diffs", "transactions", {}),
+]
+
+
+@pytest.mark.parametrize("kernel, data, kwargs", CASES)
+@pytest.mark.parametrize("library", ["polars", "lazy", "pandas"])
+def test_native_paths_match_generic(kernel, data, kwargs, library, request):
+    frame = request.getfixturevalue(data)
+    native = {"polars": frame, "lazy": frame.lazy(), "pandas": frame.to_pandas()}[library]
+    run = getattr(kernels, kernel)
+
+    result = run(native, **kwargs)
+    assert type(result) is type(native)
+    assert_frame_equal(
+        as_polars(result), as_polars(run(frame, native=False, **kwargs)), check_exact=False
+    )
+
+
+def test_native_streaks_keep_the_first_event_of_a_day():
+    events = pl.DataFrame(
+        {
+            "user_id": ["b", "a", "a", "b"],
+            "user_name": ["x", "first", "second", "y"],
+            "date": [
+                dt.datetime(2025, 1, 1, 9),
+                dt.datetime(2025, 1, 1, 8),
+                dt.datetime(2025, 1, 1, 7),
+                dt.datetime(2025, 1, 2),
+            ],
+        }
+    )
+    for frame in [events, events.lazy(), events.to_pandas()]:
+        result = as_polars(kernels.daily_streaks(frame))
+        assert result.get_column("user_name").to_list() == ["first", "y"]
+        assert result.get_column("length").to_list() == [1, 2]
@@ -0,0 +1,157 @@
+"""Pushdown and scan-count regressions of the report queries.
+
+Each test refreshes a report the way its cells do and checks, per source
+file, which columns and predicates reached the scan and how many times the
+file was read. A refactor that breaks projection or predicate pushdown, or
+that scans a file once more per refresh, fails here before it shows up as
+a slower dashboard.
+"""
+
+import datetime as dt
+
+import polars as pl
+import pytest
+
+from conftest import frame_projections
+from maven_analytics import delays, serving, toys
+from maven_analytics.streaks import StreakState
+
+TOY_FILTERS = {"store_location": ["Downtown"], "product_category": ["Toys"]}
+
+
+def month_data(report: dict, ordinal: int):
+    facts = toys.month_slice(report["sales_facts"], report["calendar"], ordinal)
+    return report["sales_report"].filter(report["model_sales"](facts), **TOY_FILTERS)
+
+
+def test_toy_kpis_read_only_measure_columns(trace, toy_report):
+    month = toys.latest_month(toy_report["sales_facts"], toy_report["calendar"])
+    toy_report["sales_report"].compare(
+        month_data(toy_report, month), month_data(toy_report, month - 12)
+    )
+
+    # the facts are in memory: only the columns the measures and joins need are used
+    assert [frame_projections(plan) for plan in trace.plans] == [
+        [{"Units", "Product_ID", "Store_ID"}],
+        [{"Units", "Product_ID", "Store_ID"}],
+    ]
+    (products, _) = trace.of("products.parquet")
+    assert products.columns == {
+        "Product_ID", "Product_Price", "Product_Cost", "Product_Category"
+    }
+    assert products.predicate == {"Product_Category"}
+    (stores, _) = trace.of("stores.parquet")
+    assert stores.columns == {"Store_ID", "Store_Location"}
+    assert stores.predicate == {"Store_Location"}
+    # one read of each dimension per compared month
+    assert trace.counts() == {"products.parquet": 2, "stores.parquet": 2}
+
+
+def test_toy_monthly_summary_pushes_filters_through_calendar_lookup(trace, toy_report):
+    report = toy_report["sales_report"]
+    report.summarize(
+        report.filter(toy_report["sales"], **TOY_FILTERS),
+        by="Start_Month",
+        measures={"Orders": "count(*)", "Revenue": "sum(Revenue)"},
+    )
+
+    (plan,) = trace.plans
+    assert frame_projections(plan) == [{"Units", "Product_ID", "Store_ID", "Date_Key"}]
+    (products,) = trace.of("products.parquet")
+    assert products.columns == {"Product_ID", "Product_Price", "Product_Category"}
+    assert products.predicate == {"Product_Category"}
+    (stores,) = trace.of("stores.parquet")
+    assert stores.predicate == {"Store_Location"}
+    assert trace.counts() == {"products.parquet": 1, "stores.parquet": 1}
+
+
+def test_flight_index_reads_each_source_once(trace, airline_report):
+    key = (airline_report["snapshot"].key, "polars", "flight_index")
+    serving.drop_shared(key)
+    airline_report["flight_index"]()
+
+    (flights,) = trace.of("flights-selected.parquet")
+    assert flights.columns == {
+        "MONTH",
+        "DAY_OF_WEEK",
+        "AIRLINE",
+        "ORIGIN_AIRPORT",
+        "CANCELLED",
+        "DEPARTURE_DELAY",
+        "CANCELLATION_REASON",
+    }
+    assert flights.predicate is None
+    assert trace.of("airports.parquet")[0].columns == {"IATA_CODE", "CITY"}
+    assert trace.counts() == {
+        "flights-selected.parquet": 1,
+        "airlines.parquet": 1,
+        "airports.parquet": 1,
+        "cancellation_codes.parquet": 1,
+    }
+
+
+def test_flight_cross_filter_reads_no_files(trace, airline_report):
+    index = airline_report["flight_index"]()
+    trace.clear()
+
+    mask = index.mask((("CITY", ("Boston",)), ("DAY_OF_WEEK", (1, 2))))
+    index.summarize(mask, by="MONTH", measures=airline_report["status_counts"])
+
+    assert trace.reads == []
+
+
+def test_flight_filters_reach_each_scan(trace, airline_report):
+    report = airline_report["flight_report"]
+    report.kpis(
+        report.filter(
+            airline_report["flights"],
+            cities=["Boston"],
+            airlines=["Delta Air Lines Inc."],
+            days=[1],
+        )
+    )
+
+    (flights,) = trace.of("flights-selected.parquet")
+    assert flights.predicate == {"DAY_OF_WEEK"}
+    assert "MONTH" not in flights.columns
+    (airports,) = trace.of("airports.parquet")
+    assert airports.predicate == {"CITY"}
+    (airlines,) = trace.of("airlines.parquet")
+    assert airlines.predicate == {"AIRLINE"}
+    assert set(trace.counts().values()) == {1}
+
+
+def test_delay_histograms_read_only_delay_columns(trace):
+    delays.build_histograms(pl.scan_parquet(delays.FLIGHTS_PATH)).collect()
+
+    (flights,) = trace.reads
+    assert flights.columns == {*delays.HISTOGRAM_KEYS, "DEPARTURE_DELAY"}
+    assert flights.predicate == {"DEPARTURE_DELAY"}
+
+
+@pytest.fixture
+def lessons(tmp_path):
+    path = tmp_path / "lessons.parquet"
+    pl.DataFrame(
+        {
+            "user_id": [1, 1, 2, 1],
+            "user_name": ["a", "a", "b", "a"],
+            "date": [dt.date(2025, 9, day) for day in (1, 2, 2, 3)],
+            "lesson": ["x", "y", "x", "z"],
+        }
+    ).write_parquet(path)
+    return path
+
+
+def test_streak_refresh_reads_only_new_days(trace, lessons, tmp_path):
+    state = StreakState(lessons, tmp_path / "state")
+    state.append(pl.scan_parquet(lessons).filter(pl.col("date") <= dt.date(2025, 9, 2)))
+    trace.clear()
+
+    state.refresh()
+
+    (read,) = trace.of("lessons.parquet")
+    assert read.columns == {"user_id", "user_name", "date"}
+    assert read.predicate == {"date"}
+    # the last ingested day, where completions may have been logged since, and later
+    assert read.rows == 3
@@ -0,0 +1,37 @@
+"""Candy recommender lookups and its deferred KD-tree."""
+
+import numpy as np
+import polars as pl
+import pytest
+
+from maven_analytics.candy import FEATURES
+from maven_analytics.recommend import CandyRecommender
+
+
+@pytest.fixture
+def recommender():
+    rng = np.random.default_rng(0)
+    items = 200
+    candy = pl.DataFrame(
+        {
+            "competitorname": [f"candy {i}" for i in range(items)],
+            **{feature: rng.integers(0, 2, items) for feature in FEATURES},
+            "winpercent": rng.uniform(20, 90, items),
+        }
+    )
+    coordinates = pl.DataFrame({"pca0": rng.normal(size=items), "pca1": rng.normal(size=items)})
+    return CandyRecommender(candy, coordinates)
+
+
+def test_diverse_picks_do_not_build_the_tree(recommender):
+    picks = recommender.diverse_top_k(3)
+    assert picks.height == 3
+    assert "tree" not in vars(recommender)
+
+
+def test_similar_matches_brute_force(recommender):
+    similar = recommender.similar("candy 7", k=5)
+    distances = np.linalg.norm(recommender.coordinates - recommender.coordinates[7], axis=1)
+    expected = [f"candy {i}" for i in np.argsort(distances)[1:6]]
+    assert similar.get_column("competitorname").to_list() == expected
+    assert "tree" in vars(recommender)
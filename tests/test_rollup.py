@@ -0,0 +1,89 @@
+"""Refreshes of the persisted monthly rollup against a recompute of the whole CSV."""
+
+import datetime as dt
+
+import numpy as np
+import polars as pl
+import pytest
+from polars.testing import assert_frame_equal
+
+from maven_analytics import kernels
+from maven_analytics.rollup import MonthlyRollup
+
+START = dt.date(2024, 1, 1)
+
+
+@pytest.fixture
+def transactions():
+    rng = np.random.default_rng(0)
+    rows = 6_000
+    # in date order, as the shop appends them
+    return (
+        pl.DataFrame(
+            {
+                "offset": np.sort(rng.integers(0, 400, rows)),
+                "store": rng.choice(["Astoria", "Hell's Kitchen", "Lower Manhattan"], rows),
+                "sales": rng.integers(1, 2_000, rows) / 100,
+            }
+        )
+        .with_columns(date=pl.lit(START) + pl.duration(days="offset"))
+        .select("date", "store", "sales")
+    )
+
+
+def write_csv(path, frame: pl.DataFrame, append: bool = False) -> None:
+    with path.open("a" if append else "w") as file:
+        frame.write_csv(file, include_header=not append)
+
+
+def recompute(frame: pl.DataFrame) -> pl.DataFrame:
+    return kernels.monthly_diffs(frame)
+
+
+def assert_matches(rollup: pl.DataFrame, frame: pl.DataFrame) -> None:
+    assert_frame_equal(
+        rollup.sort("store", "year", "month").with_columns(
+            pl.col("year", "month").cast(pl.Int64)
+        ),
+        recompute(frame),
+        check_exact=False,
+    )
+
+
+def test_refreshes_of_appended_rows_equal_full_recompute(transactions, tmp_path):
+    csv = tmp_path / "coffee_shop_sales.csv"
+    rollup = MonthlyRollup(csv)
+    # cuts inside a month, so a month's total is folded in over several refreshes
+    cuts = [0, 1_000, 1_001, 3_500, transactions.height]
+    for start, end in zip(cuts, cuts[1:]):
+        write_csv(csv, transactions[start:end], append=start > 0)
+        result = rollup.refresh()
+        assert_matches(result, transactions[:end])
+
+    assert_matches(rollup.load(), transactions)
+    assert rollup.transactions().collect().height == transactions.height
+
+
+def test_refresh_without_new_rows_keeps_the_store(transactions, tmp_path):
+    csv = tmp_path / "coffee_shop_sales.csv"
+    write_csv(csv, transactions)
+    rollup = MonthlyRollup(csv)
+    first = rollup.refresh()
+    parts = sorted(rollup.parts_dir.iterdir())
+
+    assert rollup.refresh().equals(first)
+    assert sorted(rollup.parts_dir.iterdir()) == parts
+
+
+def test_rewritten_csv_is_rebuilt(transactions, tmp_path):
+    csv = tmp_path / "coffee_shop_sales.csv"
+    write_csv(csv, transactions)
+    rollup = MonthlyRollup(csv)
+    rollup.refresh()
+
+    # a shorter file, then one of the same size with different rows
+    write_csv(csv, transactions[:2_000])
+    assert_matches(rollup.refresh(), transactions[:2_000])
+    changed = transactions[:2_000].with_columns(pl.col("store").reverse())
+    write_csv(csv, changed)
+    assert_matches(rollup.refresh(), changed)
@@ -0,0 +1,89 @@
+"""Admission control of the worker pool and the per-process shared state."""
+
+import threading
+import time
+
+import pytest
+
+from maven_analytics.serving import (
+    PoolSaturated,
+    WorkerPool,
+    drop_shared,
+    shared,
+    single_flight,
+)
+
+
+def test_full_pool_rejects_at_once_and_frees_slots():
+    pool = WorkerPool(max_workers=1, max_pending=1)
+    gate = threading.Event()
+    try:
+        running = pool.submit(gate.wait)
+        pending = pool.submit(lambda: "pending")
+        started = time.perf_counter()
+        with pytest.raises(PoolSaturated):
+            pool.submit(lambda: "rejected")
+        assert time.perf_counter() - started < 0.1
+        assert pool.stats["rejected"] == 1
+
+        gate.set()
+        running.result(timeout=5)
+        assert pending.result(timeout=5) == "pending"
+        assert pool.submit(lambda: "later").result(timeout=5) == "later"
+    finally:
+        gate.set()
+        pool.shutdown()
+
+
+def test_single_flight_shares_the_running_call():
+    gate = threading.Event()
+    calls = []
+    results = []
+
+    def compute():
+        calls.append(1)
+        gate.wait()
+        return "result"
+
+    def ask():
+        results.append(single_flight("key", compute))
+
+    owner = threading.Thread(target=ask)
+    owner.start()
+    while not calls:
+        time.sleep(0.001)
+    waiters = [threading.Thread(target=ask) for _ in range(3)]
+    for waiter in waiters:
+        waiter.start()
+    time.sleep(0.05)
+    gate.set()
+    for thread in [owner, *waiters]:
+        thread.join(timeout=5)
+
+    assert results == ["result"] * 4
+    assert len(calls) == 1
+    # a finished call is not cached
+    assert single_flight("key", lambda: "again") == "again"
+
+
+def test_single_flight_raises_the_error_to_every_caller():
+    with pytest.raises(KeyError):
+        single_flight("missing", lambda: {}["x"])
+    assert single_flight("missing", lambda: 1) == 1
+
+
+def test_shared_builds_once_until_dropped():
+    builds = []
+
+    def build():
+        builds.append(1)
+        return object()
+
+    try:
+        first = shared("test-key", build)
+        assert shared("test-key", build) is first
+        drop_shared("test-key")
+        assert shared("test-key", build) is not first
+        assert len(builds) == 2
+    finally:
+        drop_shared("test-key")
@@ -0,0 +1,148 @@
+"""Accuracy and merge behaviour of the distinct-count and quantile sketches."""
+
+import numpy as np
+import polars as pl
+import pytest
+
+from maven_analytics.sketches import (
+    HyperLogLog,
+    KLLSketch,
+    SketchSummary,
+    merge_summaries,
+    summarize_files,
+    summarize_partitions,
+)
+
+
+@pytest.fixture
+def rng():
+    return np.random.default_rng(0)
+
+
+def test_hyperloglog_estimate_is_within_its_error(rng):
+    frame = pl.DataFrame({"id": rng.integers(0, 50_000, 200_000)})
+    exact = frame["id"].n_unique()
+    sketch = HyperLogLog().update(frame, ["id"])
+    assert abs(sketch.estimate() - exact) / exact < 3 * sketch.relative_error
+
+
+def test_hyperloglog_merge_equals_sketch_of_union(rng):
+    left = pl.DataFrame({"id": rng.integers(0, 30_000, 50_000)})
+    right = pl.DataFrame({"id": rng.integers(20_000, 60_000, 50_000)})
+    merged = HyperLogLog().update(left, ["id"]).merge(HyperLogLog().update(right, ["id"]))
+    union = HyperLogLog().update(pl.concat([left, right]), ["id"])
+    np.testing.assert_array_equal(merged.registers, union.registers)
+
+
+def test_hyperloglog_rejects_mismatched_precision():
+    with pytest.raises(ValueError):
+        HyperLogLog(10).merge(HyperLogLog(12))
+
+
+def test_kll_quantiles_are_within_rank_error(rng):
+    values = rng.normal(size=500_000)
+    sketch = KLLSketch(seed=0).update(values)
+    qs = [0.01, 0.1, 0.5, 0.9, 0.99]
+    for q, estimate in zip(qs, sketch.quantiles(qs)):
+        assert abs(np.mean(values <= estimate) - q) < 2 * sketch.rank_error
+
+
+def test_kll_memory_is_bounded(rng):
+    sketch = KLLSketch(k=100, seed=0).update(rng.random(1_000_000))
+    assert sketch.n == 1_000_000
+    assert sum(len(items) for items in sketch.levels) < 10 * sketch.k
+
+
+def test_kll_merge_of_partitions_matches_whole(rng):
+    values = rng.exponential(size=300_000)
+    merged = KLLSketch(seed=0)
+    for part in np.array_split(values, 7):
+        merged.merge(KLLSketch(seed=1).update(part))
+    assert merged.n == len(values)
+    for q, estimate in zip([0.25, 0.5, 0.75], merged.quantiles([0.25, 0.5, 0.75])):
+        assert abs(np.mean(values <= estimate) - q) < 2 * merged.rank_error
+
+
+def test_kll_ignores_nulls_and_nans():
+    sketch = KLLSketch().update(pl.Series([1.0, None, float("nan"), 3.0]))
+    assert sketch.n == 2
+    assert KLLSketch().quantile(0.5) is None
+
+
+def test_partition_summaries_merge_to_whole_frame(rng):
+    frame = pl.DataFrame(
+        {
+            "month": rng.integers(1, 13, 100_000),
+            "order_id": rng.integers(0, 20_000, 100_000),
+            "price": rng.gamma(2.0, 5.0, 100_000),
+        }
+    )
+    partitions = summarize_partitions(
+        frame, "month", distinct={"orders": ["order_id"]}, quantiles=["price"]
+    )
+    assert len(partitions) == 12
+    merged = merge_summaries(partitions.values())
+    whole = SketchSummary.from_frame(
+        frame, distinct={"orders": ["order_id"]}, quantiles=["price"]
+    )
+    assert merged.rows == frame.height
+    assert merged.distinct_count("orders") == whole.distinct_count("orders")
+    median = merged.quantile("price", 0.5)
+    assert abs(np.mean(frame["price"].to_numpy() <= median) - 0.5) < 0.02
+
+
+def test_summary_round_trips_through_a_file(rng, tmp_path):
+    frame = pl.DataFrame({"id": rng.integers(0, 5_000, 20_000), "price": rng.random(20_000)})
+    summary = SketchSummary.from_frame(frame, distinct={"ids": ["id"]}, quantiles=["price"])
+    summary.write(tmp_path / "summary.npz")
+    stored = SketchSummary.read(tmp_path / "summary.npz")
+    assert stored.rows == summary.rows
+    assert np.array_equal(stored.distinct["ids"].registers, summary.distinct["ids"].registers)
+    assert stored.quantiles["price"].n == summary.quantiles["price"].n
+    assert stored.quantile("price", 0.3) == summary.quantile("price", 0.3)
+
+
+def test_file_summaries_are_stored_and_reused(rng, tmp_path, monkeypatch):
+    paths = []
+    for month in range(3):
+        path = tmp_path / f"month={month}.parquet"
+        pl.DataFrame(
+            {"order_id": rng.integers(0, 2_000, 5_000), "price": rng.random(5_000)}
+        ).write_parquet(path)
+        paths.append(path)
+    store = tmp_path / "sketches"
+    spec = {"distinct": {"orders": ["order_id"]}, "quantiles": ["price"]}
+    built = summarize_files(paths, store, **spec)
+    assert len(list(store.glob("*.npz"))) == 3
+
+    # unchanged files are answered from the store, without a scan
+    scan_parquet = pl.scan_parquet
+    monkeypatch.setattr(pl, "scan_parquet", lambda *args, **kwargs: pytest.fail("scanned"))
+    stored = summarize_files(paths, store, **spec)
+    assert [summary.rows for summary in stored.values()] == [5_000] * 3
+    assert merge_summaries(stored.values()).distinct_count("orders") == (
+        merge_summaries(built.values()).distinct_count("orders")
+    )
+
+    # a changed file is sketched again; a dropped one loses its summary
+    monkeypatch.setattr(pl, "scan_parquet", scan_parquet)
+    pl.DataFrame({"order_id": [1, 2], "price": [1.0, 2.0]}).write_parquet(paths[0])
+    changed = summarize_files(paths[:2], store, **spec)
+    assert changed[paths[0]].rows == 2
+    assert len(list(store.glob("*.npz"))) == 2
+
+
+def test_restaurant_approximate_order_count(tmp_path, monkeypatch):
+    from maven_analytics import restaurant
+
+    monkeypatch.setattr(restaurant, "ORDERS_BY_MONTH_DIR", tmp_path / "orders_by_month")
+    monkeypatch.setattr(restaurant, "SKETCHES_DIR", tmp_path / "order_sketches")
+    order_items = restaurant.load_order_items()
+    exact = restaurant.summarize(order_items)
+    approximate = restaurant.summarize(order_items, approximate=True)
+    assert list(approximate) == list(exact)
+    assert approximate["order_count"].schema == exact["order_count"].schema
+    count = exact["order_count"].item()
+    assert abs(approximate["order_count"].item() - count) / count < 3 * 1.04 / 64
+    months = restaurant.order_sketches()
+    assert sum(summary.rows for summary in months.values()) == order_items.height
@@ -0,0 +1,59 @@
+"""Report snapshots: reads of the stored view, and invalidation by a changed source."""
+
+import os
+
+import polars as pl
+import pytest
+
+from maven_analytics.snapshot import ReportSnapshot
+
+
+@pytest.fixture
+def source(tmp_path):
+    path = tmp_path / "sales.csv"
+    path.write_text("id,units\n1,5\n")
+    return path
+
+
+@pytest.fixture
+def summary():
+    return pl.DataFrame({"units": [5]})
+
+
+def test_snapshot_round_trips(tmp_path, source, summary):
+    snapshot = ReportSnapshot("report", [source], root=tmp_path / "snapshots")
+    assert snapshot.read("summary") is None
+    snapshot.write("summary", summary)
+    assert ReportSnapshot("report", [source], root=tmp_path / "snapshots").read(
+        "summary"
+    ).equals(summary)
+
+
+def test_changed_source_invalidates_every_summary(tmp_path, source, summary):
+    root = tmp_path / "snapshots"
+    snapshot = ReportSnapshot("report", [source], root=root)
+    snapshot.write("summary", summary)
+    snapshot.write("other", summary)
+
+    source.write_text("id,units\n1,5\n2,3\n")
+    changed = ReportSnapshot("report", [source], root=root)
+    assert changed.key != snapshot.key
+    assert changed.read("summary") is None
+    assert changed.read("other") is None
+
+    calls = []
+    recomputed = pl.DataFrame({"units": [8]})
+    assert changed.get("summary", lambda: calls.append(1) or recomputed).equals(recomputed)
+    assert calls == [1]
+    # the stale summary of the old sources is dropped with the first new write
+    assert sorted(path.name for path in changed.dir.glob("*.arrow")) == ["summary.arrow"]
+    assert changed.get("summary", lambda: calls.append(1) or recomputed).equals(recomputed)
+    assert calls == [1]
+
+
+def test_touched_source_invalidates_the_snapshot(tmp_path, source, summary):
+    root = tmp_path / "snapshots"
+    ReportSnapshot("report", [source], root=root).write("summary", summary)
+    stat = source.stat()
+    os.utime(source, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    assert ReportSnapshot("report", [source], root=root).read("summary") is None
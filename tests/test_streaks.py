@@ -0,0 +1,141 @@
+"""Incremental streak state against a full recompute of the lesson history."""
+
+import datetime as dt
+
+import numpy as np
+import polars as pl
+import pytest
+
+from maven_analytics import kernels, streaks
+from maven_analytics.streaks import StreakState
+
+START = dt.date(2025, 5, 1)
+
+
+@pytest.fixture(scope="module")
+def events():
+    rng = np.random.default_rng(0)
+    rows = 20_000
+    # about 70 lesson days in 150 per user: runs of a few days to a few weeks
+    return (
+        pl.DataFrame(
+            {"user_id": rng.integers(0, 300, rows), "offset": rng.integers(0, 150, rows)}
+        )
+        .with_columns(
+            date=pl.lit(START) + pl.duration(days="offset"),
+            user_name=pl.format("user {}", "user_id"),
+        )
+        .drop("offset")
+    )
+
+
+def full_recompute(events: pl.DataFrame) -> pl.DataFrame:
+    return kernels.daily_streaks(events)
+
+
+def test_state_folded_in_batches_equals_full_recompute(events, tmp_path):
+    state = StreakState(tmp_path / "lessons.parquet", store_dir=tmp_path / "state")
+    cutoffs = [START + dt.timedelta(days=days) for days in (30, 31, 90, 150)]
+    previous = None
+    for cutoff in cutoffs:
+        batch = events.filter(pl.col("date") < cutoff)
+        if previous is not None:
+            batch = batch.filter(pl.col("date") >= previous)
+        result = state.append(batch)
+        previous = cutoff
+
+    everything = full_recompute(events)
+    current = everything.sort("user_id", "end").group_by("user_id").last()
+    expected_current = current.select(
+        "user_id", streak_start="start", streak_len="length", last_active="end"
+    ).sort("user_id")
+    assert result.select(expected_current.columns).equals(expected_current)
+
+    best = (
+        everything.sort("user_id", "end")
+        .group_by("user_id", maintain_order=True)
+        .agg(pl.all().get(pl.col("length").arg_max()))
+    )
+    expected_best = best.select(
+        "user_id", best_start="start", best_end="end", best_len="length"
+    ).sort("user_id")
+    assert result.select(expected_best.columns).equals(expected_best)
+
+
+def test_older_events_are_rejected(events, tmp_path):
+    state = StreakState(tmp_path / "lessons.parquet", store_dir=tmp_path / "state")
+    state.append(events.filter(pl.col("date") >= START + dt.timedelta(days=10)))
+    with pytest.raises(ValueError):
+        state.append(events.filter(pl.col("date") < START + dt.timedelta(days=10)))
+
+
+def test_leaderboard_only_answers_the_last_day(events):
+    state = streaks.fold_events(streaks.empty_state(), events.lazy())
+    last = state.get_column("last_active").max()
+    board = streaks.leaderboard(state, last, k=5)
+    assert board.height == 5
+    assert board.get_column("last_active").to_list() == [last] * 5
+    assert board.get_column("streak_len").is_sorted(descending=True)
+    with pytest.raises(ValueError):
+        streaks.leaderboard(state, last - dt.timedelta(days=1))
+
+
+def test_all_time_best_lists_each_user_once(events):
+    state = streaks.fold_events(streaks.empty_state(), events.lazy())
+    best = streaks.all_time_best(state, k=20)
+    assert best.get_column("user_id").is_unique().all()
+    assert best.get_column("best_len").is_sorted(descending=True)
+
+
+def test_string_user_ids(events, tmp_path):
+    named = events.with_columns(user_id="user_name")
+    state = StreakState(tmp_path / "lessons.parquet", store_dir=tmp_path / "state")
+    state.append(named.filter(pl.col("date") < START + dt.timedelta(days=60)))
+    result = state.append(named.filter(pl.col("date") >= START + dt.timedelta(days=60)))
+
+    assert result.schema["user_id"] == pl.String
+    expected = streaks.fold_events(streaks.empty_state(), events.lazy())
+    assert result.get_column("streak_len").to_list() == (
+        expected.sort(pl.format("user {}", "user_id")).get_column("streak_len").to_list()
+    )
+
+
+def test_completions_logged_later_on_the_last_day_are_counted(events, tmp_path):
+    lessons = tmp_path / "lessons.parquet"
+    last = START + dt.timedelta(days=100)
+    history = events.filter(pl.col("date") <= last)
+    # half of the last day's completions are only logged after the first refresh
+    late = history.filter((pl.col("date") == last) & (pl.col("user_id") % 2 == 0))
+    history.join(late, on=history.columns, how="anti").write_parquet(lessons)
+    state = StreakState(lessons, store_dir=tmp_path / "state")
+    state.refresh()
+
+    history.write_parquet(lessons)
+    result = state.refresh()
+    assert state.through == last
+    expected = streaks.fold_events(streaks.empty_state(), history.lazy())
+    assert result.equals(expected)
+    # refreshing again with nothing new changes nothing
+    assert state.refresh().equals(expected)
+
+
+def test_interrupted_append_is_folded_once(events, tmp_path, monkeypatch):
+    lessons = tmp_path / "lessons.parquet"
+    cutoff = START + dt.timedelta(days=75)
+    events.filter(pl.col("date") < cutoff).write_parquet(lessons)
+    state = StreakState(lessons, store_dir=tmp_path / "state")
+    state.refresh()
+
+    events.write_parquet(lessons)
+
+    def crash(manifest):
+        raise KeyboardInterrupt
+
+    with monkeypatch.context() as patch:
+        patch.setattr(state, "_write_manifest", crash)
+        with pytest.raises(KeyboardInterrupt):
+            state.refresh()
+    result = state.refresh()
+
+    assert result.equals(streaks.fold_events(streaks.empty_state(), events.lazy()))
+    assert len(list(state.store_dir.glob("state-*.parquet"))) == 1
@@ -0,0 +1,80 @@
+"""Partial top-k over partitions against a group_by of all the rows."""
+
+import numpy as np
+import polars as pl
+import pytest
+
+from maven_analytics import topk
+
+
+@pytest.fixture(scope="module")
+def flights():
+    rng = np.random.default_rng(0)
+    rows = 30_000
+    cities = [f"city {i:03d}" for i in range(300)]
+    return pl.DataFrame(
+        {
+            # skewed, so partitions disagree about the leaders
+            "CITY": [cities[i] if i < 300 else None for i in rng.zipf(1.3, rows) - 1],
+            "AIRLINE NAME": rng.choice(["A", "B", "C", "D", "E"], rows),
+            "Status": rng.choice(["On-Time", "Delayed", "Canceled"], rows),
+        }
+    )
+
+
+def partitions(frame: pl.DataFrame, count: int) -> list[pl.LazyFrame]:
+    # sorted by city first, so each city is spread over few partitions
+    frame = frame.sort("CITY", nulls_last=True)
+    size = -(-frame.height // count)
+    return [frame.slice(offset, size).lazy() for offset in range(0, frame.height, size)]
+
+
+@pytest.mark.parametrize("count", [1, 7])
+def test_city_counts_match_group_by(flights, count):
+    expected = (
+        flights.drop_nulls("CITY")
+        .group_by("CITY")
+        .agg(total=pl.len().cast(pl.Int64))
+        .sort("total", "CITY", descending=[True, False])
+        .head(10)
+    )
+    assert topk.city_flight_counts(partitions(flights, count)).equals(expected)
+
+
+@pytest.mark.parametrize("count", [1, 7])
+def test_delay_rates_come_from_merged_counts(flights, count):
+    expected = (
+        flights.group_by("AIRLINE NAME")
+        .agg(
+            total=pl.len().cast(pl.Int64),
+            delayed=(pl.col("Status") == "Delayed").sum().cast(pl.Int64),
+        )
+        .with_columns(pct_delayed=pl.col("delayed") / pl.col("total"))
+        .sort("pct_delayed", descending=True)
+        .head(3)
+    )
+    result = topk.airline_delay_rates(partitions(flights, count), k=3)
+    assert result.equals(expected)
+
+
+def test_ties_and_null_keys_are_ordered_by_key():
+    frame = pl.DataFrame({"key": ["b", None, "a", "c", "c"], "value": [1, 1, 1, 1, 1]})
+    result = topk.partial_top_k(
+        [frame[:2].lazy(), frame[2:].lazy()],
+        by="key",
+        partials={"total": pl.len()},
+        order_by="total",
+        k=4,
+    )
+    assert result.get_column("key").to_list() == ["c", "a", "b", None]
+
+
+def test_fewer_groups_than_k_and_no_partitions():
+    frame = pl.DataFrame({"key": [1, 2, 2]})
+    result = topk.partial_top_k(
+        [frame.lazy()], by="key", partials={"total": pl.len()}, order_by="total"
+    )
+    assert result.rows() == [(2, 2), (1, 1)]
+    assert topk.partial_top_k(
+        [], by="key", partials={"total": pl.len()}, order_by="total"
+    ).is_empty()
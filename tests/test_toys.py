@@ -0,0 +1,65 @@
+"""Date-keyed toy sales: month slices against a Month_Ordinal filter."""
+
+import datetime as dt
+
+import numpy as np
+import polars as pl
+import pytest
+
+from maven_analytics import toys
+
+
+@pytest.fixture
+def calendar(monkeypatch):
+    # calendar rows need not be complete: the calendar is dense from first to last
+    dates = pl.DataFrame(
+        {"Date": [dt.date(2022, 1, 1), dt.date(2022, 6, 3), dt.date(2023, 9, 30)]}
+    )
+    monkeypatch.setattr(toys.ingest, "read", lambda name: dates)
+    return toys.load_calendar()
+
+
+@pytest.fixture
+def source(tmp_path, calendar):
+    rng = np.random.default_rng(0)
+    rows = 4_000
+    days = rng.integers(0, calendar.height, rows)
+    # no sales in March 2022
+    days = days[~np.isin(days, np.arange(59, 90))]
+    path = tmp_path / "sales.parquet"
+    pl.DataFrame(
+        {
+            "Sale_ID": np.arange(len(days)),
+            "Date": [dt.date(2022, 1, 1) + dt.timedelta(days=int(day)) for day in days],
+            "Units": rng.integers(1, 5, len(days)),
+        }
+    ).write_parquet(path)
+    return path
+
+
+def test_calendar_keys_are_row_positions(calendar):
+    assert calendar.height == (dt.date(2023, 9, 30) - dt.date(2022, 1, 1)).days + 1
+    assert calendar.get_column("Date_Key").to_list() == list(range(calendar.height))
+    assert calendar.get_column("Month_Ordinal").is_sorted()
+
+
+def test_month_slice_matches_month_ordinal_filter(calendar, source, tmp_path):
+    sales = toys.load_sales(calendar, source, tmp_path / "keyed")
+    dated = sales.join(
+        calendar.select("Date_Key", "Month_Ordinal"), on="Date_Key"
+    ).sort("Date_Key", "Sale_ID")
+    ordinals = calendar.get_column("Month_Ordinal")
+    for ordinal in range(ordinals.min() - 1, ordinals.max() + 2):
+        expected = dated.filter(pl.col("Month_Ordinal") == ordinal).drop("Month_Ordinal")
+        assert toys.month_slice(sales, calendar, ordinal).equals(expected)
+    assert toys.month_slice(sales, calendar, 2022 * 12 + 2).is_empty()
+    assert toys.latest_month(sales, calendar) == ordinals.max()
+
+
+def test_sales_outside_the_calendar_are_rejected(calendar, source, tmp_path):
+    late = tmp_path / "late.parquet"
+    pl.read_parquet(source).with_columns(
+        pl.col("Date").dt.offset_by("2y")
+    ).write_parquet(late)
+    with pytest.raises(ValueError, match="outside the calendar"):
+        toys.load_sales(calendar, late, tmp_path / "keyed")